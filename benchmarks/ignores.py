@@ -0,0 +1,60 @@
+"""
+Cost of matching ignore patterns as a function of the number of patterns.
+
+Usage: python -m benchmarks.ignores
+"""
+
+import fnmatch
+import json
+import sys
+import timeit
+from functools import partial
+
+from backup.models.backup_config import Ignores
+
+pattern_counts = (1, 10, 100, 1000)
+number_of_paths = 10_000
+
+
+def generate_patterns(count: int) -> list[str]:
+    shapes = ("*.ext{}", "/home/user/dir{}*", "*/name{}/*", "/data/[ab]{}/*.log")
+    return [shapes[index % len(shapes)].format(index) for index in range(count)]
+
+
+def generate_paths() -> list[str]:
+    return [
+        f"/home/user/project{index % 100}/sub{index % 7}/file{index}.txt"
+        for index in range(number_of_paths)
+    ]
+
+
+def match_with_fnmatch(patterns: list[str], paths: list[str]) -> None:
+    for path in paths:
+        any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+def match_compiled(patterns: list[str], paths: list[str]) -> None:
+    ignores = Ignores(patterns=patterns)
+    for path in paths:
+        ignores.matches(path)
+
+
+def measure(count: int, paths: list[str]) -> dict[str, float]:
+    patterns = generate_patterns(count)
+    results: dict[str, float] = {"patterns": count}
+    functions = {"fnmatch": match_with_fnmatch, "compiled": match_compiled}
+    for name, function in functions.items():
+        timer = timeit.Timer(partial(function, patterns, paths))
+        duration = min(timer.repeat(number=1, repeat=3))
+        results[f"{name}_ns_per_path"] = duration / len(paths) * 1e9
+    return results
+
+
+def main() -> None:
+    paths = generate_paths()
+    for count in pattern_counts:
+        sys.stdout.write(json.dumps(measure(count, paths)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
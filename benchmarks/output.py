@@ -0,0 +1,81 @@
+"""
+Throughput of reading the output lines of a command that prints many lines.
+
+Usage: python -m benchmarks.output
+
+The chunked reader of backup.utils is compared with the previous reader that calls
+readline on text pipes after every select. Every output size results in one JSON
+line on stdout.
+"""
+
+import json
+import select
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator
+from typing import IO
+
+from cli.commands.runner import Runner
+
+from backup.utils import generate_output_lines
+
+output_sizes = (1, 10, 50)  # megabytes
+line = "= home/user/project/directory/file.txt"
+
+
+def create_runner(size: int) -> Runner[str]:
+    count = size * 10**6 // (len(line) + 1)
+    code = f"import sys; sys.stdout.write({line!r} '\\n' * {count})"
+    return Runner((sys.executable, "-c", code))
+
+
+def generate_lines_with_readline(runner: Runner[str]) -> Iterator[str]:
+    runner.stdout = subprocess.PIPE
+    runner.stderr = subprocess.PIPE
+    process = runner.launch()
+    streams = process.stdout, process.stderr
+    outputs: list[IO[str]] = [f for f in streams if f is not None]
+    while outputs:
+        readable_outputs, _, _ = select.select(outputs, [], [])
+        for output in readable_outputs:
+            output_line = output.readline().strip()
+            if output_line:
+                yield output_line
+            else:
+                outputs.remove(output)
+
+
+def measure_reader(
+    reader: Callable[[Runner[str]], Iterator[str]],
+    size: int,
+) -> tuple[float, int]:
+    durations = []
+    for _ in range(3):
+        start = time.perf_counter()
+        count = sum(1 for _ in reader(create_runner(size)))
+        durations.append(time.perf_counter() - start)
+    return min(durations), count
+
+
+def measure(size: int) -> dict[str, float]:
+    results: dict[str, float] = {"megabytes": size}
+    readers = {
+        "readline": generate_lines_with_readline,
+        "chunked": generate_output_lines,
+    }
+    for name, reader in readers.items():
+        duration, count = measure_reader(reader, size)
+        results["lines"] = count
+        results[f"{name}_seconds"] = duration
+        results[f"{name}_megabytes_per_second"] = size / duration
+    return results
+
+
+def main() -> None:
+    for size in output_sizes:
+        sys.stdout.write(json.dumps(measure(size)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Duration and peak memory of the backup phases on synthetic trees.
+
+Usage: python -m benchmarks.phases [preset ...] [field=value ...]
+
+The presets are small, medium and large, and field=value overrides a field of every
+selected TreeSpec. Every tree results in one JSON line on stdout that holds the
+commit, the tree shape and the measurements, such that runs on different commits
+can be compared line by line.
+"""
+
+import contextlib
+import dataclasses
+import json
+import os
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+from unittest.mock import patch
+
+import cli
+from package_utils.storage import CachedFileContent
+
+from backup.backup import Backup
+from backup.backup.cache import CacheSyncer
+from backup.backup.change_scanner import ChangeScanner
+from backup.context import Storage, context
+from backup.models import Changes, Path, PrintStructure
+from tests.mocks.remote import alias_remote
+
+from .tree import Tree, TreeSpec
+
+remote_name = "backupmaster"
+presets = {
+    "small": TreeSpec(files=1000),
+    "medium": TreeSpec(files=10_000, depth=4),
+    "large": TreeSpec(files=100_000, depth=5, width=6),
+}
+
+
+def reset_peak_rss() -> None:
+    # Linux resets the peak resident set size of the process on request
+    with contextlib.suppress(OSError):
+        Path("/proc/self/clear_refs").write_text("5")
+
+
+def read_peak_rss() -> int:
+    with contextlib.suppress(OSError):
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def read_commit() -> str | None:
+    lines = cli.capture_output_lines("git", "rev-parse", "--short", "HEAD", check=False)
+    return lines[0] if lines else None
+
+
+@contextmanager
+def silence_stdout() -> Iterator[None]:
+    # rclone writes its progress to the inherited stdout
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with Path(os.devnull).open("w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+@contextmanager
+def isolate(directory: Path) -> Iterator[None]:
+    """
+    Keep all state of the run in the given directory and disable interaction.
+    """
+    number_of_paths = CachedFileContent(directory / "number_of_paths", default=0)
+    patches = (
+        patch.object(Path, "scan_index", new=directory / Path.scan_index.name),
+        patch.object(Path, "journal", new=directory / Path.journal.name),
+        patch.object(Storage, "number_of_paths", new=number_of_paths),
+        patch.object(context.options, "confirm_push", new=False),
+        patch("cli.track_progress", new=lambda *args, **_: args[0]),
+    )
+    with ExitStack() as stack:
+        for item in patches:
+            stack.enter_context(item)
+        # the environment holds the configuration of the remote of this run
+        stack.enter_context(patch.dict(context.__dict__))
+        context.__dict__.pop("rclone_env", None)
+        yield
+
+
+@dataclass
+class Benchmark:
+    """
+    Push a synthetic tree to an alias remote and measure every phase separately.
+
+    The source changes before the incremental push and the remote changes before the
+    cache update and the pull. The peak memory of rclone is the maximum over all
+    rclone processes started so far.
+    """
+
+    spec: TreeSpec
+    results: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        reset_peak_rss()
+        start = time.perf_counter()
+        yield
+        self.results[f"{name}_seconds"] = time.perf_counter() - start
+        self.results[f"{name}_peak_rss_mb"] = read_peak_rss() / 1e6
+
+    def run(self) -> dict[str, Any]:
+        with (
+            alias_remote(remote_name) as remote,
+            Path.tempdir() as directory,
+            isolate(directory),
+            silence_stdout(),
+        ):
+            tree = Tree(self.spec, directory / "source")
+            tree.create()
+            backup = Backup(self.create_config(tree, directory / "cache"))
+            self.run_phases(tree, backup, remote)
+        rclone_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+        self.results["rclone_peak_rss_mb"] = rclone_peak / 1e6
+        return {"commit": read_commit(), **self.spec.summary(), **self.results}
+
+    def run_phases(self, tree: Tree, backup: Backup, remote: Path) -> None:
+        with self.measure("initial_push"):
+            backup.push()
+        tree.modify(tree.root)
+        scanner = ChangeScanner(backup.backup_configs)
+        with self.measure("calculate_changes"):
+            changes: list[Changes] = list(scanner.calculate_changes())
+        self.results["changes"] = sum(len(item.changes) for item in changes)
+        with self.measure("print_structure"):
+            for item in changes:
+                PrintStructure.from_changes(item.changes)
+        with self.measure("push"):
+            backup.push()
+        tree.modify(remote, salt=2)
+        with self.measure("update_cache"):
+            for config in backup.backup_configs:
+                CacheSyncer(config).update_cache()
+        tree.modify(remote, salt=3, offset=7200)
+        with self.measure("pull"):
+            backup.pull()
+
+    @classmethod
+    def create_config(cls, tree: Tree, cache: Path) -> dict[str, Any]:
+        return {
+            "source": str(tree.root),
+            "dest": f"{remote_name}:",
+            "cache": str(cache),
+            "syncs": [{"includes": [""]}],
+            "ignores": {"patterns": tree.generate_patterns()},
+        }
+
+
+def parse_specs(arguments: list[str]) -> Iterator[TreeSpec]:
+    names = [argument for argument in arguments if "=" not in argument]
+    overrides = dict(
+        argument.split("=", 1) for argument in arguments if "=" in argument
+    )
+    for name in names or ["small"]:
+        spec = presets[name]
+        values = {
+            key: type(getattr(spec, key))(value) for key, value in overrides.items()
+        }
+        yield dataclasses.replace(spec, **values)
+
+
+def main() -> None:
+    for spec in parse_specs(sys.argv[1:]):
+        results = Benchmark(spec).run()
+        sys.stdout.write(json.dumps(results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
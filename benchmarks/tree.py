@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic directory trees for the benchmarks.
+"""
+
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from backup.models import Path
+
+ignored_suffix = ".ignored"
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    """
+    Shape of a synthetic tree.
+
+    Files are spread uniformly over a tree of directories with the given depth and
+    number of subdirectories per directory. File sizes are drawn from the size
+    distribution, which maps a size in bytes to its relative weight. The ignore ratio
+    is the fraction of files that matches one of the ignore patterns.
+    """
+
+    files: int = 1000
+    depth: int = 3
+    width: int = 4
+    sizes: dict[int, float] = field(
+        default_factory=lambda: {0: 0.05, 100: 0.5, 10_000: 0.4, 1_000_000: 0.05},
+    )
+    change_ratio: float = 0.01
+    ignore_patterns: int = 10
+    ignore_ratio: float = 0.1
+    seed: int = 0
+
+    def summary(self) -> dict[str, float]:
+        fields = ("files", "depth", "width", "change_ratio")
+        summary: dict[str, float] = {name: getattr(self, name) for name in fields}
+        summary |= {"ignore_patterns": self.ignore_patterns}
+        summary |= {"ignore_ratio": self.ignore_ratio}
+        return summary
+
+
+@dataclass
+class Tree:
+    spec: TreeSpec
+    root: Path
+    paths: list[str] = field(default_factory=list)
+
+    def create_random(self, salt: int = 0) -> random.Random:
+        return random.Random(f"{self.spec.seed}-{salt}")  # noqa: S311
+
+    def generate_patterns(self) -> list[str]:
+        return [
+            f"*{ignored_suffix}{index}" for index in range(self.spec.ignore_patterns)
+        ]
+
+    def generate_directories(self) -> Iterator[str]:
+        level = [""]
+        yield from level
+        for _ in range(self.spec.depth):
+            level = [
+                f"{parent}dir{index}/"
+                for parent in level
+                for index in range(self.spec.width)
+            ]
+            yield from level
+
+    def create(self) -> None:
+        generator = self.create_random()
+        directories = list(self.generate_directories())
+        sizes = list(self.spec.sizes)
+        weights = list(self.spec.sizes.values())
+        n_patterns = max(self.spec.ignore_patterns, 1)
+        for index in range(self.spec.files):
+            directory = generator.choice(directories)
+            is_ignored = generator.random() < self.spec.ignore_ratio
+            suffix = f"{ignored_suffix}{index % n_patterns}" if is_ignored else ".txt"
+            relative = f"{directory}file{index}{suffix}"
+            size = generator.choices(sizes, weights)[0]
+            path = self.root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.byte_content = generator.randbytes(size)
+            self.paths.append(relative)
+
+    def modify(self, root: Path, salt: int = 1, offset: int = 3600) -> list[str]:
+        """
+        Change the content and mtime of a fraction of the files below root.
+
+        The offset exceeds the minute precision with which remote dates are compared.
+        """
+        generator = self.create_random(salt)
+        count = round(len(self.paths) * self.spec.change_ratio)
+        changed = generator.sample(self.paths, count)
+        for relative in changed:
+            path = root / relative
+            if path.exists():
+                mtime = path.mtime
+                path.byte_content = generator.randbytes(max(path.size, 1))
+                path.touch(mtime=mtime + offset)
+        return changed
@@ -5,15 +5,19 @@ from typing import Any
 
 from backup.context import Action, context
 from backup.models import BackupConfig, Changes
-from backup.syncer import SyncConfig, Syncer
 from backup.utils.parser.config import parse_config
 
 from .cache import CacheSyncer
 from .change_scanner import ChangeScanner
+from .journal import Watcher
+from .scheduler import SyncJob, SyncScheduler
 
 
 def run(config: dict[str, Any]) -> list[Changes]:
     backup = Backup(config)
+    if context.options.action == Action.watch:
+        backup.watch()
+        return []
     return backup.pull() if context.options.action == Action.pull else backup.push()
 
 
@@ -26,12 +30,13 @@ class Backup:
         return list(parse_config(self.config))
 
     def push(self, *, reverse: bool = False) -> list[Changes]:
-        changes = ChangeScanner(self.backup_configs).check_changes(reverse=reverse)
-        cache_configs = self.generate_sync_configs(changes)
-        remote_configs = self.generate_sync_configs(changes, cache=False)
-        for cache, remote in zip(cache_configs, remote_configs, strict=True):
-            Syncer(remote).push(reverse=reverse)
-            Syncer(cache).push()
+        for item in self.backup_configs:
+            SyncScheduler.recover(item)
+        scanner = ChangeScanner(self.backup_configs)
+        changes = scanner.check_changes(reverse=reverse)
+        jobs = list(self.generate_jobs(changes))
+        SyncScheduler(reverse=reverse).run(jobs)
+        scanner.commit()
         return changes
 
     def pull(self) -> list[Changes]:
@@ -40,16 +45,10 @@ class Backup:
                 CacheSyncer(item).sync_from_remote()
         return self.push(reverse=True)
 
-    def generate_sync_configs(
-        self,
-        changes: Iterable[Changes],
-        *,
-        cache: bool = True,
-    ) -> Iterator[SyncConfig]:
+    def watch(self) -> None:
+        Watcher(self.backup_configs).run()
+
+    def generate_jobs(self, changes: Iterable[Changes]) -> Iterator[SyncJob]:
         for item, change in zip(self.backup_configs, changes, strict=True):
             if change.paths:
-                yield SyncConfig(
-                    source=item.source,
-                    dest=item.cache if cache else item.dest,
-                    paths=change.paths,
-                )
+                yield SyncJob(item, change.paths)
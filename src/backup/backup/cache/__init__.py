@@ -1,3 +1,4 @@
 from .cache_scanner import CacheScanner
 from .cache_syncer import CacheSyncer
 from .entry import Entry
+from .scan_index import IndexedFile, ScanIndex
@@ -0,0 +1,188 @@
+import os
+import shutil
+import tarfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+import superpathlib
+
+from backup.context import context
+from backup.models import BackupConfig, Path
+from backup.syncer import ListedFile, SyncConfig, Syncer
+
+from .chunker import is_manifest
+from .scan_index import ScanIndex
+
+bundle_name = ".bundle.tar"
+
+
+@dataclass
+class Bundler:
+    """
+    Pack the small files below the bundle directories of a config into a single
+    archive per directory.
+
+    Uploading a small file to a Drive-type remote mostly waits on the latency of the
+    API call per object. The cache holds every archive next to the files it contains,
+    such that the cache keeps mirroring the remote and the archive serves as manifest.
+    A file is bundled while it is small and gets its own object once it grows.
+    """
+
+    backup_config: BackupConfig
+    members: dict[Path, set[str]] = field(default_factory=dict)
+
+    def find_directory(self, path: superpathlib.Path) -> Path | None:
+        for directory in self.backup_config.bundles:
+            if path.is_relative_to(directory) and path != directory:
+                return directory
+        return None
+
+    def select(
+        self,
+        paths: Iterable[superpathlib.Path],
+        *,
+        reverse: bool = False,
+    ) -> list[superpathlib.Path]:
+        if not self.backup_config.bundles:
+            return []
+        return [path for path in paths if self.is_bundled(path, reverse=reverse)]
+
+    def select_unbundled(
+        self,
+        paths: Iterable[superpathlib.Path],
+    ) -> list[superpathlib.Path]:
+        """
+        Paths that leave the current archive of their directory, such as files that
+        grew, whose archive needs to be repacked without them.
+        """
+        if not self.backup_config.bundles:
+            return []
+        return [path for path in paths if self.is_unbundled(path)]
+
+    def is_unbundled(self, path: superpathlib.Path) -> bool:
+        directory = self.find_directory(path)
+        if directory is None or self.is_bundled(path):
+            return False
+        return str(path.relative_to(directory)) in self.load_members(directory)
+
+    def is_bundled(self, path: superpathlib.Path, *, reverse: bool = False) -> bool:
+        directory = self.find_directory(path)
+        if directory is None or path.name == bundle_name:
+            return False
+        size = (self.backup_config.source / path).read_size()
+        if reverse or size is None:
+            # files that are pulled or deleted are bundled if the remote bundles them
+            return str(path.relative_to(directory)) in self.load_members(directory)
+        return size <= context.config.bundle_file_size
+
+    def load_members(self, directory: Path) -> set[str]:
+        if directory not in self.members:
+            archive = self.backup_config.cache / directory / bundle_name
+            names = set()
+            if archive.exists():
+                with tarfile.open(archive) as tar:
+                    names = {member.name for member in tar if member.isfile()}
+            self.members[directory] = names
+        return self.members[directory]
+
+    def generate_members(self) -> Iterator[str]:
+        for directory in self.backup_config.bundles:
+            for name in self.load_members(directory):
+                yield str(directory / name)
+
+    def push(
+        self,
+        paths: list[superpathlib.Path],
+        unbundled: Iterable[superpathlib.Path] = (),
+    ) -> None:
+        """
+        Repack the bundles of the paths from the cache and upload them.
+
+        The remote copies of the bundled paths are removed in the same sync, which
+        covers files that were uploaded before they were bundled. The unbundled paths
+        are uploaded on their own, such that only their archives are repacked.
+        """
+        changed = [*paths, *unbundled]
+        directories = {self.find_directory(path) for path in changed} - {None}
+        archives = [directory / bundle_name for directory in directories if directory]
+        with Path.tempdir() as staging:
+            for archive in archives:
+                self.pack(archive.parent)
+                target = staging / archive
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(self.backup_config.cache / archive, target)
+            config = SyncConfig(
+                source=staging,
+                dest=self.backup_config.dest,
+                paths=[*archives, *paths],
+                show_progress=False,
+            )
+            Syncer(config).push()
+        ScanIndex(self.backup_config.cache).refresh(archives)
+
+    def pack(self, directory: Path) -> None:
+        root = self.backup_config.cache / directory
+        archive = root / bundle_name
+        # the .part suffix excludes the archive from a concurrent scan
+        temporary = root / f"{bundle_name}.part"
+        with tarfile.open(temporary, "w") as tar:
+            for path in sorted(self.generate_small_files(root)):
+                tar.add(path, arcname=str(path.relative_to(root)), recursive=False)
+        temporary.replace(archive)
+        self.members.pop(directory, None)
+
+    @classmethod
+    def generate_small_files(cls, root: Path) -> Iterator[Path]:
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = Path(directory) / name
+                size = path.read_size()
+                is_small = size is not None and size <= context.config.bundle_file_size
+                is_packed = name != bundle_name and not path.is_symlink()
+                # manifests of chunked files are synced by the chunker
+                if is_small and is_packed and not is_manifest(path):
+                    yield path
+
+    def fetch(self, archives: list[Path]) -> Iterator[Path]:
+        """
+        Download changed archives into the cache and unpack them.
+        """
+        if archives:
+            config = SyncConfig(
+                source=self.backup_config.cache,
+                dest=self.backup_config.dest,
+                paths=[*archives],
+                show_progress=False,
+            )
+            Syncer(config).pull()
+        for archive in archives:
+            self.members.pop(archive.parent, None)
+            yield from self.unpack(archive.parent)
+
+    def unpack(self, directory: Path) -> Iterator[Path]:
+        root = self.backup_config.cache / directory
+        with tarfile.open(root / bundle_name) as tar:
+            for member in tar:
+                if member.isfile() and is_safe(member.name):
+                    path = root / member.name
+                    is_current = (
+                        path.read_size() == member.size
+                        and int(path.mtime) == member.mtime
+                    )
+                    if not is_current:
+                        content = tar.extractfile(member)
+                        if content is not None:
+                            path.byte_content = content.read()
+                            os.utime(path, (member.mtime, member.mtime))
+                            yield directory / member.name
+
+
+def is_outdated(path: Path, file: ListedFile) -> bool:
+    # archives can change within the minute that the dates of other files are
+    # compared at, while their size is padded to full blocks
+    return path.read_size() != file.size or int(path.mtime) != file.mtime
+
+
+def is_safe(name: str) -> bool:
+    path = Path(name)
+    return not path.is_absolute() and ".." not in path.parts
@@ -1,18 +1,34 @@
-from collections.abc import Iterator
+import bisect
+import itertools
+import os
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
-from typing import Any
+from functools import cached_property
 
+from backup.context import context
 from backup.models import BackupConfig, Changes, Path, PathRule
 from backup.syncer import SyncConfig, Syncer
+from backup.syncer.status import save_mtime_batch
 
+from .content_hash import ContentComparer
 from .entry import Entry
+from .prefix import create_prefix, create_range
+from .rule_trie import RuleTrie
+from .scan_index import IndexedFile, Repositories, ScanIndex
+from .snapshot import Snapshot
+from .walker import Walker
 
 
 @dataclass
 class CacheScanner:
     backup_config: BackupConfig
-    visited: set[Path] = field(default_factory=set)
-    entries: set[Entry] = field(default_factory=set)
+    entries: Iterable[Entry] = ()
+    cached_files: dict[str, IndexedFile] = field(default_factory=dict)
+    cached_paths: list[str] = field(default_factory=list)
+    seen: set[str] = field(default_factory=set)
+    journaled: list[str] | None = None
+    is_rebuilt: bool = False
+    found_repositories: Repositories = field(default_factory=dict)
 
     @property
     def sync_config(self) -> SyncConfig:
@@ -21,50 +37,255 @@ class CacheScanner:
             dest=self.backup_config.cache,
         )
 
+    @cached_property
+    def index(self) -> ScanIndex:
+        return ScanIndex(self.backup_config.cache)
+
+    @cached_property
+    def rule_trie(self) -> RuleTrie:
+        return RuleTrie.from_rules(self.generate_rules())
+
+    @cached_property
+    def roots(self) -> list[str]:
+        return sorted(self.rule_trie.generate_roots())
+
+    @cached_property
+    def prefix(self) -> str:
+        return create_prefix(self.backup_config.source)
+
+    @cached_property
+    def repositories(self) -> Repositories:
+        return self.index.load_repositories(self.prefix)
+
     def calculate_changes(self, *, reverse: bool = False) -> Changes:
-        paths = [entry.relative for entry in self.entries if entry.is_changed()]
-        return (
-            Syncer(self.sync_config.with_paths(paths)).capture_status(
-                reverse=reverse,
-                is_cache=True,
-            )
-            if paths
-            else Changes()
+        changed = [entry for entry in self.entries if entry.is_changed()]
+        if context.options.content_hash:
+            changed = self.drop_identical(changed)
+        relatives = dict.fromkeys(entry.relative for entry in changed)
+        paths = [Path(relative) for relative in relatives]
+        if not paths:
+            return Changes()
+        changes = Syncer(self.sync_config.with_paths(paths)).capture_status(
+            reverse=reverse,
+            is_cache=True,
         )
+        # checking the status updates the cache for paths without changes
+        self.index.refresh(paths)
+        return changes
+
+    def drop_identical(self, entries: list[Entry]) -> list[Entry]:
+        """
+        Drop touched files with the same content on both sides and align their mtime.
+        """
+        candidates = [
+            entry
+            for entry in entries
+            if entry.source is not None
+            and entry.cached is not None
+            and entry.source.size == entry.cached.size
+        ]
+        cache_prefix = create_prefix(self.backup_config.cache)
+        pairs = [
+            (self.prefix + entry.relative, cache_prefix + entry.relative)
+            for entry in candidates
+        ]
+        results = ContentComparer(self.index).is_identical(pairs)
+        compared = zip(candidates, pairs, results, strict=True)
+        identical = {
+            entry.relative: pair
+            for entry, pair, is_identical in compared
+            if is_identical
+        }
+        # save the original mtime for remote syncing, like checking the status does
+        save_mtime_batch(self.backup_config.cache, list(identical))
+        for source, cache in identical.values():
+            info = os.stat(source)  # noqa: PTH116
+            os.utime(cache, ns=(info.st_atime_ns, info.st_mtime_ns))
+        self.index.refresh(Path(relative) for relative in identical)
+        return [entry for entry in entries if entry.relative not in identical]
 
     def generate_entries(self) -> Iterator[Entry]:
-        for rule in self.generate_rules():
-            source_path = Path(self.sync_config.source) / rule.path
-            dest_path = Path(self.sync_config.dest) / rule.path
-            if rule.include:
-                is_file = source_path.is_file() or dest_path.is_file()
-                if is_file:
-                    if source_path.exists():
-                        yield self.create_entry(source=source_path)
-                    else:
-                        yield self.create_entry(dest=dest_path)
-                else:
-                    for entry_path in source_path.find(exclude=self.exclude_root):
-                        yield self.create_entry(source=entry_path)
-                    for entry_path in dest_path.find(
-                        exclude=lambda path_: path_ in self.visited,
-                    ):
-                        yield self.create_entry(dest=entry_path)
-            self.visited.add(source_path)
-            self.visited.add(dest_path)
+        self.cached_files = self.load_cached_files()
+        use_journal = self.journaled is not None and not self.is_rebuilt
+        directories = []
+        for relative in self.select_journaled() if use_journal else self.roots:
+            source = Snapshot.from_path(self.prefix + relative)
+            is_file = (source is not None and source.is_file) or (
+                relative in self.cached_files
+            )
+            if not is_file:
+                directories.append(relative)
+            elif self.rule_trie.includes(relative):
+                exists = source is not None
+                yield self.create_entry(
+                    relative,
+                    source,
+                    in_source=exists,
+                    in_cache=not exists,
+                )
+        # all directories are scanned in a single walk
+        yield from self.generate_source_entries(directories)
+        for directory in directories:
+            yield from self.generate_cache_entries(directory)
+        self.index.save_repositories(
+            self.prefix,
+            self.found_repositories,
+            replace=not use_journal,
+        )
+
+    def select_journaled(self) -> Iterator[str]:
+        journaled = set(self.journaled or ())
+        for root in self.roots:
+            if not Path(self.prefix + root).is_dir():
+                # rule roots that are no directories are not watched
+                yield root
+                continue
+            for relative in sorted(journaled):
+                is_selected = (
+                    is_relative_to(relative, root)
+                    and not has_ancestor(relative, journaled, root)
+                    and self.is_reachable(relative, root)
+                )
+                if is_selected:
+                    yield relative
+
+    def generate_source_entries(self, roots: list[str]) -> Iterator[Entry]:
+        start = len(self.prefix)
+        walker = Walker(self.exclude_root, stat=True, markers=frozenset((".git",)))
+        for entry in walker.walk(*(self.prefix + root for root in roots)):
+            relative = entry.path[start:]
+            source = Snapshot.from_stat(entry.stat())
+            in_cache = relative in self.cached_files
+            if in_cache:
+                self.seen.add(relative)
+            yield self.create_entry(relative, source, in_source=True, in_cache=in_cache)
+        for path in walker.marked:
+            key = inspect_directory(path)
+            if key is not None:
+                self.found_repositories[path] = key
+
+    def generate_cache_entries(self, root: str) -> Iterator[Entry]:
+        for relative in self.generate_cached_paths(root):
+            if relative not in self.seen and self.rule_trie.includes(relative):
+                source = Snapshot.from_path(self.prefix + relative)
+                yield self.create_entry(
+                    relative,
+                    source,
+                    in_source=False,
+                    in_cache=True,
+                )
+
+    def load_cached_files(self) -> dict[str, IndexedFile]:
+        rules = list(self.generate_rules())
+        cached_files = None if context.options.rescan else self.index.load(rules)
+        if cached_files is None:
+            # changes journaled against the previous index can not be trusted
+            self.is_rebuilt = True
+            cached_files = self.index.rebuild(rules, self.generate_cached_files())
+        self.cached_paths = sorted(cached_files)
+        return cached_files
+
+    def generate_cached_paths(self, root: str) -> Iterator[str]:
+        if root:
+            bounds = create_range(f"{root}/")
+            start, end = (bisect.bisect_left(self.cached_paths, b) for b in bounds)
+        else:
+            start, end = 0, len(self.cached_paths)
+        return itertools.islice(self.cached_paths, start, end)
+
+    def generate_cached_files(self) -> Iterator[tuple[str, IndexedFile]]:
+        prefix = create_prefix(self.sync_config.dest)
+        start = len(prefix)
+        walker = Walker(
+            lambda path, is_dir: self.rule_trie.is_pruned(path[start:], is_dir=is_dir),
+        )
+        directories = []
+        for root in self.roots:
+            path = prefix + root
+            if os.path.isfile(path):  # noqa: PTH113
+                file = IndexedFile.from_path(Path(path))
+                if file is not None:
+                    yield root, file
+            else:
+                directories.append(path)
+        for entry in walker.walk(*directories):
+            file = IndexedFile.from_path(Path(entry.path))
+            if file is not None:
+                yield entry.path[start:], file
 
     def generate_rules(self) -> Iterator[PathRule]:
         if self.sync_config.overlapping_sub_path is not None:
             yield PathRule(Path(self.sync_config.overlapping_sub_path), include=False)
         yield from self.backup_config.rules
 
-    def create_entry(self, **kwargs: Any) -> Entry:
-        return Entry(self.backup_config, **kwargs)
+    def create_entry(
+        self,
+        relative: str,
+        source: Snapshot | None,
+        *,
+        in_source: bool,
+        in_cache: bool,
+    ) -> Entry:
+        cached = self.cached_files.get(relative)
+        return Entry(self.backup_config, relative, source, cached, in_source, in_cache)
 
-    def exclude_root(self, path: Path) -> bool:
+    def exclude_root(self, path: str, is_dir: bool) -> bool:  # noqa: FBT001
+        relative = path[len(self.prefix) :]
         return (
-            path in self.visited
-            or (path / ".git").exists()
+            self.rule_trie.is_pruned(relative, is_dir=is_dir)
+            or (is_dir and self.is_known_repository(path))
             or self.backup_config.ignores.matches(path)
-            or path.is_symlink()
         )
+
+    def is_known_repository(self, path: str) -> bool:
+        """
+        Unchanged directories that contained a repository are skipped without listing
+        them again.
+        """
+        known = self.repositories.get(path)
+        if known is None or inspect_directory(path) != known:
+            return False
+        self.found_repositories[path] = known
+        return True
+
+    def is_reachable(self, relative: str, root: str) -> bool:
+        """
+        Whether the walk of a rule root would reach a journaled path.
+        """
+        path = Path(self.prefix + root)
+        for part in relative[len(root) :].strip("/").split("/"):
+            is_excluded = (
+                path.is_symlink()
+                or self.exclude_root(str(path), True)  # noqa: FBT003
+                or (path / ".git").exists()
+            )
+            if is_excluded:
+                return False
+            path /= part
+        # deleted paths are checked against the rules per cached file
+        return not path.is_symlink() and (
+            not path.exists() or not self.exclude_root(str(path), path.is_dir())
+        )
+
+
+def inspect_directory(path: str) -> tuple[int, int] | None:
+    try:
+        info = os.stat(path)  # noqa: PTH116
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_mtime_ns
+
+
+def is_relative_to(relative: str, root: str) -> bool:
+    return not root or relative == root or relative.startswith(f"{root}/")
+
+
+def has_ancestor(path: str, paths: set[str], root: str) -> bool:
+    """
+    Whether a journaled parent directory below the root already covers a path.
+    """
+    while len(path) > len(root):
+        path = path.rpartition("/")[0]
+        if path in paths:
+            return True
+    return False
@@ -1,13 +1,25 @@
-from collections.abc import Iterator
-from dataclasses import dataclass
-from datetime import datetime
+import contextlib
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 
 import cli
 
-from backup.models import BackupConfig, Path
-from backup.syncer import SyncConfig, Syncer
+from backup.context import context
+from backup.models import BackupConfig, Path, PathRule
+from backup.syncer import ListedFile, SyncConfig, Syncer
+from backup.utils.threads import run_in_threads
 
+from .bundler import Bundler, bundle_name, is_outdated
 from .cache_scanner import CacheScanner
+from .chunker import Chunker, chunk_directory, manifest_directory
+from .prefix import create_prefix
+from .scan_index import Listing, ScanIndex
+
+batch_size = 1000
 
 
 @dataclass
@@ -15,6 +27,9 @@ class CacheSyncer:
     backup_config: BackupConfig
     date_start: str = "── ["
     date_end: str = "]  /"
+    updated_paths: list[Path] = field(default_factory=list)
+    changed_archives: list[Path] = field(default_factory=list)
+    changed_manifests: list[Path] = field(default_factory=list)
 
     def sync_from_remote(self) -> None:
         path = str(self.backup_config.dest).split(":")[-1]
@@ -28,24 +43,79 @@ class CacheSyncer:
             self.backup_config.dest,
             filter_rules=filter_rules,
         )
-        remote_pairs = Syncer(config).generate_paths_with_time()
-        remote_pairs = self.modify_changed_paths(remote_pairs)
-        remote_paths = {path for path, _ in remote_pairs}
-        self.remove_paths_missing_in_remote(remote_paths, config)
+        syncer = Syncer(config)
+        if context.options.incremental_listing:
+            remote_paths = self.update_listing(syncer)
+        else:
+            remote_files = syncer.list_files()
+            remote_paths = {
+                file.path for file in self.modify_changed_paths(remote_files)
+            }
+        bundler = Bundler(self.backup_config)
+        self.updated_paths.extend(bundler.fetch(self.changed_archives))
+        remote_paths.update(bundler.generate_members())
+        chunker = Chunker(self.backup_config)
+        self.updated_paths.extend(chunker.fetch(self.changed_manifests))
+        self.remove_paths_missing_in_remote(remote_paths)
+        ScanIndex(self.backup_config.cache).refresh(self.updated_paths)
+
+    def update_listing(self, syncer: Syncer) -> set[str]:
+        """
+        Update the snapshot of the remote listing with the files modified since the
+        previous listing and return all paths in the snapshot.
+
+        Remote deletions and files uploaded with an old modification time are only
+        detected when the full remote is listed again, which happens periodically.
+        """
+        index = ScanIndex(self.backup_config.cache)
+        source = json.dumps([str(self.backup_config.dest), syncer.config.filter_rules])
+        previous = index.load_listing(source)
+        start = int(time.time())
+        interval = context.config.listing_reconcile_interval
+        if previous is not None and start - previous.reconciled > interval:
+            previous = None
+        if previous is None:
+            listing = Listing({}, start, start)
+            files = syncer.list_files()
+        else:
+            listing = previous
+            max_age = start - listing.listed + context.config.listing_max_age_margin
+            files = syncer.list_files(max_age=max_age)
+            listing.listed = start
+        listed_files = list(self.modify_changed_paths(files))
+        index.save_listing(source, listing, listed_files, replace=previous is None)
+        listing.files.update((file.path, file) for file in listed_files)
+        return set(listing.files)
 
     def modify_changed_paths(
         self,
-        pairs: Iterator[tuple[Path, datetime]],
-    ) -> Iterator[tuple[Path, datetime]]:
-        for path, date in pairs:
-            cache_path = self.backup_config.cache / path
-            match = cache_path.has_date(date)
-            if not match and not cache_path.has_date(date, check_tag=True):
-                self.handle_cache_mismatch(cache_path, date)
-            yield path, date
+        files: Iterator[ListedFile],
+    ) -> Iterator[ListedFile]:
+        for file in files:
+            if file.path.startswith(f"{manifest_directory}/"):
+                yield self.check_manifest(file)
+                continue
+            cache_path = self.backup_config.cache / file.path
+            if cache_path.name != bundle_name:
+                date = datetime.fromtimestamp(file.mtime, tz=UTC)
+                match = cache_path.has_date(date)
+                if not match and not cache_path.has_date(date, check_tag=True):
+                    self.handle_cache_mismatch(cache_path, date)
+            elif is_outdated(cache_path, file):
+                self.changed_archives.append(Path(file.path))
+            yield file
+
+    def check_manifest(self, file: ListedFile) -> ListedFile:
+        # the cache holds the manifest of a chunked file at the path of the file
+        path = file.path.removeprefix(f"{manifest_directory}/")
+        file = file._replace(path=path)
+        if is_outdated(self.backup_config.cache / file.path, file):
+            self.changed_manifests.append(Path(file.path))
+        return file
 
     def handle_cache_mismatch(self, cache_path: Path, date: datetime) -> None:
         relative = cache_path.relative_to(self.backup_config.cache)
+        self.updated_paths.append(relative)
         source_path = self.backup_config.source / relative
         if source_path.exists() and source_path.has_date(date):
             source_path.copy_to(cache_path, include_properties=False)
@@ -61,20 +131,53 @@ class CacheSyncer:
         path.text = "" if source_path.size else " "
         path.touch(mtime=path.mtime + 1)
 
-    def remove_paths_missing_in_remote(
-        self,
-        remote_paths: set[Path],
-        config: SyncConfig,
-    ) -> None:
-        pairs = Syncer(config).generate_paths_with_time(config.source)
-        for path, _ in pairs:
-            if path not in remote_paths:
-                (self.backup_config.cache / path).unlink()
+    def remove_paths_missing_in_remote(self, remote_paths: set[str]) -> None:
+        missing = [
+            relative
+            for relative in self.generate_cached_paths()
+            if relative not in remote_paths
+        ]
+        prefix = create_prefix(self.backup_config.cache)
+        batches = [
+            [prefix + relative for relative in missing[start : start + batch_size]]
+            for start in range(0, len(missing), batch_size)
+        ]
+        run_in_threads(remove_paths, batches, context.config.n_scan_workers)
+        self.updated_paths.extend(Path(relative) for relative in missing)
+
+    def generate_cached_paths(self) -> Iterable[str]:
+        """
+        Walk the cache in process or use the scan index if it is up to date.
+        """
+        scanner = CacheScanner(self.backup_config)
+        rules = list(scanner.generate_rules())
+        cached_files = None if context.options.rescan else scanner.index.load(rules)
+        if cached_files is None:
+            return (relative for relative, _ in scanner.generate_cached_files())
+        return cached_files.keys()
 
     def generate_pull_filters(self) -> Iterator[str]:
-        rules = CacheScanner(self.backup_config).generate_rules()
-        for rule in rules:
-            sign = "+" if rule.include else "-"
-            pattern = f"{sign} /{rule.path}"
-            yield pattern
-            yield f"{pattern}/**"
+        rules = list(CacheScanner(self.backup_config).generate_rules())
+        # the manifests of chunked files are listed, but chunks are only synced by
+        # the chunker
+        yield from generate_rule_patterns(rules, Path(manifest_directory))
+        yield f"- /{chunk_directory}/**"
+        yield from generate_rule_patterns(rules)
+
+
+def generate_rule_patterns(
+    rules: list[PathRule],
+    root: Path | None = None,
+) -> Iterator[str]:
+    for rule in rules:
+        path = rule.path if root is None else root / rule.path
+        sign = "+" if rule.include else "-"
+        pattern = f"{sign} /{path}"
+        yield pattern
+        yield f"{pattern}/**"
+
+
+def remove_paths(paths: list[str]) -> None:
+    for path in paths:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)  # noqa: PTH108
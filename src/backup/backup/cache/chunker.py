@@ -0,0 +1,277 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import zlib
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import cli
+import superpathlib
+
+from backup.context import context
+from backup.models import BackupConfig, Path
+from backup.syncer import SyncConfig, Syncer
+
+manifest_header = b"# backup chunk manifest\n"
+chunk_directory = ".chunks"
+# manifests are kept apart from the files of the user, whose names can be anything
+manifest_directory = f"{chunk_directory}/manifests"
+anchor = b"\n"
+window_size = 32
+missing_directory_message = "directory not found"
+
+Manifest = dict[str, Any]
+Data = mmap.mmap | bytes
+
+
+@dataclass
+class Chunker:
+    """
+    Back up files above the maximum backup size as content-defined chunks.
+
+    An edit only changes the chunks around it, and chunks are stored on the remote by
+    their hash, such that only the chunks that the remote misses are uploaded. The
+    remote holds a manifest below the chunks that lists the chunks of a file. The
+    cache holds the manifest at the path of the file with the modification time of
+    the file, such that scans detect changes of chunked files as usual. A pull reuses
+    the chunks of the previous version of a file.
+    """
+
+    backup_config: BackupConfig
+    uploaded: set[str] | None = None
+
+    @property
+    def store(self) -> superpathlib.Path:
+        return self.backup_config.dest / chunk_directory
+
+    def select(
+        self,
+        paths: Iterable[superpathlib.Path],
+        *,
+        reverse: bool = False,
+    ) -> list[superpathlib.Path]:
+        return [path for path in paths if self.is_chunked(path, reverse=reverse)]
+
+    def is_chunked(self, path: superpathlib.Path, *, reverse: bool = False) -> bool:
+        source = self.backup_config.source / path
+        if not reverse and context.options.chunking and source.exists():
+            return source.size > context.config.max_backup_size
+        # files that are pulled or deleted are chunked if the remote chunks them
+        return is_manifest(self.backup_config.cache / path)
+
+    def push(self, paths: list[superpathlib.Path]) -> None:
+        """
+        Upload the new chunks and the manifests of the paths and update the cache.
+
+        The remote copies of the paths are removed in the same sync, which covers
+        files that were uploaded before they were chunked.
+        """
+        staged: list[superpathlib.Path] = []
+        with Path.tempdir() as staging:
+            for path in paths:
+                manifest_path = Path(create_manifest_path(path))
+                source = self.backup_config.source / path
+                if source.exists():
+                    new_chunks = self.split(source, staging / manifest_path, staging)
+                    staged.extend(
+                        Path(create_chunk_path(hash_)) for hash_ in new_chunks
+                    )
+                staged.extend((path, manifest_path))
+            config = SyncConfig(
+                source=staging,
+                dest=self.backup_config.dest,
+                paths=staged,
+                show_progress=False,
+            )
+            Syncer(config).push()
+            for path in paths:
+                manifest_path = staging / create_manifest_path(path)
+                cache_path = self.backup_config.cache / path
+                if manifest_path.exists():
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(manifest_path, cache_path)
+                else:
+                    cache_path.unlink(missing_ok=True)
+
+    def split(
+        self,
+        source: superpathlib.Path,
+        manifest_path: Path,
+        staging: Path,
+    ) -> list[str]:
+        """
+        Stage the manifest of source and its chunks that are not uploaded yet.
+        """
+        uploaded = self.load_uploaded()
+        info = source.stat()
+        chunks = []
+        new_chunks = []
+        with map_file(source) as data:
+            for hash_, start, end in generate_chunks(data):
+                chunks.append([hash_, end - start])
+                if hash_ not in uploaded:
+                    uploaded.add(hash_)
+                    new_chunks.append(hash_)
+                    path = staging / create_chunk_path(hash_)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.byte_content = data[start:end]
+        manifest = {
+            "size": info.st_size,
+            "mtime_ns": info.st_mtime_ns,
+            "chunks": chunks,
+        }
+        save_manifest(manifest_path, manifest)
+        return new_chunks
+
+    def load_uploaded(self) -> set[str]:
+        if self.uploaded is None:
+            filter_rules = ["- /manifests/**", "+ **"]
+            config = SyncConfig(self.store, self.store, filter_rules=filter_rules)
+            try:
+                files = list(Syncer(config).list_files())
+            except cli.CalledProcessError as exception:
+                # the remote has no chunks before the first file is chunked
+                if missing_directory_message not in str(exception):
+                    raise
+                files = []
+            self.uploaded = {Path(file.path).name for file in files}
+        return self.uploaded
+
+    def fetch(self, paths: list[Path]) -> Iterator[Path]:
+        """
+        Download the changed manifests of the paths into the cache.
+        """
+        if not paths:
+            return
+        manifest_paths = [Path(create_manifest_path(path)) for path in paths]
+        with Path.tempdir() as staging:
+            config = SyncConfig(
+                source=staging,
+                dest=self.backup_config.dest,
+                paths=[*manifest_paths],
+                show_progress=False,
+            )
+            Syncer(config).pull()
+            for path, manifest_path in zip(paths, manifest_paths, strict=True):
+                cache_path = self.backup_config.cache / path
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(staging / manifest_path, cache_path)
+                yield path
+
+    def assemble(self, paths: list[superpathlib.Path]) -> None:
+        """
+        Rebuild the files of the paths from the chunks in their cache manifest.
+        """
+        for path in paths:
+            with Path.tempdir() as staging:
+                self.assemble_file(path, staging)
+
+    def assemble_file(self, path: superpathlib.Path, staging: Path) -> None:
+        manifest = load_manifest(self.backup_config.cache / path)
+        source = self.backup_config.source / path
+        temporary = source.with_name(f"{source.name}.part")
+        temporary.parent.mkdir(parents=True, exist_ok=True)
+        with map_file(source) as data:
+            local = {hash_: (start, end) for hash_, start, end in generate_chunks(data)}
+            missing = {hash_ for hash_, _ in manifest["chunks"]} - local.keys()
+            if missing:
+                config = SyncConfig(
+                    source=staging,
+                    dest=self.backup_config.dest,
+                    paths=[Path(create_chunk_path(hash_)) for hash_ in missing],
+                    show_progress=False,
+                )
+                Syncer(config).pull()
+            with temporary.open("wb") as file:
+                for hash_, _ in manifest["chunks"]:
+                    if hash_ in local:
+                        start, end = local[hash_]
+                        file.write(data[start:end])
+                    else:
+                        file.write((staging / create_chunk_path(hash_)).byte_content)
+        mtime_ns = manifest["mtime_ns"]
+        os.utime(temporary, ns=(mtime_ns, mtime_ns))
+        temporary.replace(source)
+
+
+@contextmanager
+def map_file(path: superpathlib.Path) -> Iterator[Data]:
+    # empty files can not be mapped
+    if not Path(path).read_size():
+        yield b""
+        return
+    with (
+        path.open("rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+    ):
+        yield data
+
+
+def generate_chunks(data: Data) -> Iterator[tuple[str, int, int]]:
+    start = 0
+    for end in find_boundaries(data):
+        yield hashlib.sha256(data[start:end]).hexdigest(), start, end
+        start = end
+
+
+def find_boundaries(data: Data) -> Iterator[int]:
+    """
+    End offsets of the content-defined chunks of data.
+
+    Rolling a hash over every byte is too slow in Python. Boundaries are instead
+    placed at anchor bytes, which bytes.find locates at native speed, whose preceding
+    window hashes to a value with the lowest bits unset. Like with a rolling hash, a
+    boundary only depends on the content around it, such that boundaries realign right
+    after an edit that inserts or removes bytes.
+    """
+    average = context.config.chunk_size
+    minimum, maximum = average // 4, average * 4
+    # anchors occur once every 256 bytes in random data
+    mask = max(average // 256 - 1, 0)
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + maximum, size)
+        boundary = end
+        position = data.find(anchor, start + minimum, end)
+        while position != -1:
+            window = data[max(position + 1 - window_size, 0) : position + 1]
+            if not zlib.crc32(window) & mask:
+                boundary = position + 1
+                break
+            position = data.find(anchor, position + 1, end)
+        yield boundary
+        start = boundary
+
+
+def create_chunk_path(hash_: str) -> str:
+    return f"{chunk_directory}/{hash_[:2]}/{hash_}"
+
+
+def create_manifest_path(path: superpathlib.Path | str) -> str:
+    return f"{manifest_directory}/{path}"
+
+
+def is_manifest(path: superpathlib.Path) -> bool:
+    if not path.is_file():
+        return False
+    with path.open("rb") as file:
+        header: bytes = file.read(len(manifest_header))
+    return header == manifest_header
+
+
+def save_manifest(path: superpathlib.Path, manifest: Manifest) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.byte_content = manifest_header + json.dumps(manifest).encode()
+    mtime_ns = manifest["mtime_ns"]
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def load_manifest(path: superpathlib.Path) -> Manifest:
+    content = path.byte_content[len(manifest_header) :]
+    manifest: Manifest = json.loads(content)
+    return manifest
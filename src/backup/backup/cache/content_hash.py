@@ -0,0 +1,71 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from backup.context import context
+
+from .scan_index import HashKey, ScanIndex
+
+
+@dataclass
+class ContentComparer:
+    """
+    Compare files by content hash to find touched files that did not change.
+
+    Hashes are cached in the scan index by device, inode, size and modification
+    time, such that unchanged files are never read twice. Missing hashes are computed
+    in a pool of processes to spread the hashing work over all cores.
+    """
+
+    index: ScanIndex
+    n_workers: int = field(default_factory=lambda: context.config.n_hash_workers)
+
+    def is_identical(self, pairs: list[tuple[str, str]]) -> list[bool]:
+        keys = {
+            path: key
+            for pair in pairs
+            for path in pair
+            if (key := create_key(path)) is not None
+        }
+        hashes = self.load_hashes(keys)
+        return [
+            hashes.get(first) is not None and hashes.get(first) == hashes.get(second)
+            for first, second in pairs
+        ]
+
+    def load_hashes(self, keys: dict[str, HashKey]) -> dict[str, str | None]:
+        cached = self.index.load_hashes(set(keys.values()))
+        missing = [path for path, key in keys.items() if key not in cached]
+        computed = dict(zip(missing, self.compute_hashes(missing), strict=True))
+        new_hashes = {
+            keys[path]: hash_ for path, hash_ in computed.items() if hash_ is not None
+        }
+        self.index.save_hashes(new_hashes)
+        hashes = {path: cached[key] for path, key in keys.items() if key in cached}
+        return hashes | computed
+
+    def compute_hashes(self, paths: list[str]) -> list[str | None]:
+        if len(paths) <= 1 or self.n_workers <= 1:
+            return [hash_file(path) for path in paths]
+        n_workers = min(self.n_workers, len(paths))
+        chunksize = max(1, len(paths) // (n_workers * 4))
+        with ProcessPoolExecutor(n_workers) as executor:
+            return list(executor.map(hash_file, paths, chunksize=chunksize))
+
+
+def create_key(path: str) -> HashKey | None:
+    try:
+        info = os.stat(path)  # noqa: PTH116
+    except FileNotFoundError:
+        return None
+    return info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns
+
+
+def hash_file(path: str) -> str | None:
+    try:
+        with open(path, "rb") as file:  # noqa: PTH123
+            digest = hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16))
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
@@ -1,43 +1,70 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 from backup.context import context
 from backup.models import BackupConfig, Path
 
+from .bundler import bundle_name
+from .scan_index import IndexedFile
+from .snapshot import Snapshot
 
-@dataclass
+
+@dataclass(slots=True)
 class Entry:
+    """
+    Compact record of a scanned file.
+
+    Millions of entries can be alive during a scan, so only the relative path and the
+    stat snapshots of both sides are stored. A file found on both sides results in a
+    single entry that is excluded based on either side.
+    """
+
     config: BackupConfig
-    source: Path = None  # type: ignore[assignment]
-    dest: Path = None  # type: ignore[assignment]
-    existing: Path = field(init=False)
-    relative: Path = field(init=False)
-
-    def __post_init__(self) -> None:
-        if self.source is None:
-            self.existing = self.dest
-            self.relative = self.dest.relative_to(self.config.cache)
-            self.source = self.config.source / self.relative
-        else:
-            self.existing = self.source
-            self.relative = self.source.relative_to(self.config.source)
-            self.dest = self.config.cache / self.relative
+    relative: str
+    source: Snapshot | None = None
+    cached: IndexedFile | None = None
+    in_source: bool = True
+    in_cache: bool = False
+
+    @property
+    def source_path(self) -> Path:
+        return self.config.source / self.relative
 
     def is_changed(self) -> bool:
+        source_mtime = 0 if self.source is None else self.source.mtime
+        dest_mtime = 0 if self.cached is None else self.cached.mtime
+        return source_mtime != dest_mtime and (
+            self.is_included_in_source() or self.is_included_in_cache()
+        )
+
+    def is_included_in_source(self) -> bool:
         return (
-            self.existing.is_file()
-            and (self.source.mtime != self.dest.mtime)
+            self.in_source
+            and self.source is not None
+            and self.source.is_file
             and not self.exclude()
         )
 
-    def exclude(self) -> bool:
+    def is_included_in_cache(self) -> bool:
         return (
-            (self.existing.tag and self.existing.tag == "exported")
-            or (
-                self.existing.size > context.config.max_backup_size
-                and self.relative.suffix != ".zip"
-            )
-            or self.relative.suffix == ".part"
+            self.in_cache
+            and self.cached is not None
+            and not self.is_excluded(self.cached.size, self.cached.tag)
         )
 
-    def __hash__(self) -> int:
-        return hash(self.relative)
+    def exclude(self) -> bool:
+        # tags are only read for files that are candidates for a change
+        size = 0 if self.source is None else self.source.size
+        return self.is_excluded(size, self.source_path.tag)
+
+    def is_excluded(self, size: int, tag: str | None) -> bool:
+        path = Path(self.relative)
+        too_large = size > context.config.max_backup_size
+        # large files are backed up as chunks when chunking is enabled
+        is_skipped = too_large and not context.options.chunking
+        return (
+            tag == "exported"
+            or (is_skipped and path.suffix != ".zip")
+            or path.suffix == ".part"
+            # bundles are only synced by the bundler
+            or path.name == bundle_name
+        )
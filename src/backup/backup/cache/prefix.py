@@ -0,0 +1,16 @@
+import superpathlib
+
+
+def create_prefix(root: superpathlib.Path) -> str:
+    path = str(root)
+    return path if path.endswith("/") else f"{path}/"
+
+
+def create_range(prefix: str) -> tuple[str, str]:
+    """
+    Bounds of the sorted paths below a prefix that ends with a slash.
+
+    "0" is the character directly after "/", such that the paths below the prefix
+    sort from the prefix up to the prefix with its last slash replaced by "0".
+    """
+    return prefix, f"{prefix[:-1]}0"
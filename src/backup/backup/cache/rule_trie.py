@@ -0,0 +1,84 @@
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Self
+
+from backup.models import PathRule
+
+
+@dataclass(slots=True)
+class Node:
+    children: dict[str, "Node"] = field(default_factory=dict)
+    order: float = math.inf
+    include: bool = False
+
+
+@dataclass
+class RuleTrie:
+    """
+    Path rules indexed by path component.
+
+    The first rule that applies to a path or one of its parents decides whether the
+    path is included. Looking up a path costs one dictionary access per component,
+    such that a single walk can apply all rules while it descends.
+    """
+
+    root: Node = field(default_factory=Node)
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[PathRule]) -> Self:
+        trie = cls()
+        for order, rule in enumerate(rules):
+            node = trie.root
+            for part in rule.path.parts:
+                node = node.children.setdefault(part, Node())
+            if order < node.order:
+                node.order = order
+                node.include = rule.include
+        return trie
+
+    def lookup(self, relative: str) -> tuple[bool, Node | None]:
+        """
+        Whether a path is included and its node if rules exist below it.
+        """
+        node: Node | None = self.root
+        order, include = self.root.order, self.root.include
+        for part in relative.split("/") if relative else ():
+            node = node.children.get(part) if node is not None else None
+            if node is None:
+                break
+            if node.order < order:
+                order, include = node.order, node.include
+        return include, node
+
+    def includes(self, relative: str) -> bool:
+        return self.lookup(relative)[0]
+
+    def is_pruned(self, relative: str, *, is_dir: bool) -> bool:
+        """
+        Whether a walk can skip a path.
+
+        Excluded directories are still descended into when a rule below them
+        includes paths again.
+        """
+        include, node = self.lookup(relative)
+        has_rules_below = is_dir and node is not None and bool(node.children)
+        return not include and not has_rules_below
+
+    def generate_roots(self) -> Iterable[str]:
+        """
+        Included rule paths that are not below another included path.
+        """
+        nodes: list[tuple[Node, tuple[str, ...], float, bool]] = [
+            (self.root, (), math.inf, False),
+        ]
+        while nodes:
+            node, parts, order, include = nodes.pop()
+            if node.order < order:
+                is_root = node.include and not include
+                order, include = node.order, node.include
+                if is_root:
+                    yield "/".join(parts)
+                    continue
+            for name, child in node.children.items():
+                nodes.append((child, (*parts, name), order, include))
@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import stat
+from collections.abc import Iterable, Iterator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from typing import Self
+
+import superpathlib
+
+from backup.models import Path, PathRule
+from backup.syncer import ListedFile
+
+from .prefix import create_prefix, create_range
+
+schema = (
+    (
+        "CREATE TABLE IF NOT EXISTS files "
+        "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, inode INTEGER, tag TEXT)"
+    ),
+    "CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, rules TEXT)",
+    (
+        "CREATE TABLE IF NOT EXISTS repositories "
+        "(path TEXT PRIMARY KEY, inode INTEGER, mtime INTEGER)"
+    ),
+    # hashes keyed without the device are dropped, since inodes repeat across devices
+    "DROP TABLE IF EXISTS hashes",
+    (
+        "CREATE TABLE IF NOT EXISTS file_hashes (device INTEGER, inode INTEGER, "
+        "size INTEGER, mtime INTEGER, hash TEXT, "
+        "PRIMARY KEY (device, inode, size, mtime))"
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS listings "
+        "(path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER)"
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS listing_roots "
+        "(path TEXT PRIMARY KEY, source TEXT, listed INTEGER, reconciled INTEGER)"
+    ),
+    "CREATE TABLE IF NOT EXISTS pending (path TEXT PRIMARY KEY)",
+)
+
+Repositories = dict[str, tuple[int, int]]
+HashKey = tuple[int, int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedFile:
+    size: int
+    mtime: int
+    inode: int
+    tag: str | None = None
+
+    @classmethod
+    def from_path(cls, path: superpathlib.Path) -> Self | None:
+        try:
+            info = path.stat()
+        except FileNotFoundError:
+            return None
+        return (
+            cls(info.st_size, int(info.st_mtime), info.st_ino, path.tag)
+            if stat.S_ISREG(info.st_mode)
+            else None
+        )
+
+
+@dataclass
+class Listing:
+    """
+    Files of a remote at their modification time and size as listed before.
+    """
+
+    files: dict[str, ListedFile]
+    listed: int
+    reconciled: int
+
+
+@dataclass
+class ScanIndex:
+    """
+    Stat information of the files in a cache directory, persisted between runs.
+
+    Every write to the cache is followed by a refresh of the written paths, such that
+    changes can be detected without walking and stat'ing the cache itself.
+    """
+
+    root: superpathlib.Path
+    path: Path = field(default_factory=lambda: Path.scan_index)
+
+    @property
+    def prefix(self) -> str:
+        return create_prefix(self.root)
+
+    @property
+    def prefix_range(self) -> tuple[str, str]:
+        return create_range(self.prefix)
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=60)) as connection:
+            for statement in schema:
+                connection.execute(statement)
+            with connection:
+                yield connection
+
+    def load(self, rules: list[PathRule]) -> dict[str, IndexedFile] | None:
+        with self.connect() as connection:
+            query = "SELECT rules FROM roots WHERE path = ?"
+            row = connection.execute(query, (str(self.root),)).fetchone()
+            if row is None or row[0] != serialize(rules):
+                return None
+            query = "SELECT * FROM files WHERE path >= ? AND path < ?"
+            rows = connection.execute(query, self.prefix_range)
+            start = len(self.prefix)
+            return {path[start:]: IndexedFile(*values) for path, *values in rows}
+
+    def rebuild(
+        self,
+        rules: list[PathRule],
+        files: Iterable[tuple[str, IndexedFile]],
+    ) -> dict[str, IndexedFile]:
+        indexed_files = dict(files)
+        with self.connect() as connection:
+            query = "DELETE FROM files WHERE path >= ? AND path < ?"
+            connection.execute(query, self.prefix_range)
+            rows = (
+                (self.prefix + relative, file.size, file.mtime, file.inode, file.tag)
+                for relative, file in indexed_files.items()
+            )
+            connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", rows)
+            query = "INSERT OR REPLACE INTO roots VALUES (?, ?)"
+            connection.execute(query, (str(self.root), serialize(rules)))
+        return indexed_files
+
+    def refresh(self, paths: Iterable[superpathlib.Path]) -> None:
+        updates: list[tuple[str, int, int, int, str | None]] = []
+        removals: list[tuple[str]] = []
+        for path in paths:
+            full_path = self.root / path
+            file = IndexedFile.from_path(full_path)
+            if file is None:
+                removals.append((str(full_path),))
+            else:
+                updates.append(
+                    (str(full_path), file.size, file.mtime, file.inode, file.tag),
+                )
+        with self.connect() as connection:
+            query = "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)"
+            connection.executemany(query, updates)
+            connection.executemany("DELETE FROM files WHERE path = ?", removals)
+
+    def mark_pending(self, paths: Iterable[superpathlib.Path]) -> None:
+        """
+        Record the paths that the cache can hold before the remote does.
+        """
+        rows = [(str(self.root / path),) for path in paths]
+        with self.connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO pending VALUES (?)", rows)
+
+    def clear_pending(self, paths: Iterable[superpathlib.Path]) -> None:
+        rows = [(str(self.root / path),) for path in paths]
+        with self.connect() as connection:
+            connection.executemany("DELETE FROM pending WHERE path = ?", rows)
+
+    def load_pending(self) -> list[Path]:
+        with self.connect() as connection:
+            query = "SELECT path FROM pending WHERE path >= ? AND path < ?"
+            rows = connection.execute(query, self.prefix_range)
+            start = len(self.prefix)
+            return [Path(path[start:]) for (path,) in rows]
+
+    def load_listing(self, source: str) -> Listing | None:
+        with self.connect() as connection:
+            query = "SELECT * FROM listing_roots WHERE path = ?"
+            row = connection.execute(query, (str(self.root),)).fetchone()
+            if row is None or row[1] != source:
+                return None
+            query = "SELECT * FROM listings WHERE path >= ? AND path < ?"
+            rows = connection.execute(query, self.prefix_range)
+            start = len(self.prefix)
+            files = {
+                path[start:]: ListedFile(path[start:], mtime, size)
+                for path, mtime, size in rows
+            }
+            return Listing(files, *row[2:])
+
+    def save_listing(
+        self,
+        source: str,
+        listing: Listing,
+        files: Iterable[ListedFile],
+        *,
+        replace: bool,
+    ) -> None:
+        """
+        Store the files that were listed since the listing was loaded.
+        """
+        with self.connect() as connection:
+            if replace:
+                query = "DELETE FROM listings WHERE path >= ? AND path < ?"
+                connection.execute(query, self.prefix_range)
+            rows = ((self.prefix + file.path, file.mtime, file.size) for file in files)
+            query = "INSERT OR REPLACE INTO listings VALUES (?, ?, ?)"
+            connection.executemany(query, rows)
+            values = (str(self.root), source, listing.listed, listing.reconciled)
+            query = "INSERT OR REPLACE INTO listing_roots VALUES (?, ?, ?, ?)"
+            connection.execute(query, values)
+
+    def refresh_listing(self, paths: Iterable[superpathlib.Path]) -> None:
+        """
+        Record the synced paths, at which the remote matches the cache.
+        """
+        updates: list[tuple[str, int, int]] = []
+        removals: list[tuple[str]] = []
+        for path in paths:
+            full_path = self.root / path
+            file = IndexedFile.from_path(full_path)
+            if file is None:
+                removals.append((str(full_path),))
+            else:
+                updates.append((str(full_path), file.mtime, file.size))
+        with self.connect() as connection:
+            query = "SELECT 1 FROM listing_roots WHERE path = ?"
+            if connection.execute(query, (str(self.root),)).fetchone() is None:
+                return
+            query = "INSERT OR REPLACE INTO listings VALUES (?, ?, ?)"
+            connection.executemany(query, updates)
+            connection.executemany("DELETE FROM listings WHERE path = ?", removals)
+
+    def load_repositories(self, prefix: str) -> Repositories:
+        """
+        Source directories that contained a git repository at their inode and mtime.
+        """
+        with self.connect() as connection:
+            query = "SELECT * FROM repositories WHERE path >= ? AND path < ?"
+            rows = connection.execute(query, create_range(prefix))
+            return {path: (inode, mtime) for path, inode, mtime in rows}
+
+    def save_repositories(
+        self,
+        prefix: str,
+        repositories: Repositories,
+        *,
+        replace: bool,
+    ) -> None:
+        with self.connect() as connection:
+            if replace:
+                query = "DELETE FROM repositories WHERE path >= ? AND path < ?"
+                connection.execute(query, create_range(prefix))
+            rows = ((path, *values) for path, values in repositories.items())
+            query = "INSERT OR REPLACE INTO repositories VALUES (?, ?, ?)"
+            connection.executemany(query, rows)
+
+    def load_hashes(self, keys: Iterable[HashKey]) -> dict[HashKey, str]:
+        """
+        Content hashes of files identified by their device, inode, size and mtime.
+        """
+        hashes = {}
+        with self.connect() as connection:
+            query = (
+                "SELECT hash FROM file_hashes "
+                "WHERE device = ? AND inode = ? AND size = ? AND mtime = ?"
+            )
+            for key in keys:
+                row = connection.execute(query, key).fetchone()
+                if row is not None:
+                    hashes[key] = row[0]
+        return hashes
+
+    def save_hashes(self, hashes: dict[HashKey, str]) -> None:
+        with self.connect() as connection:
+            rows = ((*key, hash_) for key, hash_ in hashes.items())
+            query = "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)"
+            connection.executemany(query, rows)
+
+
+def serialize(rules: list[PathRule]) -> str:
+    return json.dumps([(str(rule.path), rule.include) for rule in rules])
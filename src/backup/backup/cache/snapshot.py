@@ -0,0 +1,27 @@
+import os
+import stat
+from dataclasses import dataclass
+from typing import Self
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """
+    Stat information of a source file, captured once per run.
+    """
+
+    size: int
+    mtime: int
+    is_file: bool
+
+    @classmethod
+    def from_stat(cls, info: os.stat_result) -> Self:
+        return cls(info.st_size, int(info.st_mtime), stat.S_ISREG(info.st_mode))
+
+    @classmethod
+    def from_path(cls, path: str) -> Self | None:
+        try:
+            info = os.stat(path)  # noqa: PTH116
+        except FileNotFoundError:
+            return None
+        return cls.from_stat(info)
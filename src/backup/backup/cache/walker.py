@@ -0,0 +1,164 @@
+import contextlib
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+
+from backup.context import context
+from backup.models import Path
+
+Exclude = Callable[[str, bool], bool]
+Result = list[os.DirEntry[str]] | BaseException | None
+
+
+@dataclass
+class Walker:
+    """
+    Parallel directory walker built on os.scandir.
+
+    Only regular files are yielded and symlinks are never followed. The exclude
+    function receives the path and whether it is a directory, such that directories
+    are pruned before they are listed. Directories that contain one of the marker
+    names are skipped entirely and collected in marked, which costs no extra system
+    calls since the listing is read anyway. With stat enabled, the workers stat every
+    yielded file and cache the result on its DirEntry.
+    """
+
+    exclude: Exclude = lambda _, __: False
+    n_workers: int = field(default_factory=lambda: context.config.n_scan_workers)
+    stat: bool = False
+    markers: frozenset[str] = frozenset()
+    marked: list[str] = field(default_factory=list)
+
+    def walk(self, *roots: str) -> Iterator[os.DirEntry[str]]:
+        """
+        Walk all roots in a single traversal.
+        """
+        roots = tuple(root for root in roots if self.is_walked(root))
+        if roots:
+            walk = Walk(
+                self.exclude,
+                self.n_workers,
+                self.stat,
+                self.markers,
+                self.marked,
+            )
+            yield from walk.run(roots)
+
+    def is_walked(self, root: str) -> bool:
+        path = Path(root)
+        return not path.is_symlink() and not self.exclude(root, path.is_dir())
+
+
+@dataclass
+class Walk:
+    """
+    Every worker scans directories from its own deque and steals from the deques of
+    the other workers when it runs out of work. Scandir releases the GIL, such that
+    the latency of the directory listings overlaps.
+    """
+
+    exclude: Exclude
+    n_workers: int
+    stat: bool = False
+    markers: frozenset[str] = frozenset()
+    marked: list[str] = field(default_factory=list)
+    queues: list[deque[str]] = field(init=False)
+    available: threading.Semaphore = field(init=False)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    results: queue.SimpleQueue[Result] = field(default_factory=queue.SimpleQueue)
+    pending: int = 0
+    stopped: bool = False
+
+    def __post_init__(self) -> None:
+        self.queues = [deque() for _ in range(self.n_workers)]
+        self.available = threading.Semaphore(0)
+
+    def run(self, roots: tuple[str, ...]) -> Iterator[os.DirEntry[str]]:
+        for index, root in enumerate(roots):
+            self.push(index % self.n_workers, root)
+        workers = [
+            threading.Thread(target=self.work, args=(index,), daemon=True)
+            for index in range(self.n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while (result := self.results.get()) is not None:
+                if isinstance(result, BaseException):
+                    raise result
+                yield from result
+        finally:
+            self.stop(workers)
+
+    def stop(self, workers: list[threading.Thread]) -> None:
+        self.stopped = True
+        self.available.release(self.n_workers)
+        for worker in workers:
+            worker.join()
+
+    def work(self, index: int) -> None:
+        while True:
+            self.available.acquire()
+            if self.stopped:
+                return
+            directory = self.take(index)
+            try:
+                self.scan(index, directory)
+            except Exception as exception:  # noqa: BLE001
+                self.results.put(exception)
+                return
+            with self.lock:
+                self.pending -= 1
+                finished = self.pending == 0
+            if finished:
+                self.results.put(None)
+
+    def take(self, index: int) -> str:
+        # the semaphore guarantees that one of the queues holds a directory
+        with contextlib.suppress(IndexError):
+            return self.queues[index].pop()
+        while True:
+            for offset in range(1, self.n_workers + 1):
+                victim = self.queues[(index + offset) % self.n_workers]
+                with contextlib.suppress(IndexError):
+                    return victim.popleft()
+
+    def push(self, index: int, directory: str) -> None:
+        with self.lock:
+            self.pending += 1
+        self.queues[index].append(directory)
+        self.available.release()
+
+    def scan(self, index: int, directory: str) -> None:
+        entries: list[os.DirEntry[str]] = []
+        with (
+            contextlib.suppress(PermissionError, FileNotFoundError, NotADirectoryError),
+            os.scandir(directory) as iterator,
+        ):
+            entries = list(iterator)
+        if self.markers and any(entry.name in self.markers for entry in entries):
+            self.marked.append(directory)
+            return
+        files = []
+        for entry in entries:
+            if not entry.is_symlink():
+                is_dir = entry.is_dir()
+                if not self.exclude(entry.path, is_dir):
+                    if is_dir:
+                        self.push(index, entry.path)
+                    elif entry.is_file() and self.prefetch_stat(entry):
+                        files.append(entry)
+        if files:
+            self.results.put(files)
+
+    def prefetch_stat(self, entry: os.DirEntry[str]) -> bool:
+        # the stat result is cached on the entry for the consumer
+        if self.stat:
+            try:
+                entry.stat()
+            except FileNotFoundError:
+                return False
+        return True
@@ -1,19 +1,22 @@
 import sys
 from collections.abc import Iterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import cli
 
 from backup.context import context
-from backup.models import BackupConfig, Changes
+from backup.models import BackupConfig, Changes, ChangeViewer
 from backup.utils.itertools import aggregate_iterators_with_progress
 
 from .cache import CacheScanner
+from .journal import Journal
 
 
 @dataclass
 class ChangeScanner:
     backup_configs: list[BackupConfig]
+    journals: list[Journal] = field(default_factory=list)
+    is_confirmed: bool = False
 
     def check_changes(self, *, reverse: bool) -> list[Changes]:
         changes: list[Changes] = list(self.calculate_changes(reverse=reverse))
@@ -21,22 +24,48 @@ class ChangeScanner:
             any(change for change in changes)
             and context.options.confirm_push
             and sys.stdin.isatty()
-            and not self.ask_confirm(changes, reverse=reverse)
-            and not self.ask_confirm(changes, reverse=reverse, show_diff=True)
+            and not self.confirm(changes, reverse=reverse)
         )
+        self.is_confirmed = not remove_changes
         return [Changes() for _ in self.backup_configs] if remove_changes else changes
 
     def calculate_changes(self, *, reverse: bool = False) -> Iterator[Changes]:
-        scanners = [CacheScanner(backup) for backup in self.backup_configs]
+        self.journals = [Journal(backup) for backup in self.backup_configs]
+        # the journal only records changes of the sources, so pulls walk everything
+        scanners = [
+            CacheScanner(
+                journal.backup_config,
+                journaled=None if reverse else journal.read(),
+            )
+            for journal in self.journals
+        ]
         entries = aggregate_iterators_with_progress(
             (scanner.generate_entries() for scanner in scanners),
             description="Checking",
             unit="Files",
         )
         for scanner, entries_ in zip(scanners, entries, strict=True):
-            scanner.entries = set(entries_)
+            scanner.entries = entries_
             yield scanner.calculate_changes(reverse=reverse)
 
+    def commit(self) -> None:
+        """
+        Mark the journaled changes as handled after they are pushed.
+        """
+        if self.is_confirmed:
+            for journal in self.journals:
+                journal.commit()
+
+    @classmethod
+    def confirm(cls, changes: list[Changes], *, reverse: bool) -> bool:
+        if context.options.viewer:
+            return ChangeViewer.from_changes(changes).run(reverse=reverse)
+        return cls.ask_confirm(changes, reverse=reverse) or cls.ask_confirm(
+            changes,
+            reverse=reverse,
+            show_diff=True,
+        )
+
     @classmethod
     def ask_confirm(
         cls,
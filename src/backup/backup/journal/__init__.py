@@ -0,0 +1,2 @@
+from .journal import Journal
+from .watcher import Watcher
@@ -0,0 +1,91 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+)
+
+event_header = struct.Struct("iIII")
+
+
+class Event(NamedTuple):
+    watch: int
+    mask: int
+    name: str
+
+
+@dataclass
+class Inotify:
+    """
+    Minimal inotify binding on top of libc.
+    """
+
+    libc: ctypes.CDLL = field(
+        default_factory=lambda: ctypes.CDLL(
+            ctypes.util.find_library("c"),
+            use_errno=True,
+        ),
+        repr=False,
+    )
+    fd: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.fd = self.check(self.libc.inotify_init1(IN_CLOEXEC))
+
+    def add_watch(self, path: str) -> int:
+        descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        return self.check(descriptor)
+
+    def read_events(self, timeout: float) -> Iterator[Event]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            data = os.read(self.fd, 1 << 16)
+            offset = 0
+            while offset < len(data):
+                watch, mask, _, length = event_header.unpack_from(data, offset)
+                offset += event_header.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                yield Event(watch, mask, name)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    @classmethod
+    def check(cls, result: int) -> int:
+        if result < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return result
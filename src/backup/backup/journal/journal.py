@@ -0,0 +1,176 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import IO, TypeVar
+
+from package_utils.dataclasses.mixins import SerializationMixin
+
+from backup.backup.cache import CacheScanner
+from backup.backup.cache.scan_index import serialize
+from backup.models import BackupConfig, Path, PathRule
+
+Roots = dict[str, int | None]
+
+
+@dataclass
+class Session(SerializationMixin):
+    id: str
+    pid: int
+    rules: str
+    roots: Roots
+
+    def is_alive(self) -> bool:
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:  # pragma: nocover
+            pass
+        return True
+
+
+@dataclass
+class Checkpoint(SerializationMixin):
+    session: str
+    offset: int
+
+
+T = TypeVar("T", Session, Checkpoint)
+
+
+@dataclass
+class Journal:
+    """
+    Durable log of the source paths that changed while a watcher was running.
+
+    The watcher appends relative paths to the log of its session. A scan only trusts
+    the log when the session that wrote it is still alive, watches the same rules and
+    rule roots, and already wrote the checkpoint of the last successful push.
+    Otherwise, the scan falls back to a full walk and moves the checkpoint to the new
+    session afterwards.
+    """
+
+    backup_config: BackupConfig
+    root: Path = field(default_factory=lambda: Path.journal)
+    session: Session | None = None
+    checkpoint: Checkpoint | None = None
+    log: IO[bytes] | None = None
+    buffer: dict[bytes, None] = field(default_factory=dict)
+
+    @cached_property
+    def directory(self) -> Path:
+        key = f"{self.backup_config.source}\0{self.backup_config.cache}"
+        name = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return self.root / name
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / "log"
+
+    @property
+    def session_path(self) -> Path:
+        return self.directory / "session.json"
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.directory / "checkpoint.json"
+
+    @cached_property
+    def prefix(self) -> str:
+        return f"{str(self.backup_config.source).rstrip('/')}/"
+
+    @cached_property
+    def scanner(self) -> CacheScanner:
+        return CacheScanner(self.backup_config)
+
+    @cached_property
+    def rules(self) -> list[PathRule]:
+        return list(self.scanner.generate_rules())
+
+    def inspect_roots(self) -> Roots:
+        roots: Roots = {}
+        for root in self.scanner.roots:
+            path = Path(self.scanner.prefix + root)
+            roots[root] = path.stat().st_ino if path.is_dir() else None
+        return roots
+
+    def open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.session_path.unlink(missing_ok=True)
+        self.session = Session(uuid.uuid4().hex, os.getpid(), serialize(self.rules), {})
+        self.log = self.log_path.open("wb")
+
+    def publish(self) -> None:
+        if self.session is not None:
+            self.session.roots = self.inspect_roots()
+            write(self.session_path, self.session)
+
+    def record(self, path: str) -> None:
+        self.buffer[os.fsencode(path[len(self.prefix) :]) + b"\0"] = None
+
+    def flush(self) -> None:
+        if self.log is not None and self.buffer:
+            self.log.write(b"".join(self.buffer))
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.buffer.clear()
+
+    @property
+    def size(self) -> int:
+        return 0 if self.log is None else self.log.tell()
+
+    def close(self) -> None:
+        self.session_path.unlink(missing_ok=True)
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        self.buffer.clear()
+        self.session = None
+
+    def read(self) -> list[str] | None:
+        """
+        Paths changed since the last commit or None if a full walk is needed.
+        """
+        self.checkpoint = None
+        session = self.load_session()
+        if (
+            session is None
+            or not session.is_alive()
+            or session.rules != serialize(self.rules)
+            or session.roots != self.inspect_roots()
+        ):
+            return None
+        stored = load(self.checkpoint_path, Checkpoint)
+        is_continued = stored is not None and stored.session == session.id
+        start = stored.offset if stored is not None and is_continued else 0
+        with self.log_path.open("rb") as log:
+            log.seek(start)
+            data = log.read()
+        # a concurrent flush can leave the last path incomplete
+        data = data[: data.rfind(b"\0") + 1]
+        if self.load_session() != session:
+            return None
+        self.checkpoint = Checkpoint(session.id, start + len(data))
+        paths = dict.fromkeys(data.split(b"\0")[:-1])
+        return [os.fsdecode(path) for path in paths] if is_continued else None
+
+    def commit(self) -> None:
+        if self.checkpoint is not None:
+            write(self.checkpoint_path, self.checkpoint)
+
+    def load_session(self) -> Session | None:
+        return load(self.session_path, Session)
+
+
+def load(path: Path, cls: type[T]) -> T | None:
+    items = path.json
+    return cls.from_dict(items) if isinstance(items, dict) and items else None
+
+
+def write(path: Path, item: Session | Checkpoint) -> None:
+    # readers never see a partially written file
+    temporary_path = path.with_suffix(".tmp")
+    temporary_path.json = item.dict()
+    temporary_path.replace(path)
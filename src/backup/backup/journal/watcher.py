@@ -0,0 +1,133 @@
+import contextlib
+import errno
+import os
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from backup.context import context
+from backup.models import BackupConfig
+
+from . import inotify
+from .inotify import Event, Inotify
+from .journal import Journal
+
+
+class Watch(NamedTuple):
+    journal: Journal
+    path: str
+    is_root: bool
+
+
+@dataclass
+class Watcher:
+    """
+    Watch the rule roots of the given configs and journal every changed path.
+
+    Events are not trusted once the kernel queue overflows, a rule root moves, or the
+    log grows too large. In that case, a new session starts that re-watches all rules
+    and forces a single full walk.
+    """
+
+    backup_configs: list[BackupConfig]
+    timeout: float = 1
+    stopped: threading.Event = field(default_factory=threading.Event)
+    watches: dict[int, Watch] = field(default_factory=dict)
+
+    def run(self) -> None:
+        journals = [Journal(config) for config in self.backup_configs]
+        while not self.stopped.is_set():
+            self.run_session(journals)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def run_session(self, journals: list[Journal]) -> None:
+        watcher = Inotify()
+        self.watches.clear()
+        try:
+            for journal in journals:
+                journal.open()
+                self.watch_rules(watcher, journal)
+                journal.publish()
+            is_valid = True
+            while is_valid and not self.stopped.is_set():
+                is_valid = self.process(watcher, watcher.read_events(self.timeout))
+                for journal in journals:
+                    journal.flush()
+                    if journal.size > context.config.max_journal_size:
+                        is_valid = False
+        finally:
+            watcher.close()
+            for journal in journals:
+                journal.close()
+
+    def watch_rules(self, watcher: Inotify, journal: Journal) -> None:
+        for root in journal.scanner.roots:
+            path = journal.scanner.prefix + root
+            if not os.path.islink(path):  # noqa: PTH114
+                self.watch_tree(watcher, journal, path, is_root=True)
+
+    def watch_tree(
+        self,
+        watcher: Inotify,
+        journal: Journal,
+        root: str,
+        *,
+        is_root: bool = False,
+    ) -> None:
+        directories = [root]
+        while directories:
+            directory = directories.pop()
+            if self.add_watch(watcher, Watch(journal, directory, is_root=is_root)):
+                is_root = False
+                entries: list[os.DirEntry[str]] = []
+                with contextlib.suppress(OSError), os.scandir(directory) as iterator:
+                    entries = list(iterator)
+                # paths in repositories are skipped by the scan
+                if not any(entry.name == ".git" for entry in entries):
+                    directories.extend(
+                        entry.path
+                        for entry in entries
+                        if entry.is_dir(follow_symlinks=False)
+                        and not journal.scanner.exclude_root(entry.path, True)  # noqa: FBT003
+                    )
+
+    def add_watch(self, watcher: Inotify, watch: Watch) -> bool:
+        try:
+            descriptor = watcher.add_watch(watch.path)
+        except OSError as exception:
+            if exception.errno == errno.ENOSPC:
+                raise
+            # the directory vanished or is not a directory
+            return False
+        self.watches[descriptor] = watch
+        return True
+
+    def process(self, watcher: Inotify, events: Iterable[Event]) -> bool:
+        for event in events:
+            if event.mask & inotify.IN_Q_OVERFLOW:
+                return False
+            watch = self.watches.get(event.watch)
+            if watch is not None:
+                if event.mask & inotify.IN_IGNORED:
+                    self.watches.pop(event.watch)
+                elif event.mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                    if watch.is_root:
+                        return False
+                else:
+                    self.handle(watcher, watch, event)
+        return True
+
+    def handle(self, watcher: Inotify, watch: Watch, event: Event) -> None:
+        path = f"{watch.path.rstrip('/')}/{event.name}"
+        is_new_directory = event.mask & inotify.IN_ISDIR and event.mask & (
+            inotify.IN_CREATE | inotify.IN_MOVED_TO
+        )
+        scanner = watch.journal.scanner
+        if is_new_directory and not scanner.exclude_root(path, True):  # noqa: FBT003
+            # files created before the watch exists are covered by journaling the
+            # directory itself
+            self.watch_tree(watcher, watch.journal, path)
+        watch.journal.record(path)
@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+import superpathlib
+
+from backup.context import context
+from backup.models import BackupConfig, Path
+from backup.syncer import SyncConfig, Syncer
+from backup.utils.threads import run_in_threads
+
+
+@dataclass
+class Lane:
+    config: SyncConfig
+    priority: int = 0
+    is_large: bool = False
+    duration: float | None = None
+
+    def run(self, start: float) -> None:
+        Syncer(self.config).push()
+        self.duration = time.perf_counter() - start
+
+
+@dataclass
+class Lanes:
+    """
+    Push the paths of a sync in concurrent lanes with separate transfer budgets.
+
+    Ordering a single sync by size sends the largest files first, such that small
+    files that change often only become durable at the end of a long push. Paths are
+    split by the priority of the rules in the backup config and by size. Large files
+    are bound by bandwidth, so their lanes share a small budget and the lanes of
+    small files share the rest. High priority lanes start first.
+    """
+
+    backup_config: BackupConfig
+    config: SyncConfig
+    lanes: list[Lane] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        groups: dict[tuple[int, bool], list[superpathlib.Path]] = {}
+        for path in self.config.paths:
+            key = self.find_priority(path), self.is_large(path)
+            groups.setdefault(key, []).append(path)
+        # high priority and small files first
+        for priority, is_large in sorted(groups, key=lambda key: (-key[0], key[1])):
+            paths = groups[priority, is_large]
+            config = self.config.with_paths(paths)
+            config.share_progress(len(groups))
+            self.lanes.append(Lane(config, priority, is_large))
+        self.assign_transfers()
+
+    def find_priority(self, path: superpathlib.Path) -> int:
+        priorities = self.backup_config.priorities.items()
+        matches = (
+            priority for root, priority in priorities if path.is_relative_to(root)
+        )
+        return max(matches, default=0)
+
+    def is_large(self, path: superpathlib.Path) -> bool:
+        size = Path(self.config.source / path).read_size() or 0
+        return size > context.config.small_file_size
+
+    def assign_transfers(self) -> None:
+        budget = self.config.transfers or context.config.n_parallel_transfers
+        large = [lane for lane in self.lanes if lane.is_large]
+        small = [lane for lane in self.lanes if not lane.is_large]
+        large_budget = min(context.config.n_large_file_transfers, budget)
+        if not small:
+            large_budget = budget
+        elif large:
+            budget = max(budget - large_budget, 1)
+        for lanes, lanes_budget in ((large, large_budget), (small, budget)):
+            for lane in lanes:
+                lane.config.transfers = max(lanes_budget // len(lanes), 1)
+
+    @property
+    def priority_duration(self) -> float | None:
+        """
+        Time until the paths of the first high priority lane were durable.
+        """
+        durations = [
+            lane.duration
+            for lane in self.lanes
+            if lane.priority > 0 and lane.duration is not None
+        ]
+        return min(durations, default=None)
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        run_in_threads(partial(Lane.run, start=start), self.lanes, len(self.lanes))
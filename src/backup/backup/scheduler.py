@@ -0,0 +1,183 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import cli
+import superpathlib
+
+from backup.context import context
+from backup.models import BackupConfig
+from backup.syncer import SyncConfig, Syncer
+
+from .cache import CacheSyncer, ScanIndex
+from .cache.bundler import Bundler
+from .cache.chunker import Chunker
+from .lanes import Lanes
+
+
+@dataclass
+class SyncJob:
+    backup_config: BackupConfig
+    paths: list[superpathlib.Path]
+    bundled: list[superpathlib.Path] = field(default_factory=list)
+    unbundled: list[superpathlib.Path] = field(default_factory=list)
+    chunked: list[superpathlib.Path] = field(default_factory=list)
+    duration: float = 0
+    priority_duration: float | None = None
+
+    @property
+    def name(self) -> str:
+        return str(self.backup_config.source)
+
+    @cached_property
+    def bundler(self) -> Bundler:
+        return Bundler(self.backup_config)
+
+    @cached_property
+    def chunker(self) -> Chunker:
+        return Chunker(self.backup_config)
+
+    @cached_property
+    def remote(self) -> SyncConfig:
+        excluded = {*self.bundled, *self.chunked}
+        return SyncConfig(
+            source=self.backup_config.source,
+            dest=self.backup_config.dest,
+            paths=[path for path in self.paths if path not in excluded],
+        )
+
+    @cached_property
+    def cache(self) -> SyncConfig:
+        # the cache holds the manifests of chunked files
+        chunked = set(self.chunked)
+        return SyncConfig(
+            source=self.backup_config.source,
+            dest=self.backup_config.cache,
+            paths=[path for path in self.paths if path not in chunked],
+        )
+
+
+@dataclass
+class SyncScheduler:
+    """
+    Sync the changes of all configs concurrently.
+
+    The remote syncs share the transfer budget of a single rclone process, such that a
+    slow config no longer holds back the others. When pushing, the cache of a config
+    is updated while its remote sync is in progress. The cache records what the remote
+    holds, so the cache copies of a config whose remote sync fails are invalidated and
+    detected again by the next scan. The paths are marked as pending in the scan index
+    until the remote sync succeeds, such that the cache copies of a run that is killed
+    are invalidated by the next push as well. When pulling, the cache can only follow
+    once the source is updated. Bundled files travel through the archives in the cache
+    and chunked files through the manifests in the cache.
+    """
+
+    reverse: bool = False
+
+    def run(self, jobs: list[SyncJob]) -> None:
+        if not jobs:
+            return
+        n_workers = min(len(jobs), context.config.n_parallel_syncs)
+        transfers = max(context.config.n_parallel_transfers // n_workers, 1)
+        for job in jobs:
+            job.bundled = job.bundler.select(job.paths, reverse=self.reverse)
+            job.chunked = job.chunker.select(job.paths, reverse=self.reverse)
+            if not self.reverse:
+                job.unbundled = job.bundler.select_unbundled(job.paths)
+            job.remote.transfers = transfers
+            job.remote.share_progress(n_workers)
+            job.cache.show_progress = False
+        with ThreadPoolExecutor(n_workers) as executor:
+            futures = [executor.submit(self.run_job, job) for job in jobs]
+        exceptions = []
+        for job, future in zip(jobs, futures, strict=True):
+            index = ScanIndex(job.cache.dest)
+            index.refresh(job.paths)
+            exception = future.exception()
+            if exception is None:
+                index.refresh_listing(job.paths)
+            else:
+                exception.add_note(f"while syncing {job.name}")
+                exceptions.append(exception)
+        self.report(jobs)
+        if exceptions:
+            message = f"Syncing {len(exceptions)} of {len(jobs)} configs failed"
+            raise BaseExceptionGroup(message, exceptions)
+
+    def run_job(self, job: SyncJob) -> None:
+        start = time.perf_counter()
+        try:
+            self.sync(job)
+        finally:
+            job.duration = time.perf_counter() - start
+
+    def sync(self, job: SyncJob) -> None:
+        if self.reverse:
+            if job.remote.paths:
+                Syncer(job.remote).push(reverse=True)
+            if job.chunked:
+                job.chunker.assemble(job.chunked)
+            if job.bundled:
+                # the cache holds the unpacked bundles of the remote
+                bundled = job.cache.with_paths(job.bundled)
+                bundled.show_progress = False
+                Syncer(bundled).push(reverse=True)
+            self.push_cache(job)
+            return
+        index = ScanIndex(job.backup_config.cache)
+        index.mark_pending(job.paths)
+        with ThreadPoolExecutor(1) as executor:
+            cache_sync = executor.submit(self.push_cache, job)
+            try:
+                if job.remote.paths:
+                    lanes = Lanes(job.backup_config, job.remote)
+                    lanes.run()
+                    job.priority_duration = lanes.priority_duration
+                if job.chunked:
+                    job.chunker.push(job.chunked)
+                if job.bundled or job.unbundled:
+                    # bundles are packed from the cache
+                    cache_sync.result()
+                    job.bundler.push(job.bundled, job.unbundled)
+            except Exception:
+                wait([cache_sync])
+                self.invalidate(job)
+                index.clear_pending(job.paths)
+                raise
+            cache_sync.result()
+        index.clear_pending(job.paths)
+
+    @classmethod
+    def push_cache(cls, job: SyncJob) -> None:
+        # a sync without paths would sync everything
+        if job.cache.paths:
+            Syncer(job.cache).push()
+
+    @classmethod
+    def recover(cls, backup_config: BackupConfig) -> None:
+        """
+        Invalidate the cache copies of a push that stopped before its remote sync.
+        """
+        index = ScanIndex(backup_config.cache)
+        paths = index.load_pending()
+        if paths:
+            cls.invalidate(SyncJob(backup_config, [*paths]))
+            index.refresh(paths)
+            index.clear_pending(paths)
+
+    @classmethod
+    def invalidate(cls, job: SyncJob) -> None:
+        syncer = CacheSyncer(job.backup_config)
+        for path in job.paths:
+            syncer.change_path(job.backup_config.cache / path)
+
+    @classmethod
+    def report(cls, jobs: list[SyncJob]) -> None:
+        for job in jobs:
+            duration = f"{job.duration:.1f}s"
+            message = f"Synced {len(job.paths)} paths of {job.name} in {duration}"
+            if job.priority_duration is not None:
+                message += f", priority paths in {job.priority_duration:.1f}s"
+            cli.console.print(message, markup=False)
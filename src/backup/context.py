@@ -1,8 +1,9 @@
+import atexit
 import os
 from dataclasses import dataclass
 from enum import StrEnum
 from functools import cached_property
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 import cli
 import typer
@@ -12,10 +13,14 @@ from package_utils.storage import CachedFileContent
 
 from backup.models import Path
 
+if TYPE_CHECKING:
+    from backup.syncer.daemon import Daemon  # pragma: nocover
+
 
 class Action(StrEnum):
     push = "push"
     pull = "pull"
+    watch = "watch"
 
 
 class Help:
@@ -25,6 +30,13 @@ class Help:
     sub_check: str = "only check subpath of current working directory"
     cache_only: str = "pull from local cache without syncing from remote"
     remote: str = "rclone remote to back up to"
+    rescan: str = "walk the cache instead of using the scan index"
+    content_hash: str = "compare touched files by content hash before checking them"
+    daemon: str = "run rclone operations in a single rclone rcd process"
+    incremental_listing: str = "list only the remote files modified since the last pull"
+    adaptive_tuning: str = "tune sync concurrency to the throughput of past runs"
+    chunking: str = "back up large files as deduplicated chunks instead of skipping"
+    viewer: str = "browse the changes page by page before confirming"
 
 
 @dataclass
@@ -35,6 +47,16 @@ class Options:
     sub_check: Annotated[bool, typer.Option(help=Help.sub_check)] = False
     cache_only: Annotated[bool, typer.Option(help=Help.cache_only)] = False
     remote: Annotated[str | None, typer.Option(help=Help.remote)] = None
+    rescan: Annotated[bool, typer.Option(help=Help.rescan)] = False
+    content_hash: Annotated[bool, typer.Option(help=Help.content_hash)] = False
+    daemon: Annotated[bool, typer.Option(help=Help.daemon)] = False
+    incremental_listing: Annotated[
+        bool,
+        typer.Option(help=Help.incremental_listing),
+    ] = False
+    adaptive_tuning: Annotated[bool, typer.Option(help=Help.adaptive_tuning)] = False
+    chunking: Annotated[bool, typer.Option(help=Help.chunking)] = False
+    viewer: Annotated[bool, typer.Option(help=Help.viewer)] = False
     config_path: Path = Path.config
 
 
@@ -43,11 +65,28 @@ class Config:
     overwrite_newer: bool = True
     retries: int = 5
     n_checkers: int = 100
+    n_min_checkers: int = 8
     n_parallel_transfers: int = 100
+    n_parallel_syncs: int = 4
+    n_large_file_transfers: int = 4
+    max_multi_thread_streams: int = 16
+    small_file_size: int = int(1e6)
+    files_from_threshold: int = 1000
     retries_sleep: str = "30s"
     order_by: str = "size,desc"  # handle largest files first
     drive_import_formats: str = "docx, xlsx"
     max_backup_size: int = int(50e6)
+    bundle_file_size: int = 4096
+    chunk_size: int = 2**20  # average size of content-defined chunks
+    n_scan_workers: int = 16
+    max_journal_size: int = int(64e6)
+    n_hash_workers: int = 8
+    n_tag_workers: int = 8
+    tag_batch_size: int = 1000
+    daemon_start_timeout: float = 10
+    daemon_poll_interval: float = 0.5
+    listing_reconcile_interval: int = 86400
+    listing_max_age_margin: int = 3600  # clock skew between hosts
 
 
 class Storage:
@@ -55,6 +94,10 @@ class Storage:
         Path.number_of_paths,
         default=0,
     )
+    throughput: CachedFileContent[dict[str, dict[str, float]]] = CachedFileContent(
+        Path.throughput,
+        default={},
+    )
 
 
 class Context(Context_[Options, Config, None]):
@@ -73,13 +116,24 @@ class Context(Context_[Options, Config, None]):
             env["RCLONE_CONFIG_PASS"] = SecretLoader("rclone").load()
         return env
 
+    @cached_property
+    def rclone_daemon(self) -> "Daemon | None":
+        from backup.syncer.daemon import Daemon  # noqa: PLC0415
+
+        if not self.options.daemon:
+            return None
+        daemon = Daemon()
+        daemon.start()
+        atexit.register(daemon.stop)
+        return daemon
+
     @cached_property
     def remote(self) -> str:
-        return (
-            self.options.remote
-            if self.options.remote is not None
-            else cli.capture_output_lines("rclone listremotes", env=self.rclone_env)[0]
-        )
+        if self.options.remote is not None:
+            return self.options.remote
+        if self.rclone_daemon is not None:
+            return self.rclone_daemon.list_remotes()[0]
+        return cli.capture_output_lines("rclone listremotes", env=self.rclone_env)[0]
 
 
 context = Context(Options, Config)
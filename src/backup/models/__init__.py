@@ -7,6 +7,7 @@ from .backup_config import (
 )
 from .change import Change
 from .change_type import ChangeType, ChangeTypes
+from .change_viewer import ChangeViewer
 from .changes import Changes
 from .path import Path
 from .print_change import PrintChange
@@ -1,9 +1,11 @@
-import fnmatch
+import os
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any
 
 from package_utils.dataclasses.mixins import SerializationMixin
 
+from .ignore_matcher import IgnoreMatcher
 from .path import Path
 
 Entries = list[str | dict[str, "Entries"] | Any]
@@ -14,10 +16,12 @@ class Ignores:
     names: list[str] = field(default_factory=list)
     patterns: list[str] = field(default_factory=list)
 
-    def matches(self, path: Path) -> bool:
-        return path.name in self.names or any(
-            fnmatch.fnmatch(str(path), pattern) for pattern in self.patterns
-        )
+    @cached_property
+    def matcher(self) -> IgnoreMatcher:
+        return IgnoreMatcher.compile(self.names, self.patterns)
+
+    def matches(self, path: str | os.PathLike[str]) -> bool:
+        return self.matcher.matches(os.fspath(path))
 
 
 @dataclass
@@ -32,6 +36,8 @@ class SerializedEntryConfig(SerializationMixin):
     dest: str = ""
     includes: Entries = field(default_factory=list)
     excludes: Entries = field(default_factory=list)
+    bundles: list[str] = field(default_factory=list)
+    priorities: dict[str, int] = field(default_factory=dict)
 
 
 @dataclass
@@ -50,3 +56,5 @@ class BackupConfig:
     cache: Path
     rules: list[PathRule] = field(default_factory=list)
     ignores: Ignores = field(default_factory=Ignores)
+    bundles: list[Path] = field(default_factory=list)
+    priorities: dict[Path, int] = field(default_factory=dict)
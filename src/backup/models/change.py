@@ -3,9 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Self, cast
 
-import cli
 from superpathlib import Path
 
+from . import diff
 from .change_type import ChangeType, ChangeTypes, parse_change_type
 
 
@@ -49,7 +49,4 @@ def calculate_diff(
 ) -> list[str]:
     source = source_root / path
     dest = dest_root / path
-    diff_command: tuple[str | Path, ...] = ("diff", "-u", "--new-file", dest, source)
-    if color:
-        diff_command = *diff_command, "--color=always"
-    return cli.capture_output_lines(*diff_command, check=False)[2 : 2 + max_lines]
+    return diff.calculate_diff(source, dest, color=color, max_lines=max_lines)
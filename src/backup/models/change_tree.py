@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import typing
+from dataclasses import dataclass, field
+
+from .change_type import ChangeTypes
+from .path import Path
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable  # pragma: nocover
+
+    from .change import Change  # pragma: nocover
+
+
+@dataclass(slots=True, eq=False)
+class Node:
+    """
+    Directory of the change paths, or the changed file itself once its count is one.
+
+    The children are keyed by the path components of the changes in the order in
+    which they first occur, and every node refers to the last change below it.
+    """
+
+    children: dict[str, Node] = field(default_factory=dict)
+    count: int = 0
+    leaf: tuple[Change, list[str]] | None = None
+    size: int | None = None
+
+    @classmethod
+    def from_changes(cls, changes: Iterable[Change]) -> Node:
+        tree = cls()
+        for change in changes:
+            tree.add(change)
+        return tree
+
+    def add(self, change: Change, parts: list[str] | None = None) -> None:
+        if parts is None:
+            parts = str(change.path).split("/")
+        self.count += 1
+        node = self
+        for part in parts:
+            node = node.children.setdefault(part, Node())
+            node.count += 1
+            node.leaf = change, parts
+
+    @property
+    def change(self) -> Change:
+        return typing.cast("tuple[Change, list[str]]", self.leaf)[0]
+
+    def calculate_size(self) -> int:
+        """
+        Total bytes of the changed files below the node.
+        """
+        if self.size is None:
+            if self.children:
+                children = self.children.values()
+                self.size = sum(child.calculate_size() for child in children)
+            else:
+                self.size = read_size(self.change)
+        return self.size
+
+
+def read_size(change: Change) -> int:
+    root = change.dest if change.type == ChangeTypes.deleted else change.source
+    if root is None:
+        return 0
+    return Path(root / change.path).read_size() or 0
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import itertools
+import typing
+from dataclasses import dataclass, field
+
+import cli
+from superpathlib import Path
+
+from .change_tree import Node
+from .print_change import PrintChange
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterator  # pragma: nocover
+
+    from .changes import Changes  # pragma: nocover
+
+help_message = "enter: next page, b: previous page, <row>: open, y: {action}, n: cancel"
+size_units = ("B", "kB", "MB", "GB", "TB")
+
+
+@dataclass(eq=False)
+class Entry:
+    """
+    Row of the change viewer for a changed file or a directory of changes.
+
+    Directories with a single subdirectory are merged into one row and directories
+    with a single change are shown as part of the path of the change, like in the
+    printed structure. The rows below an entry are only created once it is expanded.
+    """
+
+    name: str
+    node: Node
+    level: int
+    parent: Entry | None = None
+    expanded: bool = False
+    entries: list[Entry] | None = None
+    # number of rows that are visible below the entry when it is expanded
+    rows: int = 0
+
+    @classmethod
+    def create(cls, name: str, node: Node, level: int, parent: Entry) -> Entry:
+        if node.count == 1:
+            _, parts = typing.cast("tuple[object, list[str]]", node.leaf)
+            name = "/".join(parts[level - 1 :])
+        else:
+            names = [name]
+            while len(node.children) == 1:
+                ((name, node),) = node.children.items()
+                names.append(name)
+                level += 1
+            name = "/".join(names)
+        return cls(name, node, level, parent)
+
+    @property
+    def is_file(self) -> bool:
+        return self.node.count == 1
+
+    def load_entries(self) -> list[Entry]:
+        if self.entries is None:
+            children = self.node.children.items()
+            self.entries = [
+                Entry.create(name, child, self.level + 1, self)
+                for name, child in children
+            ]
+            self.rows = len(self.entries)
+        return self.entries
+
+    def toggle(self) -> None:
+        self.load_entries()
+        self.expanded = not self.expanded
+        rows = self.rows if self.expanded else -self.rows
+        parent = self.parent
+        while parent is not None:
+            parent.rows += rows
+            parent = parent.parent
+
+
+@dataclass
+class ChangeViewer:
+    """
+    Browse the changes page by page before confirming them.
+
+    Only the rows of the visible page are rendered. Every entry counts the rows that
+    are visible below it, such that a page is found without walking the rows before
+    it. Sizes are only calculated for the directories that are shown and diffs only
+    for the files that are opened.
+    """
+
+    root: Entry
+    page_size: int = field(default_factory=lambda: max(cli.console.height - 4, 1))
+    offset: int = 0
+
+    @classmethod
+    def from_changes(cls, changes: list[Changes]) -> ChangeViewer:
+        tree = Node()
+        groups = [changes_ for changes_ in changes if changes_]
+        for changes_ in groups:
+            for change in changes_:
+                parts = str(change.path).split("/")
+                if len(groups) > 1:
+                    # the paths of different configs are grouped by their source
+                    parts = [str(change.source), *parts]
+                tree.add(change, parts)
+        root = Entry("", tree, 0)
+        root.toggle()
+        return cls(root)
+
+    def generate_rows(
+        self,
+        entry: Entry,
+        depth: int = 0,
+        skip: int = 0,
+    ) -> Iterator[tuple[Entry, int]]:
+        for child in entry.load_entries():
+            if skip:
+                skip -= 1
+            else:
+                yield child, depth
+            if child.expanded:
+                if skip >= child.rows:
+                    skip -= child.rows
+                else:
+                    yield from self.generate_rows(child, depth + 1, skip)
+                    skip = 0
+
+    def generate_page(self) -> Iterator[tuple[Entry, int]]:
+        rows = self.generate_rows(self.root, skip=self.offset)
+        return itertools.islice(rows, self.page_size)
+
+    def clamp_offset(self) -> None:
+        # collapsing a directory removes the rows below it
+        last_page = max(self.root.rows - 1, 0) // self.page_size * self.page_size
+        self.offset = min(self.offset, last_page)
+
+    def render(self) -> list[Entry]:
+        # the total size would stat every changed file before the first page shows
+        end = min(self.offset + self.page_size, self.root.rows)
+        title = f"{self.root.node.count} changes, rows {self.offset + 1}-{end}"
+        cli.console.rule(title)
+        page = list(self.generate_page())
+        for index, (entry, depth) in enumerate(page, start=1):
+            cli.console.print(self.format_row(index, entry, depth), highlight=False)
+        return [entry for entry, _ in page]
+
+    @classmethod
+    def format_row(cls, index: int, entry: Entry, depth: int) -> str:
+        prefix = f"{index:>3} {PrintChange.indent * depth}"
+        if entry.is_file:
+            type_ = entry.node.change.type
+            return f"{prefix}[{type_.color}]{type_.symbol} {entry.name}"
+        symbol = "▾" if entry.expanded else "▸"
+        size = format_size(entry.node.calculate_size())
+        details = f"({entry.node.count} changes, {size})"
+        return f"{prefix}[bold]{symbol} {entry.name}[/bold] {details}"
+
+    def run(self, *, reverse: bool = False) -> bool:
+        action = "pull" if reverse else "push"
+        message = help_message.format(action=action)
+        while True:
+            self.clamp_offset()
+            page = self.render()
+            answer = cli.ask(message)
+            if answer in ("y", "n"):
+                return answer == "y"
+            if answer == "b":
+                self.offset = max(self.offset - self.page_size, 0)
+            elif answer.isdigit() and 1 <= int(answer) <= len(page):
+                self.open(page[int(answer) - 1])
+            elif not answer and self.offset + self.page_size < self.root.rows:
+                self.offset += self.page_size
+
+    @classmethod
+    def open(cls, entry: Entry) -> None:
+        if entry.is_file:
+            change = PrintChange(Path(entry.name), entry.node.change)
+            change.print()
+            change.print_diff(change.calculate_print_lines())
+            cli.ask("enter: back")
+        else:
+            entry.toggle()
+
+
+def format_size(size: float) -> str:
+    for unit in size_units[:-1]:
+        if size < 1000:  # noqa: PLR2004
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} {size_units[-1]}"
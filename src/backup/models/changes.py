@@ -1,5 +1,6 @@
 from collections.abc import Iterator
 from dataclasses import dataclass, field
+from functools import cached_property
 
 from superpathlib import Path
 
@@ -10,11 +11,13 @@ from .print_structure import PrintStructure
 @dataclass
 class Changes:
     changes: list[Change] = field(default_factory=list)
-    print_structure: PrintStructure = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.changes = sorted(self.changes, key=lambda c: c.sort_index)
-        self.print_structure = PrintStructure.from_changes(self.changes)
+
+    @cached_property
+    def print_structure(self) -> PrintStructure:
+        return PrintStructure.from_changes(self.changes)
 
     def __iter__(self) -> Iterator[Change]:
         yield from self.changes
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import difflib
+import itertools
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator  # pragma: nocover
+
+    from superpathlib import Path  # pragma: nocover
+
+# the amount of bytes that diff checks for null bytes to detect binary files
+binary_check_size = 32768
+context_lines = 3
+hunk_pattern = re.compile(r"@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@")
+colors = {"-": "\x1b[31m", "+": "\x1b[32m", "@": "\x1b[36m"}
+reset = "\x1b[m"
+
+
+def calculate_diff(
+    source: Path,
+    dest: Path,
+    *,
+    color: bool = True,
+    max_lines: int = 20,
+) -> list[str]:
+    """
+    Hunks of a valid unified diff from dest to source without file headers.
+
+    The hunks apply with patch, but can align lines differently than diff -u does.
+    Missing files are compared as empty files and binary files result in no lines.
+    The lines between the common start and end of both files are matched as a
+    whole, after which only the lines that are shown are formatted.
+    """
+    old_lines = read_lines(dest)
+    new_lines = read_lines(source)
+    if old_lines is None or new_lines is None:
+        return []
+    lines = itertools.islice(generate_diff_lines(old_lines, new_lines), max_lines)
+    return [colorize(line) for line in lines] if color else list(lines)
+
+
+def read_lines(path: Path) -> list[str] | None:
+    if not path.is_file():
+        return []
+    data = path.byte_content
+    if data.find(b"\0", 0, binary_check_size) != -1:
+        return None
+    return data.decode(errors="replace").splitlines()
+
+
+def generate_diff_lines(old: list[str], new: list[str]) -> Iterator[str]:
+    # the matcher is quadratic in the worst case, so the common start and end of both
+    # sides only contribute their context lines
+    prefix = count_common(old, new)
+    suffix = count_common(reversed(old[prefix:]), reversed(new[prefix:]))
+    start = max(prefix - context_lines, 0)
+    end = max(suffix - context_lines, 0)
+    old_part = old[start : len(old) - end]
+    new_part = new[start : len(new) - end]
+    lines = difflib.unified_diff(old_part, new_part, n=context_lines, lineterm="")
+    for line in itertools.islice(lines, 2, None):
+        yield shift_hunk(line, start) if line.startswith("@@") else line
+
+
+def count_common(old: Iterable[str], new: Iterable[str]) -> int:
+    count = 0
+    for old_line, new_line in zip(old, new, strict=False):
+        if old_line != new_line:
+            break
+        count += 1
+    return count
+
+
+def shift_hunk(line: str, offset: int) -> str:
+    match = hunk_pattern.match(line)
+    if match is None or not offset:
+        return line
+    old_start, old_length, new_start, new_length = match.groups()
+    old_range = f"{int(old_start) + offset}{old_length or ''}"
+    new_range = f"{int(new_start) + offset}{new_length or ''}"
+    return f"@@ -{old_range} +{new_range} @@"
+
+
+def colorize(line: str) -> str:
+    color = colors.get(line[:1])
+    return line if color is None else f"{color}{line}{reset}"
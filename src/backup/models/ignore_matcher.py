@@ -0,0 +1,77 @@
+import fnmatch
+import os
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Self
+
+wildcards = frozenset("*?[")
+
+
+@dataclass(frozen=True)
+class IgnoreMatcher:
+    """
+    Ignore rules compiled once instead of calling fnmatch for every pattern.
+
+    Patterns are split by shape: literal paths become a set lookup, patterns with only
+    a leading and/or trailing star become suffix, prefix or substring checks, and all
+    other patterns are joined into a single regular expression.
+    """
+
+    names: frozenset[str] = frozenset()
+    paths: frozenset[str] = frozenset()
+    prefixes: tuple[str, ...] = ()
+    suffixes: tuple[str, ...] = ()
+    parts: tuple[str, ...] = ()
+    expression: re.Pattern[str] | None = None
+
+    @classmethod
+    def compile(cls, names: Iterable[str], patterns: Iterable[str]) -> Self:
+        paths: list[str] = []
+        prefixes: list[str] = []
+        suffixes: list[str] = []
+        parts: list[str] = []
+        remaining: list[str] = []
+        for pattern in patterns:
+            if not has_wildcard(pattern):
+                paths.append(pattern)
+            elif (
+                len(pattern) > 1
+                and pattern.startswith("*")
+                and pattern.endswith("*")
+                and not has_wildcard(pattern[1:-1])
+            ):
+                parts.append(pattern[1:-1])
+            elif pattern.startswith("*") and not has_wildcard(pattern[1:]):
+                suffixes.append(pattern[1:])
+            elif pattern.endswith("*") and not has_wildcard(pattern[:-1]):
+                prefixes.append(pattern[:-1])
+            else:
+                remaining.append(pattern)
+        expression = (
+            re.compile("|".join(fnmatch.translate(pattern) for pattern in remaining))
+            if remaining
+            else None
+        )
+        return cls(
+            frozenset(names),
+            frozenset(paths),
+            tuple(prefixes),
+            tuple(suffixes),
+            tuple(parts),
+            expression,
+        )
+
+    def matches(self, path: str) -> bool:
+        return (
+            path.rpartition(os.sep)[2] in self.names
+            or path in self.paths
+            or path.startswith(self.prefixes)
+            or path.endswith(self.suffixes)
+            or any(part in path for part in self.parts)
+            or (self.expression is not None and self.expression.match(path) is not None)
+        )
+
+
+def has_wildcard(pattern: str) -> bool:
+    return not wildcards.isdisjoint(pattern)
@@ -45,10 +45,22 @@ class Path(superpathlib.Path):
         # drive remote only minute precision and month range
         return date.month, date.day, date.hour, date.minute
 
+    @property
+    def is_remote(self) -> bool:
+        return self.parts[0].endswith(":")
+
     @property
     def is_root(self) -> bool:
-        is_remote = self.parts[0].endswith(":")
-        return not is_remote and not self.user_has_write_access()
+        return not self.is_remote and not self.user_has_write_access()
+
+    def read_size(self) -> int | None:
+        """
+        Size of the file in a single stat call, or None if it does not exist.
+        """
+        try:
+            return os.stat(self).st_size  # noqa: PTH116
+        except (FileNotFoundError, NotADirectoryError):
+            return None
 
     def user_has_write_access(self) -> bool:
         path = self
@@ -73,6 +85,18 @@ class Path(superpathlib.Path):
         path = cls.assets / "cache"
         return cast("Self", path)
 
+    @classmethod
+    @classproperty
+    def scan_index(cls) -> Self:
+        path = cls.assets / "scan_index.sqlite"
+        return cast("Self", path)
+
+    @classmethod
+    @classproperty
+    def journal(cls) -> Self:
+        path = cls.assets / "journal"
+        return cast("Self", path)
+
     @classmethod
     @classproperty
     def config(cls) -> Self:
@@ -85,6 +109,12 @@ class Path(superpathlib.Path):
         path = cls.assets / "volatile" / "number_of_paths"
         return cast("Self", path)
 
+    @classmethod
+    @classproperty
+    def throughput(cls) -> Self:
+        path = cls.assets / "volatile" / "throughput"
+        return cast("Self", path)
+
     @classmethod
     @classproperty
     def backup_source(cls) -> Self:
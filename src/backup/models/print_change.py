@@ -12,7 +12,7 @@ from superpathlib import Path
 from .change import Change, ChangeType, ChangeTypes
 
 if typing.TYPE_CHECKING:
-    from collections.abc import Iterator  # pragma: nocover
+    from collections.abc import Iterable, Iterator  # pragma: nocover
 
 
 @dataclass
@@ -22,18 +22,6 @@ class PrintChange:
     indent_count: int = 0
     indent = "  "
 
-    @property
-    def root(self) -> str:
-        return self.path.parts[0]
-
-    @property
-    def path_from_root(self) -> Path:
-        return self.path.relative_to(self.root)
-
-    @property
-    def child(self) -> PrintChange:
-        return PrintChange(self.path_from_root, self.change, self.indent_count + 1)
-
     @property
     def symbol(self) -> str:
         return self.change.type.symbol if self.change.path.parts else "\u2022"
@@ -53,7 +41,7 @@ class PrintChange:
     def whitespace(self) -> str:
         return self.indent * self.indent_count
 
-    def print(self, *, show_diff: bool = False) -> None:
+    def print(self) -> None:
         not_usable_width = self.whitespace + self.symbol + " " + "-"
         available_width = cli.console.width - len(not_usable_width)
         message_chunks = [
@@ -63,8 +51,6 @@ class PrintChange:
         lines = self.format_lines(message_chunks)
         message = "\n".join(lines)
         cli.console.print(message)
-        if show_diff and self.change.path.parts:
-            self.print_diff()
 
     def format_lines(self, lines: list[str]) -> Iterator[str]:
         color = self.change.type.color if self.change.path.parts else "black"
@@ -78,8 +64,7 @@ class PrintChange:
             suffix = "-" if need_suffix else ""
             yield f"{self.whitespace}{prefix}[bold {color}]{message}{suffix}"
 
-    def print_diff(self) -> None:
-        lines = self.generate_print_lines()
+    def print_diff(self, lines: Iterable[str]) -> None:
         whitespace = self.indent * (self.indent_count + 1)
         available_width = cli.console.width - len(whitespace)
         for line in lines:
@@ -90,6 +75,9 @@ class PrintChange:
             line_message = "\n".join(chunks)
             cli.console.print(line_message, highlight=False)
 
+    def calculate_print_lines(self) -> list[str]:
+        return list(self.generate_print_lines()) if self.change.path.parts else []
+
     def generate_print_lines(self) -> Iterator[str]:
         return (
             self.generate_diff_lines()
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import typing
 from dataclasses import dataclass
 from typing import cast
 
+import cli
 from superpathlib import Path
 
 from .change import Change
+from .change_tree import Node
 from .print_change import PrintChange
 
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterator  # pragma: nocover
+
 
 @dataclass
 class PrintStructure:
@@ -16,81 +22,72 @@ class PrintStructure:
     substructures: list[PrintStructure]
     max_show: int = 1000
     show_diff: bool = False
+    hidden: int = 0
 
     @classmethod
     def from_changes(cls, changes: list[Change]) -> PrintStructure:
-        print_changes = [
-            PrintChange(change.path, change) for change in changes[: cls.max_show]
-        ]
-        return cls.from_print_changes(print_changes)
-
-    def un_indent(self) -> None:
-        if self.root is not None:
-            self.root.indent_count -= 1
-        for c in self.changes:
-            c.indent_count -= 1
-        for substructure in self.substructures:
-            substructure.un_indent()
-
-    def closest_nodes(self) -> int:
-        return (
-            0
-            if self.changes
-            else 1 + min(sub.closest_nodes() for sub in self.substructures)
-        )
-
-    def current_level_empty(self) -> bool:
-        return not self.changes and len(self.substructures) == 1
+        """
+        Group the changes by their common directories in a single pass.
+        """
+        tree = Node.from_changes(changes[: cls.max_show])
+        structure = cls.from_node(tree, 0, 0)
+        structure.hidden = max(len(changes) - cls.max_show, 0)
+        return structure
 
     @classmethod
-    def from_print_changes(cls, changes: list[PrintChange]) -> PrintStructure:
-        changes_per_root: dict[str, list[PrintChange]] = {}
-        for change in changes:
-            if change.root not in changes_per_root:
-                changes_per_root[change.root] = []
-            changes_per_root[change.root].append(change)
-
-        substructures = []
+    def from_node(cls, node: Node, depth: int, indent_count: int) -> PrintStructure:
         changes = []
-        for root_name, sub_print_changes in changes_per_root.items():
-            if len(sub_print_changes) == 1:
-                changes += sub_print_changes
+        substructures = []
+        for name, child in node.children.items():
+            if child.count == 1:
+                # a directory with a single change is printed as part of its path
+                change, parts = cast("tuple[Change, list[str]]", child.leaf)
+                path = Path("/".join(parts[depth:]))
+                changes.append(PrintChange(path, change, indent_count))
             else:
-                sub_structure = cls.create_sub_structure(root_name, sub_print_changes)
-                substructures.append(sub_structure)
-
-        return PrintStructure(None, changes, substructures)
+                substructure = cls.from_directory(name, child, depth + 1, indent_count)
+                substructures.append(substructure)
+        return cls(None, changes, substructures)
 
     @classmethod
-    def create_sub_structure(
+    def from_directory(
         cls,
-        root_name: str,
-        sub_print_changes: list[PrintChange],
+        name: str,
+        node: Node,
+        depth: int,
+        indent_count: int,
     ) -> PrintStructure:
-        root_path = Path(root_name)
-        children = [c.child for c in sub_print_changes]
-        sub_structure = PrintStructure.from_print_changes(children)
-
-        if sub_structure.current_level_empty():
-            if sub_structure.root is None:
-                sub_structure.root = sub_structure.substructures[0].root
-            root = cast("PrintChange", sub_structure.root)
-            root_path /= root.path
-            sub_structure = sub_structure.substructures[0]
-            sub_structure.un_indent()
+        names = [name]
+        # directories with a single subdirectory are merged into one root
+        while len(node.children) == 1:
+            ((name, node),) = node.children.items()
+            names.append(name)
+            depth += 1
+        structure = cls.from_node(node, depth, indent_count + 1)
+        root_path = Path("/".join(names))
+        structure.root = PrintChange(root_path, Change(Path()), indent_count)
+        return structure
 
-        sub_structure.root = PrintChange(
-            root_path,
-            Change(Path()),
-            sub_print_changes[0].indent_count,
+    def closest_nodes(self) -> int:
+        return (
+            0
+            if self.changes
+            else 1 + min(sub.closest_nodes() for sub in self.substructures)
         )
-        return sub_structure
 
     def print(self, *, show_diff: bool = False) -> None:
+        for change in self.generate_print_changes():
+            change.print()
+            if show_diff:
+                change.print_diff(change.calculate_print_lines())
+        if self.hidden:
+            message = f"... and {self.hidden} more changes, browse all with --viewer"
+            cli.console.print(message, markup=False)
+
+    def generate_print_changes(self) -> Iterator[PrintChange]:
         if self.root is not None:
-            self.root.print(show_diff=show_diff)
-        for change in self.changes:
-            change.print(show_diff=show_diff)
+            yield self.root
+        yield from self.changes
         substructures = sorted(self.substructures, key=lambda s: s.closest_nodes())
         for sub_structure in substructures:
-            sub_structure.print(show_diff=show_diff)
+            yield from sub_structure.generate_print_changes()
@@ -1,3 +1,4 @@
 from .builder import create_syncer
+from .listing import ListedFile
 from .sync_config import SyncConfig
 from .syncer import Syncer
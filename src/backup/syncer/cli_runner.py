@@ -38,12 +38,17 @@ class CliRunner:
             return runner.capture_output()
 
     @contextmanager
-    def create_runner(self, *args: CommandItem) -> Iterator[Runner[str]]:
+    def create_runner(
+        self,
+        *args: CommandItem,
+        env: dict[str, str] | None = None,
+    ) -> Iterator[Runner[str]]:
         filters_path = self.create_filters_path()
         command_parts = self.generate_command_parts(filters_path, *args)
         command = tuple(command_parts)
+        kwargs = {"env": context.rclone_env | (env or {})}
         with filters_path:
-            yield Runner(command, root=self.root, kwargs={"env": context.rclone_env})
+            yield Runner(command, root=self.root, kwargs=kwargs)
 
     def generate_command_parts(
         self,
@@ -56,9 +61,13 @@ class CliRunner:
         parts = (
             self.generate_action_parts(),
             args,
-            ("--filter-from", filters_path),
+            (self.filter_option, filters_path),
             self.config.options,
-            self.generate_options(),
+            self.generate_options(
+                self.config.transfers,
+                self.config.checkers,
+                self.config.multi_thread_streams,
+            ),
         )
         yield from itertools.chain(*parts)
 
@@ -72,19 +81,33 @@ class CliRunner:
             else:
                 yield from (self.config.source, self.config.dest)
         if self.push:
-            yield from ("--create-empty-src-dirs", "--progress")
+            yield "--create-empty-src-dirs"
+            if self.config.show_progress:
+                yield "--progress"
             if self.root:
                 yield "--no-update-dir-modtime"
 
+    @property
+    def filter_option(self) -> str:
+        return "--files-from-raw" if self.config.uses_files_from else "--filter-from"
+
     def create_filters_path(self) -> superpathlib.Path:
-        if not self.config.filter_rules:
-            FiltersCreator(self.config).create_filters_from_paths()
         path = superpathlib.Path.tempfile()
-        path.lines = self.config.filter_rules
+        if self.config.uses_files_from:
+            path.lines = list(FiltersCreator(self.config).generate_file_list())
+        else:
+            if not self.config.filter_rules:
+                FiltersCreator(self.config).create_filters_from_paths()
+            path.lines = self.config.filter_rules
         return path
 
     @classmethod
-    def generate_options(cls) -> Iterator[CommandItem]:
+    def generate_options(
+        cls,
+        transfers: int | None = None,
+        checkers: int | None = None,
+        multi_thread_streams: int | None = None,
+    ) -> Iterator[CommandItem]:
         config = context.config
         yield "--skip-links"
         if not config.overwrite_newer:
@@ -95,6 +118,8 @@ class CliRunner:
             "retries-sleep": config.retries_sleep,
             "order-by": config.order_by,
             "drive-import-formats": config.drive_import_formats,
-            "checkers": config.n_checkers,
-            "transfers": config.n_parallel_transfers,
+            "checkers": checkers or config.n_checkers,
+            "transfers": transfers or config.n_parallel_transfers,
         }
+        if multi_thread_streams is not None:
+            yield {"multi-thread-streams": multi_thread_streams}
@@ -0,0 +1,202 @@
+import base64
+import json
+import secrets
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, cast
+
+import cli
+import superpathlib
+from cli.commands.runner import Runner
+
+from backup.context import context
+from backup.utils.error_handling import create_malformed_filters_error
+
+from .cli_runner import CliRunner
+from .filters import FiltersCreator
+from .listing import ListedFile, parse_timestamp
+from .sync_config import SyncConfig
+
+Response = dict[str, Any]
+malformed_rule_message = "malformed rule"
+
+
+def create_address() -> str:
+    with socket.socket() as connection:
+        connection.bind(("127.0.0.1", 0))
+        port = connection.getsockname()[1]
+    return f"127.0.0.1:{port}"
+
+
+@dataclass
+class Daemon:
+    """
+    Single rclone rcd process that serves the rclone operations of a run over its
+    remote control API.
+
+    Compared to one rclone process per operation, the config is read and the remotes
+    are connected only once. The global options are passed when the daemon starts and
+    the filters are passed with every call. Syncs run as jobs that are polled until
+    they finish.
+    """
+
+    address: str = field(default_factory=create_address)
+    user: str = field(default_factory=lambda: secrets.token_hex(16))
+    password: str = field(default_factory=lambda: secrets.token_hex(16), repr=False)
+    process: subprocess.Popen[str] | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}/"
+
+    def start(self) -> None:
+        options = CliRunner.generate_options()
+        command = ("rclone", "rcd", "--rc-addr", self.address, *options)
+        env = context.rclone_env | {
+            "RCLONE_RC_USER": self.user,
+            "RCLONE_RC_PASS": self.password,
+        }
+        self.process = Runner(command, kwargs={"env": env}).launch()
+        self.wait_until_ready()
+
+    def wait_until_ready(self) -> None:
+        deadline = time.monotonic() + context.config.daemon_start_timeout
+        while True:
+            try:
+                self.call("rc/noop")
+            except urllib.error.URLError:
+                is_running = self.process is not None and self.process.poll() is None
+                if not is_running or time.monotonic() > deadline:
+                    self.stop()
+                    message = f"rclone rcd did not start on {self.address}"
+                    raise cli.CalledProcessError(message) from None
+                time.sleep(0.01)
+            else:
+                return
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+    def call(self, command: str, **parameters: Any) -> Response:
+        credentials = base64.b64encode(f"{self.user}:{self.password}".encode())
+        headers = {
+            "Authorization": f"Basic {credentials.decode()}",
+            "Content-Type": "application/json",
+        }
+        request = urllib.request.Request(  # noqa: S310
+            self.url + command,
+            data=json.dumps(parameters).encode(),
+            headers=headers,
+        )
+        try:
+            with urllib.request.urlopen(request) as response:  # noqa: S310
+                return cast("Response", json.load(response))
+        except urllib.error.HTTPError as exception:
+            message = json.load(exception).get("error", str(exception))
+            raise cli.CalledProcessError(message) from exception
+
+    def run_job(self, command: str, **parameters: Any) -> Response:
+        job = self.call(command, _async=True, **parameters)
+        interval = 0.001
+        while not (status := self.call("job/status", jobid=job["jobid"]))["finished"]:
+            time.sleep(interval)
+            interval = min(interval * 2, context.config.daemon_poll_interval)
+        if not status["success"]:
+            raise cli.CalledProcessError(status["error"])
+        return cast("Response", status["output"])
+
+    def sync(self, config: SyncConfig, *, reverse: bool = False) -> Response:
+        source, dest = select_roots(config, reverse=reverse)
+        with create_filter(config) as filter_:
+            return self.run_job(
+                "sync/sync",
+                srcFs=str(source),
+                dstFs=str(dest),
+                createEmptySrcDirs=True,
+                _filter=filter_,
+                _config=create_options(config),
+            )
+
+    def check(self, config: SyncConfig, *, reverse: bool = False) -> list[str]:
+        source, dest = select_roots(config, reverse=reverse)
+        with create_filter(config) as filter_:
+            try:
+                response = self.call(
+                    "operations/check",
+                    srcFs=str(source),
+                    dstFs=str(dest),
+                    combined=True,
+                    match=True,
+                    _filter=filter_,
+                )
+            except cli.CalledProcessError as exception:
+                # other errors are not caused by the filter rules
+                if malformed_rule_message not in str(exception):
+                    raise
+                filters = config.filter_rules
+                raise create_malformed_filters_error(filters) from exception
+        lines: list[str] = response["combined"]
+        return lines
+
+    def list_files(
+        self,
+        config: SyncConfig,
+        path: superpathlib.Path,
+        *,
+        max_age: int | None = None,
+    ) -> Iterator[ListedFile]:
+        with create_filter(config) as filter_:
+            if max_age is not None:
+                filter_["MaxAge"] = f"{max_age}s"
+            response = self.call(
+                "operations/list",
+                fs=str(path),
+                remote="",
+                opt={"recurse": True, "filesOnly": True},
+                _filter=filter_,
+            )
+        for item in response["list"]:
+            mtime = parse_timestamp(item["ModTime"])
+            yield ListedFile(item["Path"], mtime, item["Size"])
+
+    def list_remotes(self) -> list[str]:
+        remotes = self.call("config/listremotes")["remotes"]
+        return [f"{remote}:" for remote in remotes]
+
+
+def select_roots(
+    config: SyncConfig,
+    *,
+    reverse: bool,
+) -> tuple[superpathlib.Path, superpathlib.Path]:
+    return (config.dest, config.source) if reverse else (config.source, config.dest)
+
+
+def create_options(config: SyncConfig) -> dict[str, int]:
+    options = {
+        "Transfers": config.transfers,
+        "Checkers": config.checkers,
+        "MultiThreadStreams": config.multi_thread_streams,
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+
+@contextmanager
+def create_filter(config: SyncConfig) -> Iterator[dict[str, Any]]:
+    if config.uses_files_from:
+        with superpathlib.Path.tempfile() as path:
+            path.lines = list(FiltersCreator(config).generate_file_list())
+            yield {"FilesFromRaw": [str(path)]}
+    else:
+        if not config.filter_rules:
+            FiltersCreator(config).create_filters_from_paths()
+        yield {"FilterRule": config.filter_rules}
@@ -1,3 +1,4 @@
+import re
 from collections.abc import Iterator
 from dataclasses import dataclass, field
 
@@ -6,6 +7,7 @@ from superpathlib import Path
 from .sync_config import SyncConfig
 
 reserved_characters = "\\", "[", "]", "*", "**", "?", "{", "}"
+reserved_pattern = re.compile(r"[\\\[\]*?{}]")
 
 
 @dataclass
@@ -24,28 +26,35 @@ class FiltersCreator:
             self.config.path = self.config.directory / "**"
         if self.config.path is not None:
             self.config.paths = (self.config.path,)
+        for path in self.generate_relative_paths():
+            yield f"+ /{self.escape(path)}"
+
+        if self.config.paths:
+            yield "- *"
+
+    def generate_file_list(self) -> Iterator[str]:
+        """
+        Paths for --files-from-raw, which rclone reads without escaping or rules.
+        """
+        for path in self.generate_relative_paths():
+            yield self.path_separator.join(path.parts)
+
+    def generate_relative_paths(self) -> Iterator[Path]:
         for path in self.config.paths:
-            relative_path = (
+            yield (
                 path.relative_to(self.config.source)
                 if path.is_relative_to(self.config.source)
                 else path
             )
-            path_str = self.escape(relative_path)
-            yield f"+ /{path_str}"
-
-        if self.config.paths:
-            yield "- *"
 
     def escape(self, path: Path) -> str:
-        # backslash character needs to be first in sequence
-        # or otherwise each escape gets escaped again
+        # a single substitution never escapes an inserted backslash again
         recursive_symbol = "**"
         recursive = path.name == recursive_symbol
         if recursive:
             path = path.parent
         path_str = self.path_separator.join(path.parts)
-        for character in reserved_characters:
-            path_str = path_str.replace(character, f"\\{character}")
+        path_str = reserved_pattern.sub(r"\\\g<0>", path_str)
         if recursive:
             path_str += self.path_separator + recursive_symbol
 
@@ -0,0 +1,50 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+# lsf prints the modification time, size and path of every file
+listing_format = "tsp"
+listing_separator = ";"
+
+
+class ListedFile(NamedTuple):
+    path: str
+    mtime: int
+    size: int
+
+
+def parse_line(line: str) -> ListedFile:
+    # paths are printed last, such that separators in paths are preserved
+    timestamp, size, path = line.split(listing_separator, 2)
+    return ListedFile(path, parse_timestamp(timestamp), int(size))
+
+
+def parse_timestamp(text: str) -> int:
+    """
+    Seconds since the epoch of an ISO 8601 timestamp with a fixed UTC offset.
+
+    Accepts "YYYY-MM-DD HH:MM:SS" as printed by lsf and the RFC 3339 timestamps of
+    the remote control API. Fractions of seconds are dropped like lsl does and
+    timestamps without offset are in UTC.
+    """
+    seconds = int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+    offset = text[19:].lstrip(".0123456789")
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        seconds -= sign * (int(offset[1:3]) * 3600 + int(offset[4:6]) * 60)
+    return parse_date(text[:10]) * 86400 + seconds
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> int:
+    """
+    Days since the epoch of a YYYY-MM-DD date in the proleptic Gregorian calendar.
+    """
+    year, month, day = int(text[:4]), int(text[5:7]), int(text[8:10])
+    # count years from March, such that leap days end the year
+    year += (month + 9) // 12 - 1
+    month = (month + 9) % 12
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * month + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
@@ -1,16 +1,22 @@
-from collections.abc import Iterable, Iterator
+import itertools
+from collections.abc import Iterable
 from dataclasses import dataclass
+from functools import partial
 
 import cli
 from cli.commands.runner import Runner
 from superpathlib import Path
 
+from backup.context import context
 from backup.models import Change, Changes, ChangeTypes
-from backup.utils import generate_output_lines
+from backup.utils import generate_output_batches
 from backup.utils.error_handling import create_malformed_filters_error
+from backup.utils.threads import run_in_threads
 
 from .sync_config import SyncConfig
 
+preserved_symbol = ChangeTypes.preserved.symbol
+
 
 @dataclass
 class StatusProcessor:
@@ -20,35 +26,65 @@ class StatusProcessor:
 
     def capture_changes(self, runner: Runner[str]) -> tuple[Changes, list[Path]]:
         runner.quiet = self.quiet
+        return self.process(generate_output_batches(runner))
+
+    def process(
+        self,
+        batches: Iterable[Iterable[str]],
+    ) -> tuple[Changes, list[Path]]:
+        """
+        Classify the check lines, which are processed in the batches they are read in.
+        """
+        changes: list[Change] = []
+        preserved: list[str] = []
+        source, dest = self.config.source, self.config.dest
         try:
-            changes = list(self.generate_changes(runner))
+            for lines in self.track_batches(batches):
+                for line in lines:
+                    # most lines are unchanged paths, for which only the path is kept
+                    if line[0] == preserved_symbol:
+                        preserved.append(line[2:])
+                    else:
+                        changes.append(Change.from_pattern(line, source, dest))
         except cli.CalledProcessError as exception:
             raise create_malformed_filters_error(
                 self.config.filter_rules,
             ) from exception
-        paths_without_change = list(self.extract_paths_without_change(changes))
-        changes = [change for change in changes if change.type != ChangeTypes.preserved]
-        return Changes(changes), paths_without_change
-
-    def generate_changes(self, runner: Runner[str]) -> Iterator[Change]:
-        status_lines: Iterable[str] = generate_output_lines(runner)
-        if not runner.quiet:
-            status_lines = cli.track_progress(
-                status_lines,
-                description="Checking",
-                unit="files",
-                total=len(self.config.paths) if self.config.paths else None,
-                cleanup_after_finish=True,
-            )
-        for line in status_lines:
-            yield Change.from_pattern(line, self.config.source, self.config.dest)
-
-    def extract_paths_without_change(self, changes: list[Change]) -> Iterator[Path]:
-        for change in changes:
-            if change.type == ChangeTypes.preserved:
-                yield change.path
-                if self.is_cache:
-                    dest = self.config.dest / change.path
-                    if dest.tag is None:
-                        # save original mtime for remote syncing
-                        dest.tag = str(dest.mtime)
+        if self.is_cache and preserved:
+            self.save_mtimes(preserved)
+        return Changes(changes), [Path(path) for path in preserved]
+
+    def track_batches(
+        self,
+        batches: Iterable[Iterable[str]],
+    ) -> Iterable[Iterable[str]]:
+        if self.quiet:
+            return batches
+        lines = cli.track_progress(
+            itertools.chain.from_iterable(batches),
+            description="Checking",
+            unit="files",
+            total=len(self.config.paths) if self.config.paths else None,
+            cleanup_after_finish=True,
+        )
+        # the progress advances per line, such that all lines form a single batch
+        return [lines]
+
+    def save_mtimes(self, paths: list[str]) -> None:
+        """
+        Save the original mtimes of unchanged cache files for remote syncing.
+
+        The extended attributes are written in batches by a thread pool, since every
+        file costs a few system calls.
+        """
+        size = context.config.tag_batch_size
+        batches = [paths[start : start + size] for start in range(0, len(paths), size)]
+        save_batch = partial(save_mtime_batch, self.config.dest)
+        run_in_threads(save_batch, batches, context.config.n_tag_workers)
+
+
+def save_mtime_batch(root: Path, paths: list[str]) -> None:
+    for path in paths:
+        dest = root / path
+        if dest.tag is None:
+            dest.tag = str(dest.mtime)
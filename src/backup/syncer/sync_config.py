@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from cli.commands.commands import CommandItem
 from superpathlib import Path
 
+from backup.context import context
+
 
 @dataclass
 class SyncConfig:
@@ -15,6 +17,11 @@ class SyncConfig:
     paths: list[Path] | tuple[Path] | set[Path] = field(default_factory=list)
     path: Path | None = None
     directory: Path | None = None
+    transfers: int | None = None
+    checkers: int | None = None
+    multi_thread_streams: int | None = None
+    show_progress: bool = True
+    files_from: bool | None = None
 
     def __post_init__(self) -> None:
         if self.sub_check_path is not None:
@@ -24,6 +31,30 @@ class SyncConfig:
             self.source /= sub_check_path
             self.dest /= sub_check_path
 
+    def share_progress(self, n_concurrent_syncs: int) -> None:
+        # the progress of concurrent syncs would interleave
+        self.show_progress = self.show_progress and n_concurrent_syncs == 1
+
+    @property
+    def uses_files_from(self) -> bool:
+        """
+        Whether the paths are passed as a raw file list instead of filter rules.
+
+        Filter rules are matched against every file that rclone lists, which becomes
+        expensive for large lists of paths. A file list is only possible when no other
+        rules are needed and is chosen by list size unless files_from is set.
+        """
+        is_possible = (
+            bool(self.paths)
+            and not self.filter_rules
+            and self.path is None
+            and self.directory is None
+            and self.overlapping_sub_path is None
+        )
+        is_large = len(self.paths) >= context.config.files_from_threshold
+        use_files_from = is_large if self.files_from is None else self.files_from
+        return is_possible and use_files_from
+
     @property
     def overlapping_sub_path(self) -> Path | None:
         return next(self.generate_overlapping_sub_paths(), None)
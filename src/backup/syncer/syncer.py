@@ -1,18 +1,22 @@
+import json
 import subprocess
 from collections.abc import Iterator
 from dataclasses import dataclass
-from datetime import UTC, datetime
 from typing import TypeVar
 
 import superpathlib
 from cli.commands.commands import CommandItem
 
+from backup.context import context
 from backup.models import Changes
-from backup.models import Path as BackupPath
+from backup.utils import generate_output_batches
 
 from .cli_runner import CliRunner
+from .daemon import Daemon
+from .listing import ListedFile, listing_format, parse_line
 from .status import StatusProcessor
 from .sync_config import SyncConfig
+from .tuning import Tuner
 
 Path = TypeVar("Path", bound=superpathlib.Path)
 
@@ -30,6 +34,12 @@ class Syncer:
     ) -> CliRunner:
         return CliRunner(self.config, push=push, action=action, reverse=reverse)
 
+    def select_daemon(self, *, reverse: bool = False) -> Daemon | None:
+        # the daemon runs without root privileges and only knows the global options
+        runner = self.cli_runner(reverse=reverse)
+        is_supported = not self.config.options and not runner.root
+        return context.rclone_daemon if is_supported else None
+
     def run(self, *args: CommandItem) -> subprocess.CompletedProcess[str]:
         return self.cli_runner().run(*args)
 
@@ -37,7 +47,17 @@ class Syncer:
         return self.cli_runner().capture_output(*args)
 
     def push(self, *, reverse: bool = False) -> subprocess.CompletedProcess[str]:
-        return self.cli_runner(push=True, reverse=reverse).run()
+        if not context.options.adaptive_tuning or not self.config.paths:
+            return self.run_push(reverse=reverse)
+        with Tuner.from_config(self.config, reverse=reverse).tune():
+            return self.run_push(reverse=reverse)
+
+    def run_push(self, *, reverse: bool = False) -> subprocess.CompletedProcess[str]:
+        daemon = self.select_daemon(reverse=reverse)
+        if daemon is None:
+            return self.cli_runner(push=True, reverse=reverse).run()
+        output = daemon.sync(self.config, reverse=reverse)
+        return subprocess.CompletedProcess("sync/sync", 0, stdout=json.dumps(output))
 
     def capture_push(self, *, reverse: bool = False) -> str:
         return self.cli_runner(push=True, reverse=reverse).capture_output()
@@ -61,34 +81,44 @@ class Syncer:
         reverse: bool = False,
         is_cache: bool = False,
     ) -> Changes:
-        runner_factory = self.cli_runner(action="check", reverse=reverse)
-        with runner_factory.create_runner("--combined", "-") as runner:
-            changes, no_change_paths = StatusProcessor(
-                self.config,
-                quiet,
-                is_cache=is_cache,
-            ).capture_changes(runner)
-            if no_change_paths:
-                # Update modified times to avoid checking again in the future
-                Syncer(self.config.with_paths(no_change_paths)).push()
+        processor = StatusProcessor(self.config, quiet, is_cache=is_cache)
+        daemon = self.select_daemon(reverse=reverse)
+        if daemon is None:
+            runner_factory = self.cli_runner(action="check", reverse=reverse)
+            with runner_factory.create_runner("--combined", "-") as runner:
+                changes, no_change_paths = processor.capture_changes(runner)
+        else:
+            lines = daemon.check(self.config, reverse=reverse)
+            changes, no_change_paths = processor.process([lines])
+        if no_change_paths:
+            # Update modified times to avoid checking again in the future
+            Syncer(self.config.with_paths(no_change_paths)).push()
         return changes
 
-    def generate_paths_with_time(
+    def list_files(
         self,
         path: Path | None = None,
-    ) -> Iterator[tuple[BackupPath, datetime]]:
-        lines = self.capture_output("lsl", path or self.config.dest)
-        return extract_paths_with_time(lines)
-
-
-def extract_paths_with_time(lines: str) -> Iterator[tuple[BackupPath, datetime]]:
-    for line in lines.splitlines():
-        if line:
-            parts = line.split()
-            date_str = " ".join(parts[1:3]).split(".")[0]
-            path_str = " ".join(parts[3:])
-            if path_str:
-                format_ = "%Y-%m-%d %H:%M:%S"
-                date = datetime.strptime(date_str, format_).astimezone(UTC)
-                path = BackupPath(path_str)
-                yield path, date
+        *,
+        max_age: int | None = None,
+    ) -> Iterator[ListedFile]:
+        """
+        Stream the files below path with their modification time and size.
+
+        With max_age, only files modified in the last max_age seconds are listed.
+        """
+        root = path or self.config.dest
+        daemon = self.select_daemon()
+        if daemon is not None:
+            yield from daemon.list_files(self.config, root, max_age=max_age)
+            return
+        runner_factory = self.cli_runner()
+        max_age_option = () if max_age is None else ("--max-age", f"{max_age}s")
+        args = (
+            *("lsf", root, "--recursive", "--files-only"),
+            *("--format", listing_format),
+            *max_age_option,
+        )
+        # lsf prints modification times in the local timezone
+        with runner_factory.create_runner(*args, env={"TZ": "UTC"}) as runner:
+            for lines in generate_output_batches(runner, check=True):
+                yield from map(parse_line, lines)
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Self
+
+from backup.context import context
+from backup.models import Path
+
+from .sync_config import SyncConfig
+
+# runs of concurrent syncs record their outcome at the same time
+lock = threading.Lock()
+
+
+@dataclass
+class Tuner:
+    """
+    Choose the concurrency of a sync from the sizes of its files and the throughput
+    measured in previous runs.
+
+    Many small files are bound by the latency per file, which more transfers hide.
+    Few large files are bound by bandwidth, where more transfers compete for the
+    uplink and every file is split over multiple streams instead. Local syncs are
+    bound by the disk. For every kind of sync, the transfers of the previous run are
+    doubled or halved depending on whether its throughput improved, such that the
+    choice follows the load of the machine and the connection.
+    """
+
+    config: SyncConfig
+    sizes: list[int]
+    is_remote: bool
+
+    @classmethod
+    def from_config(cls, config: SyncConfig, *, reverse: bool = False) -> Self:
+        # the size of a file to pull is only known from its local version
+        source, dest = Path(config.source), Path(config.dest)
+        local = dest if reverse and not dest.is_remote else source
+        sizes = [(local / path).read_size() or 0 for path in config.paths]
+        remote = source.is_remote or dest.is_remote
+        return cls(config, sizes, remote)
+
+    @property
+    def is_small(self) -> bool:
+        total = sum(self.sizes)
+        return total < len(self.sizes) * context.config.small_file_size
+
+    @property
+    def key(self) -> str:
+        destination = "remote" if self.is_remote else "local"
+        size = "small" if self.is_small else "large"
+        return f"{destination}-{size}"
+
+    @property
+    def max_transfers(self) -> int:
+        return self.config.transfers or context.config.n_parallel_transfers
+
+    def choose_transfers(self) -> int:
+        entry = context.storage.throughput.get(self.key)
+        if entry is None:
+            if not self.is_remote:
+                transfers = context.config.n_scan_workers
+            elif self.is_small:
+                transfers = self.max_transfers
+            else:
+                transfers = context.config.n_large_file_transfers
+        else:
+            transfers = int(entry["transfers"] * 2 ** entry["direction"])
+        return min(max(transfers, 1), self.max_transfers)
+
+    @contextmanager
+    def tune(self) -> Iterator[None]:
+        limit = self.max_transfers
+        target = self.choose_transfers()
+        transfers = min(target, max(len(self.sizes), 1))
+        self.config.transfers = transfers
+        self.config.checkers = min(
+            max(transfers * 2, context.config.n_min_checkers),
+            context.config.n_checkers,
+        )
+        if self.is_remote and not self.is_small:
+            streams = context.config.n_parallel_transfers // transfers
+            self.config.multi_thread_streams = min(
+                max(streams, 1),
+                context.config.max_multi_thread_streams,
+            )
+        start = time.perf_counter()
+        yield
+        self.record(target, limit, time.perf_counter() - start)
+
+    def record(self, transfers: int, limit: int, duration: float) -> None:
+        amount = len(self.sizes) if self.is_small else sum(self.sizes)
+        throughput = amount / max(duration, 1e-3)
+        with lock:
+            history = dict(context.storage.throughput)
+            previous = history.get(self.key)
+            direction = 1.0 if previous is None else previous["direction"]
+            if previous is not None and throughput < previous["throughput"]:
+                direction = -direction
+            if not 1 <= transfers * 2**direction <= limit:
+                direction = -direction
+            history[self.key] = {
+                "transfers": transfers,
+                "throughput": throughput,
+                "direction": direction,
+            }
+            context.storage.throughput = history
@@ -1 +1 @@
-from .output_generator import generate_output_lines
+from .output_generator import generate_output_batches, generate_output_lines
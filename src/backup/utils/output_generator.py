@@ -1,38 +1,103 @@
-import select
+import os
+import selectors
 import subprocess
 from collections.abc import Iterator
-from typing import IO
+from dataclasses import dataclass
 
 import cli
 from cli.commands.runner import Runner
 
+chunk_size = 2**16
 
-def generate_output_lines(runner: Runner[str]) -> Iterator[str]:
+
+def generate_output_lines(
+    runner: Runner[str],
+    *,
+    check: bool = False,
+) -> Iterator[str]:
+    """
+    Stream the output lines of a runner.
+
+    By default, the command is only considered failed if it reports errors without
+    output. With check, the exit code decides, such that a listing that is cut short
+    is not mistaken for a complete one.
+    """
+    for lines in generate_output_batches(runner, check=check):
+        yield from lines
+
+
+def generate_output_batches(
+    runner: Runner[str],
+    *,
+    check: bool = False,
+) -> Iterator[list[str]]:
+    """
+    Stream the output lines of a runner in batches of the lines read at once.
+    """
     runner.stdout = subprocess.PIPE
     runner.stderr = subprocess.PIPE
     process = runner.launch()
-    extracted_outputs = extract_output_lines(process)
     error_lines = []
     output_generated = False
-    for line, is_stdout in extracted_outputs:
+    for lines, is_stdout in extract_output_batches(process):
         if is_stdout:
             output_generated = True
-            yield line
+            yield lines
         else:
-            error_lines.append(line)
-    if not output_generated and error_lines:
+            error_lines.extend(lines)
+    if check:
+        failed = process.wait() != 0
+    else:
+        failed = not output_generated and bool(error_lines)
+    if failed:
         message = "\n".join(error_lines)
         raise cli.CalledProcessError(message)
 
 
-def extract_output_lines(process: subprocess.Popen[str]) -> Iterator[tuple[str, bool]]:
-    streams = process.stdout, process.stderr
-    outputs: list[IO[str]] = [f for f in streams if f is not None]
-    while outputs:
-        readable_outputs, _, _ = select.select(outputs, [], [])
-        for output in readable_outputs:
-            line = output.readline().strip()
-            if line:
-                yield line, output is process.stdout
-            else:
-                outputs.remove(output)
+def extract_output_batches(
+    process: subprocess.Popen[str],
+) -> Iterator[tuple[list[str], bool]]:
+    """
+    Read the output streams of a process in large chunks as soon as they are ready.
+
+    A pipe that is ready returns the data it holds without blocking, so every read
+    takes up to chunk_size bytes at once instead of a single line.
+    """
+    streams = (process.stdout, True), (process.stderr, False)
+    with selectors.DefaultSelector() as selector:
+        for stream, is_stdout in streams:
+            if stream is not None:
+                splitter = LineSplitter(is_stdout=is_stdout)
+                selector.register(stream.fileno(), selectors.EVENT_READ, splitter)
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, chunk_size)
+                if not data:
+                    selector.unregister(key.fd)
+                splitter = key.data
+                lines = splitter.split(data)
+                if lines:
+                    yield lines, splitter.is_stdout
+
+
+@dataclass
+class LineSplitter:
+    is_stdout: bool
+    remainder: bytes = b""
+
+    def split(self, data: bytes) -> list[str]:
+        """
+        Complete lines of the data read so far, or the last line once data is empty.
+        """
+        if data:
+            end = data.rfind(b"\n") + 1
+            if not end:
+                self.remainder += data
+                return []
+            data, self.remainder = self.remainder + data[:end], data[end:]
+        else:
+            data, self.remainder = self.remainder, b""
+        # lines are decoded in bulk and only split on newlines, since file names can
+        # hold the other line boundaries of splitlines
+        lines = data.decode(errors="replace").split("\n")
+        return [stripped for line in lines if (stripped := line.strip())]
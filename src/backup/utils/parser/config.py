@@ -43,12 +43,24 @@ class EntryParser:
             entry.includes,
             entry.excludes,
         ).parse_rules()
+        bundles = [
+            Path(bundle).relative_to(sub_path)
+            for bundle in entry.bundles
+            if Path(bundle).is_relative_to(sub_path)
+        ]
+        priorities = {
+            Path(path).relative_to(sub_path): priority
+            for path, priority in entry.priorities.items()
+            if Path(path).is_relative_to(sub_path)
+        }
         return BackupConfig(
             source / sub_path,
             self.dest / dest / sub_path,
             self.cache / dest / sub_path,
             rules,
             self.ignores,
+            bundles,
+            priorities,
         )
 
 
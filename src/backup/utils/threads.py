@@ -0,0 +1,22 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def run_in_threads(
+    function: Callable[[T], object],
+    items: Iterable[T],
+    n_workers: int,
+) -> None:
+    """
+    Call function on every item in a thread pool.
+
+    The results are consumed once all calls finished, such that the first exception
+    of a worker is raised instead of silently dropped.
+    """
+    with ThreadPoolExecutor(n_workers) as executor:
+        futures = [executor.submit(function, item) for item in items]
+    for future in futures:
+        future.result()
@@ -0,0 +1,84 @@
+import tarfile
+
+import pytest
+
+from backup.backup import Backup
+from backup.backup.cache.bundler import bundle_name, is_safe
+from backup.context import context
+from backup.models import Path
+from tests.mocks.files import list_objects, modify
+
+large_size = context.config.bundle_file_size + 1
+
+
+@pytest.fixture
+def bundling_backup(mocked_backup: Backup) -> Backup:
+    mocked_backup.config["syncs"][0]["bundles"] = ["bundle"]
+    source = Path(mocked_backup.config["source"])
+    for number in range(10):
+        (source / "bundle" / "sub" / f"{number}.txt").text = str(number)
+    (source / "bundle" / "large.bin").byte_content = b"0" * large_size
+    (source / "other.txt").text = "other"
+    return mocked_backup
+
+
+def test_small_files_bundled(bundling_backup: Backup) -> None:
+    bundling_backup.push()
+    config = bundling_backup.backup_configs[0]
+    expected_objects = {f"bundle/{bundle_name}", "bundle/large.bin", "other.txt"}
+    assert list_objects(config) == expected_objects
+    assert (config.cache / "bundle" / "sub" / "0.txt").text == "0"
+    assert not any(bundling_backup.push())
+
+
+def test_shrunk_file_bundled(bundling_backup: Backup) -> None:
+    bundling_backup.push()
+    config = bundling_backup.backup_configs[0]
+    modify(config.source / "bundle" / "large.bin", "small")
+    bundling_backup.push()
+    assert "bundle/large.bin" not in list_objects(config)
+    (config.source / "bundle" / "sub" / "0.txt").unlink()
+    bundling_backup.push()
+    assert (config.cache / "bundle" / bundle_name).exists()
+    assert not (config.cache / "bundle" / "sub" / "0.txt").exists()
+
+
+def test_grown_file_unbundled(bundling_backup: Backup, other_host: Backup) -> None:
+    bundling_backup.push()
+    config = bundling_backup.backup_configs[0]
+    grown = "0" * large_size
+    modify(config.source / "bundle" / "sub" / "0.txt", grown)
+    bundling_backup.push()
+    assert "bundle/sub/0.txt" in list_objects(config)
+    archive = config.cache / "bundle" / bundle_name
+    with tarfile.open(archive) as tar:
+        assert "sub/0.txt" not in tar.getnames()
+    other_host.pull()
+    pulled = other_host.backup_configs[0].source / "bundle" / "sub" / "0.txt"
+    assert pulled.text == grown
+
+
+def test_bundles_pulled(bundling_backup: Backup, other_host: Backup) -> None:
+    bundling_backup.push()
+    other_host.pull()
+    config = other_host.backup_configs[0]
+    assert (config.source / "bundle" / "sub" / "0.txt").text == "0"
+    assert (config.source / "bundle" / "large.bin").size == large_size
+    assert (config.source / "other.txt").text == "other"
+
+    source = bundling_backup.backup_configs[0].source
+    modify(source / "bundle" / "sub" / "1.txt", "modified")
+    (source / "bundle" / "sub" / "2.txt").unlink()
+    bundling_backup.push()
+    other_host.pull()
+    assert (config.source / "bundle" / "sub" / "1.txt").text == "modified"
+    assert not (config.source / "bundle" / "sub" / "2.txt").exists()
+    assert not (config.source / bundle_name).exists()
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [("sub/0.txt", True), ("../escape.txt", False), ("/absolute.txt", False)],
+)
+def test_member_names_checked(name: str, *, expected: bool) -> None:
+    assert is_safe(name) == expected
@@ -1,5 +1,13 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
 from backup.backup import Backup
+from backup.backup.cache import ScanIndex
 from backup.backup.cache.cache_syncer import CacheSyncer
+from backup.context import context
+from backup.models import Path
 
 
 def test_cache_mismatch_missing(mocked_backup: Backup) -> None:
@@ -23,3 +31,57 @@ def test_cache_mismatch_stale(mocked_backup: Backup) -> None:
     date = source_file.extract_date()
     CacheSyncer(config).handle_cache_mismatch(cache_path, date)
     assert cache_path.mtime == source_file.mtime
+
+
+@pytest.fixture
+def _incremental_listing() -> Iterator[None]:
+    with patch.object(context.options, "incremental_listing", new=True):
+        yield
+
+
+@pytest.mark.usefixtures("_incremental_listing")
+def test_incremental_listing(mocked_backup: Backup) -> None:
+    config = mocked_backup.backup_configs[0]
+    (config.dest / "deleted.txt").text = "deleted"
+    CacheSyncer(config).update_cache()
+    (config.dest / "deleted.txt").unlink()
+    (config.dest / "modified.txt").text = "modified"
+    (config.dest / "old.txt").text = "old"
+    (config.dest / "old.txt").touch(mtime=int(1e9))
+    CacheSyncer(config).update_cache()
+    assert (config.cache / "modified.txt").exists()
+    assert (config.cache / "deleted.txt").exists()
+    assert not (config.cache / "old.txt").exists()
+    with patch.object(context.config, "listing_reconcile_interval", new=-1):
+        CacheSyncer(config).update_cache()
+    assert not (config.cache / "deleted.txt").exists()
+    assert (config.cache / "old.txt").exists()
+
+
+@pytest.mark.usefixtures("_incremental_listing")
+def test_listing_refreshed_after_push(mocked_backup: Backup) -> None:
+    config = mocked_backup.backup_configs[0]
+    CacheSyncer(config).update_cache()
+    (config.source / "pushed.txt").text = "pushed"
+    mocked_backup.push()
+    with ScanIndex(config.cache).connect() as connection:
+        rows = connection.execute("SELECT path FROM listings").fetchall()
+    assert (str(config.cache / "pushed.txt"),) in rows
+
+
+@pytest.mark.parametrize("rescan", [False, True])
+def test_paths_missing_in_remote_removed(
+    mocked_backup_with_filled_content: Backup,
+    *,
+    rescan: bool,
+) -> None:
+    backup = mocked_backup_with_filled_content
+    backup.push()
+    config = backup.backup_configs[0]
+    (config.dest / "0.txt").unlink()
+    syncer = CacheSyncer(config)
+    with patch.object(context.options, "rescan", new=rescan):
+        syncer.update_cache()
+    assert not (config.cache / "0.txt").exists()
+    assert (config.cache / "1.txt").exists()
+    assert Path("0.txt") in syncer.updated_paths
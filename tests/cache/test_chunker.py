@@ -0,0 +1,160 @@
+import random
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import patch
+
+import cli
+import pytest
+
+from backup.backup import Backup
+from backup.backup.cache.chunker import (
+    Chunker,
+    chunk_directory,
+    create_manifest_path,
+    find_boundaries,
+    is_manifest,
+)
+from backup.context import context
+from backup.models import BackupConfig, Path
+from backup.syncer import Syncer
+from tests.mocks.files import list_objects, modify
+
+max_backup_size = int(1e5)
+chunk_size = 4096
+
+
+@pytest.fixture(autouse=True)
+def _chunking() -> Iterator[None]:
+    with (
+        patch.object(context.options, "chunking", new=True),
+        patch.object(context.config, "max_backup_size", new=max_backup_size),
+        patch.object(context.config, "chunk_size", new=chunk_size),
+    ):
+        yield
+
+
+@pytest.fixture
+def chunking_backup(mocked_backup: Backup) -> Backup:
+    source = Path(mocked_backup.config["source"])
+    (source / "large.bin").byte_content = generate_content(3 * max_backup_size)
+    (source / "small.txt").text = "small"
+    return mocked_backup
+
+
+@pytest.fixture
+def remote_backup(chunking_backup: Backup) -> Backup:
+    config = dict(chunking_backup.config)
+    # a directory of the test remote that is unique to this backup
+    config["dest"] = f"{context.remote}{Path(config['dest']).name}"
+    return Backup(config)
+
+
+def generate_content(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)  # noqa: S311
+
+
+def list_chunks(config: BackupConfig) -> set[str]:
+    return {
+        path
+        for path in list_objects(config)
+        if path.startswith(chunk_directory) and not path.endswith(".bin")
+    }
+
+
+def test_large_file_chunked(chunking_backup: Backup) -> None:
+    chunking_backup.push()
+    config = chunking_backup.backup_configs[0]
+    objects = list_objects(config)
+    assert "large.bin" not in objects
+    assert {create_manifest_path("large.bin"), "small.txt"} <= objects
+    assert len(list_chunks(config)) > 1
+    assert is_manifest(config.cache / "large.bin")
+    assert not any(chunking_backup.push())
+
+
+def test_edit_uploads_few_chunks(chunking_backup: Backup) -> None:
+    chunking_backup.push()
+    config = chunking_backup.backup_configs[0]
+    chunks = list_chunks(config)
+    path = config.source / "large.bin"
+    content = path.byte_content
+    middle = len(content) // 2
+    modify(path, content[:middle] + b"inserted" + content[middle:])
+    chunking_backup.push()
+    new_chunks = list_chunks(config) - chunks
+    assert 0 < len(new_chunks) <= 2
+    assert len(new_chunks) < len(chunks)
+
+
+def test_remote_edit_stages_few_chunks(remote_backup: Backup) -> None:
+    remote_backup.push()
+    path = remote_backup.backup_configs[0].source / "large.bin"
+    content = path.byte_content
+    middle = len(content) // 2
+    modify(path, content[:middle] + b"inserted" + content[middle:])
+    staged: list[str] = []
+    split = Chunker.split
+
+    def record_split(chunker: Chunker, *args: Any) -> list[str]:
+        new_chunks = split(chunker, *args)
+        staged.extend(new_chunks)
+        return new_chunks
+
+    with patch.object(Chunker, "split", new=record_split):
+        remote_backup.push()
+    assert 0 < len(staged) <= 2
+
+
+def test_listing_errors_raised(test_backup_config: BackupConfig) -> None:
+    error = cli.CalledProcessError("connection refused")
+    with (
+        patch.object(Syncer, "list_files", side_effect=error),
+        pytest.raises(cli.CalledProcessError),
+    ):
+        Chunker(test_backup_config).load_uploaded()
+
+
+def test_chunked_file_pulled(chunking_backup: Backup, other_host: Backup) -> None:
+    chunking_backup.push()
+    other_host.pull()
+    source = chunking_backup.backup_configs[0].source
+    config = other_host.backup_configs[0]
+    assert (config.source / "large.bin").byte_content == (
+        source / "large.bin"
+    ).byte_content
+    assert (config.source / "small.txt").text == "small"
+
+    content = generate_content(3 * max_backup_size, seed=1)
+    # the chunks of the previous version are reused
+    content += (source / "large.bin").byte_content
+    modify(source / "large.bin", content)
+    chunking_backup.push()
+    other_host.pull()
+    assert (config.source / "large.bin").byte_content == content
+    assert not (config.source / "large.bin.part").exists()
+
+    (source / "large.bin").unlink()
+    chunking_backup.push()
+    assert not list_objects(chunking_backup.backup_configs[0]) & {
+        "large.bin",
+        create_manifest_path("large.bin"),
+    }
+    other_host.pull()
+    assert not (config.source / "large.bin").exists()
+
+
+def test_files_named_like_manifests_synced(chunking_backup: Backup) -> None:
+    config = chunking_backup.backup_configs[0]
+    (config.source / "notes.chunked").text = "notes"
+    chunking_backup.push()
+    assert not any(chunking_backup.pull())
+    assert (config.source / "notes.chunked").text == "notes"
+    assert not is_manifest(config.cache / "notes.chunked")
+
+
+def test_boundaries_realigned_after_insertion() -> None:
+    content = generate_content(20 * chunk_size)
+    edited = content[:100] + b"inserted" + content[100:]
+    boundaries = set(find_boundaries(content))
+    shifted = {boundary - len(b"inserted") for boundary in find_boundaries(edited)}
+    assert len(boundaries & shifted) >= len(boundaries) - 2
@@ -0,0 +1,105 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from backup.backup import Backup
+from backup.backup.cache import CacheSyncer, ScanIndex
+from backup.backup.cache.content_hash import ContentComparer, hash_file
+from backup.context import context
+from backup.models import BackupConfig, Path
+from backup.syncer import Syncer
+
+
+@pytest.fixture
+def content_hash() -> Iterator[None]:
+    with patch.object(context.options, "content_hash", new=True):
+        yield
+
+
+@pytest.mark.usefixtures("content_hash")
+def test_touched_file_dropped(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    path = test_backup_config.source / "0.txt"
+    path.touch(mtime=path.mtime + 1)
+    with patch.object(Syncer, "capture_status") as capture_status:
+        changes = mocked_backup_with_filled_content.push()
+    capture_status.assert_not_called()
+    assert not any(changes)
+    cache_path = test_backup_config.cache / "0.txt"
+    assert cache_path.mtime == path.mtime
+
+
+@pytest.mark.usefixtures("content_hash")
+def test_touched_file_not_pulled(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    mocked_backup_with_filled_content.pull()
+    cache_path = test_backup_config.cache / "0.txt"
+    mtime = cache_path.mtime
+    path = test_backup_config.source / "0.txt"
+    # the remote dates are compared with minute precision
+    path.touch(mtime=path.mtime + 3600)
+    assert not any(mocked_backup_with_filled_content.push())
+    assert cache_path.tag == str(mtime)
+    with (
+        patch.object(Path, "backup_cache", new=test_backup_config.cache),
+        patch.object(CacheSyncer, "change_path") as change_path,
+    ):
+        assert not any(mocked_backup_with_filled_content.pull())
+    change_path.assert_not_called()
+
+
+@pytest.mark.usefixtures("content_hash")
+def test_changed_content_detected(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    paths = [test_backup_config.source / f"{number}.txt" for number in (0, 1)]
+    for path in paths:
+        path.text = path.text.upper()
+        path.touch(mtime=path.mtime + 1)
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [Path("0.txt"), Path("1.txt")]
+
+
+def test_hashes_cached(test_backup_config: BackupConfig) -> None:
+    paths = [test_backup_config.source / name for name in ("first", "second")]
+    for path in paths:
+        path.text = "content"
+    pairs = [(str(paths[0]), str(paths[1]))]
+    comparer = ContentComparer(ScanIndex(test_backup_config.cache), n_workers=1)
+    assert comparer.is_identical(pairs) == [True]
+    with patch("backup.backup.cache.content_hash.hash_file") as hash_file_:
+        assert comparer.is_identical(pairs) == [True]
+    hash_file_.assert_not_called()
+
+
+def test_hashes_keyed_by_device(test_backup_config: BackupConfig) -> None:
+    path = test_backup_config.source / "file.txt"
+    path.text = "content"
+    comparer = ContentComparer(ScanIndex(test_backup_config.cache), n_workers=1)
+    comparer.is_identical([(str(path), str(path))])
+    info = path.stat()
+    key = info.st_ino, info.st_size, info.st_mtime_ns
+    other_device = info.st_dev + 1, *key
+    hashes = comparer.index.load_hashes([(info.st_dev, *key), other_device])
+    assert list(hashes) == [(info.st_dev, *key)]
+
+
+def test_missing_file_not_identical(test_backup_config: BackupConfig) -> None:
+    path = test_backup_config.source / "file.txt"
+    path.text = "content"
+    pairs = [(str(path), str(test_backup_config.source / "missing"))]
+    comparer = ContentComparer(ScanIndex(test_backup_config.cache))
+    assert comparer.is_identical(pairs) == [False]
+
+
+def test_vanished_file_not_hashed(test_backup_config: BackupConfig) -> None:
+    assert hash_file(str(test_backup_config.source / "missing")) is None
@@ -4,6 +4,7 @@ from collections.abc import Iterator
 import pytest
 
 from backup.backup.cache.entry import Entry
+from backup.backup.cache.snapshot import Snapshot
 from backup.models import BackupConfig, Path
 
 is_running_in_ci = "GITHUB_ACTIONS" in os.environ
@@ -25,17 +26,17 @@ def file() -> Iterator[Path]:  # pragma: nocover
 def entry(file: Path) -> Entry:  # pragma: nocover
     dummy_path = Path()
     config = BackupConfig(source=file.parent, dest=dummy_path, cache=dummy_path)
-    return Entry(config, source=file)
+    return Entry(config, file.name, Snapshot.from_path(str(file)))
 
 
 @requires_tags
 def test_exported_tag_excluded(entry: Entry) -> None:  # pragma: nocover
-    entry.source.tag = "exported"
+    entry.source_path.tag = "exported"
     assert entry.exclude()
 
 
 @requires_tags
 @pytest.mark.usefixtures("mocked_backup")
 def test_other_tags_included(entry: Entry) -> None:  # pragma: nocover
-    entry.source.tag = "anything"
+    entry.source_path.tag = "anything"
     assert not entry.exclude()
@@ -0,0 +1,36 @@
+from backup.backup.cache.rule_trie import RuleTrie
+from backup.models import Path, PathRule
+
+
+def create_trie(*rules: tuple[str, bool]) -> RuleTrie:
+    return RuleTrie.from_rules(PathRule(Path(path), include) for path, include in rules)
+
+
+def test_first_matching_rule_decides() -> None:
+    trie = create_trie(("a/b", True), ("a", False), ("", True), ("c", False))
+    assert trie.includes("a/b/file.txt")
+    assert not trie.includes("a/file.txt")
+    assert trie.includes("c/file.txt")
+    assert trie.includes("d")
+
+
+def test_excluded_directory_with_included_rules_below_not_pruned() -> None:
+    trie = create_trie(("a/b", True), ("a", False), ("", True))
+    assert not trie.is_pruned("a", is_dir=True)
+    assert trie.is_pruned("a", is_dir=False)
+    assert trie.is_pruned("a/c", is_dir=True)
+    assert not trie.is_pruned("a/b/c", is_dir=True)
+
+
+def test_unmatched_path_pruned() -> None:
+    trie = create_trie(("a", True))
+    assert trie.is_pruned("b", is_dir=True)
+    assert not trie.is_pruned("", is_dir=True)
+    assert trie.is_pruned("", is_dir=False)
+
+
+def test_roots() -> None:
+    trie = create_trie(("a/b", True), ("a", False), ("", True), ("c/d", True))
+    assert list(trie.generate_roots()) == [""]
+    trie = create_trie(("a/b", True), ("a", False), ("c/d", True), ("c", True))
+    assert sorted(trie.generate_roots()) == ["a/b", "c"]
@@ -0,0 +1,121 @@
+from unittest.mock import patch
+
+from backup.backup import Backup
+from backup.backup.cache import CacheScanner, ScanIndex
+from backup.backup.cache.cache_scanner import inspect_directory
+from backup.backup.cache.walker import Walk
+from backup.context import context
+from backup.models import BackupConfig, ChangeTypes, Path, PathRule
+
+
+def test_index_used_after_first_push(
+    mocked_backup_with_filled_content: Backup,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    with patch.object(CacheScanner, "generate_cached_files") as walk:
+        changes = mocked_backup_with_filled_content.push()
+    walk.assert_not_called()
+    assert not any(changes)
+
+
+def test_deleted_file_detected_from_index(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    (test_backup_config.source / "0.txt").unlink()
+    changes = mocked_backup_with_filled_content.push()
+    change = changes[0].changes[0]
+    assert change.type == ChangeTypes.deleted
+
+
+def test_nested_rule_visited_once(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    directory = Path("sub")
+    test_backup_config.rules.insert(0, PathRule(directory, include=True))
+    path = test_backup_config.source / directory / "file.txt"
+    path.text = "content"
+    mocked_backup_with_filled_content.push()
+    path.unlink()
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [directory / path.name]
+
+
+def test_rescan(mocked_backup_with_filled_content: Backup) -> None:
+    mocked_backup_with_filled_content.push()
+    with (
+        patch.object(context.options, "rescan", new=True),
+        patch.object(CacheScanner, "generate_cached_files") as walk,
+    ):
+        mocked_backup_with_filled_content.push()
+    walk.assert_called_once()
+
+
+def test_refresh_removes_missing_files(test_backup_config: BackupConfig) -> None:
+    cache = test_backup_config.cache
+    path = cache / "file.txt"
+    path.text = "content"
+    index = ScanIndex(cache)
+    rules = test_backup_config.rules
+    index.rebuild(rules, [])
+    index.refresh([path.relative_to(cache)])
+    indexed_files = index.load(rules)
+    assert indexed_files is not None
+    assert indexed_files["file.txt"].size == len("content")
+    path.unlink()
+    index.refresh([path.relative_to(cache)])
+    assert index.load(rules) == {}
+
+
+def test_deleted_file_rule_detected(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    path = Path("0.txt")
+    test_backup_config.rules.insert(0, PathRule(path, include=True))
+    mocked_backup_with_filled_content.push()
+    (test_backup_config.source / path).unlink()
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [path]
+
+
+def test_file_rule_indexed(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    path = Path("0.txt")
+    test_backup_config.rules[:] = [PathRule(path, include=True)]
+    mocked_backup_with_filled_content.push()
+    with patch.object(context.options, "rescan", new=True):
+        assert not any(mocked_backup_with_filled_content.push())
+    (test_backup_config.source / path).unlink()
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [path]
+
+
+def test_repository_skipped(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    repository = test_backup_config.source / "repository"
+    (repository / ".git" / "HEAD").text = "content"
+    (repository / "file.txt").text = "content"
+    assert changed_paths(mocked_backup_with_filled_content) == {"0.txt", "1.txt"}
+    scanner = CacheScanner(test_backup_config)
+    with patch.object(Walk, "scan", autospec=True, side_effect=Walk.scan) as scan:
+        list(scanner.generate_entries())
+    scanned = {call.args[2] for call in scan.call_args_list}
+    assert str(repository) not in scanned
+    assert str(repository) in scanner.found_repositories
+    (repository / ".git").rmtree()
+    assert changed_paths(mocked_backup_with_filled_content) == {"repository/file.txt"}
+
+
+def test_missing_directory_not_inspected(test_backup_config: BackupConfig) -> None:
+    assert inspect_directory(str(test_backup_config.source / "missing")) is None
+
+
+def changed_paths(backup: Backup) -> set[str]:
+    return {str(path) for change in backup.push() for path in change.paths}
@@ -0,0 +1,94 @@
+from collections.abc import Iterator
+
+import pytest
+
+from backup.backup.cache.walker import Walk, Walker
+from backup.models import Path
+
+
+@pytest.fixture
+def directory() -> Iterator[Path]:
+    with Path.tempdir() as path:
+        for relative in ("a.txt", "sub/b.txt", "sub/sub/c.txt", "excluded/d.txt"):
+            (path / relative).text = relative
+        (path / "empty").mkdir()
+        (path / "link.txt").symlink_to(path / "a.txt")
+        (path / "linked").symlink_to(path / "sub")
+        yield path
+
+
+def walk(directory: Path, walker: Walker) -> set[str]:
+    paths = {Path(entry.path) for entry in walker.walk(str(directory))}
+    return {str(path.relative_to(directory)) for path in paths}
+
+
+def test_walk(directory: Path) -> None:
+    paths = walk(directory, Walker(n_workers=4))
+    assert paths == {"a.txt", "sub/b.txt", "sub/sub/c.txt", "excluded/d.txt"}
+
+
+def test_excluded_directory_pruned(directory: Path) -> None:
+    excluded = str(directory / "excluded")
+    walker = Walker(lambda path, is_dir: is_dir and path == excluded)
+    assert "excluded/d.txt" not in walk(directory, walker)
+
+
+def test_excluded_root(directory: Path) -> None:
+    walker = Walker(lambda path, _: path == str(directory))
+    assert not walk(directory, walker)
+
+
+def test_symlinked_root(directory: Path) -> None:
+    assert not walk(directory / "linked", Walker())
+
+
+def test_missing_root(directory: Path) -> None:
+    assert not walk(directory / "missing", Walker())
+
+
+def test_exclude_error_raised(directory: Path) -> None:
+    message = "exclude failed"
+
+    def exclude(path: str, _: bool) -> bool:  # noqa: FBT001
+        if path != str(directory):
+            raise RuntimeError(message)
+        return False
+
+    with pytest.raises(RuntimeError, match=message):
+        walk(directory, Walker(exclude))
+
+
+def test_early_stop(directory: Path) -> None:
+    entries = Walker(n_workers=2).walk(str(directory))
+    assert next(entries) is not None
+    del entries
+
+
+def test_vanished_file_skipped(directory: Path) -> None:
+    vanishing = str(directory / "a.txt")
+
+    def exclude(path: str, _: bool) -> bool:  # noqa: FBT001
+        if path == vanishing:
+            Path(path).unlink()
+        return False
+
+    assert "a.txt" not in walk(directory, Walker(exclude, stat=True))
+
+
+def test_marked_directory_skipped(directory: Path) -> None:
+    (directory / "sub" / ".git").mkdir()
+    walker = Walker(markers=frozenset((".git",)))
+    assert walk(directory, walker) == {"a.txt", "excluded/d.txt"}
+    assert walker.marked == [str(directory / "sub")]
+
+
+def test_multiple_roots(directory: Path) -> None:
+    roots = [str(directory / "sub"), str(directory / "excluded")]
+    paths = {Path(entry.path).name for entry in Walker().walk(*roots)}
+    assert paths == {"b.txt", "c.txt", "d.txt"}
+
+
+def test_work_stolen() -> None:
+    walk = Walk(lambda _, __: False, n_workers=2)
+    walk.push(1, "directory")
+    assert walk.take(0) == "directory"
@@ -19,6 +19,7 @@ from backup.models import BackupConfig, Path
 from backup.syncer import SyncConfig, Syncer
 from tests import mocks
 from tests.mocks.methods import mocked_method
+from tests.mocks.remote import alias_remote
 
 
 @dataclass
@@ -41,14 +42,25 @@ class ContextList(AbstractContextManager[None]):
 
 @pytest.fixture(scope="session", autouse=True)
 def _rclone_test_config() -> Iterator[None]:
-    os.environ.pop("RCLONE_PASSWORD_COMMAND", None)
-    with Path.tempfile() as config_path, Path.tempdir() as remote_directory:
-        config = {
-            "RCLONE_CONFIG": str(config_path),
-            "RCLONE_CONFIG_BACKUPMASTER_TYPE": "alias",
-            "RCLONE_CONFIG_BACKUPMASTER_REMOTE": str(remote_directory),
-        }
-        os.environ.update(config)
+    with alias_remote():
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _scan_index() -> Iterator[None]:
+    with (
+        Path.tempfile(create=False, suffix=Path.scan_index.suffix) as path,
+        patch.object(Path, "scan_index", new=path),
+    ):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _journal() -> Iterator[None]:
+    with (
+        Path.tempdir() as directory,
+        patch.object(Path, "journal", new=directory / Path.journal.name),
+    ):
         yield
 
 
@@ -83,6 +95,19 @@ def mocked_backup() -> Iterator[Backup]:
         yield Backup(config)
 
 
+@pytest.fixture
+def other_host(mocked_backup: Backup) -> Iterator[Backup]:
+    """
+    A backup of another host with its own source and cache and the same remote.
+    """
+    with Path.tempdir() as source:
+        config = dict(mocked_backup.config)
+        cache = Path(config["cache"]).relative_to(config["source"])
+        config["source"] = str(source)
+        config["cache"] = str(source / cache)
+        yield Backup(config)
+
+
 @pytest.fixture
 def mocked_backup_with_filled_content(
     mocked_syncer_with_filled_content: Syncer,  # noqa: ARG001
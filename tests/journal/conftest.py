@@ -0,0 +1,49 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+import pytest
+
+from backup.backup import Backup
+from backup.backup.journal import Journal, Watcher
+from backup.models import BackupConfig
+
+
+def wait_for(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def wait_for_record(journal: Journal, relative: str) -> None:
+    wait_for(lambda: f"{relative}\0".encode() in journal.log_path.read_bytes())
+
+
+@pytest.fixture
+def journal(test_backup_config: BackupConfig) -> Journal:
+    return Journal(test_backup_config)
+
+
+@contextmanager
+def running(watcher: Watcher, journal: Journal) -> Iterator[None]:
+    watcher.stopped.clear()
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        wait_for(lambda: journal.load_session() is not None)
+        yield
+    finally:
+        watcher.stop()
+        thread.join()
+
+
+@pytest.fixture
+def watcher(
+    mocked_backup_with_filled_content: Backup,
+    journal: Journal,
+) -> Iterator[Watcher]:
+    watcher = Watcher(mocked_backup_with_filled_content.backup_configs, timeout=0.01)
+    with running(watcher, journal):
+        yield watcher
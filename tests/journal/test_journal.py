@@ -0,0 +1,65 @@
+import subprocess
+from unittest.mock import patch
+
+from backup.backup import Backup
+from backup.backup.cache import CacheScanner
+from backup.backup.journal import Journal, Watcher
+from backup.backup.journal.journal import write
+from backup.models import BackupConfig, Path, PathRule
+
+
+def test_dead_session_ignored(
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    session = journal.load_session()
+    assert session is not None
+    process = subprocess.Popen(["true"])  # noqa: S607
+    process.wait()
+    session.pid = process.pid
+    write(journal.session_path, session)
+    assert journal.read() is None
+
+
+def test_rotation_while_reading_ignored(
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    session = journal.load_session()
+    with patch.object(Journal, "load_session", side_effect=[session, None]):
+        assert journal.read() is None
+
+
+def test_changed_rules_ignored(
+    test_backup_config: BackupConfig,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    test_backup_config.rules.pop()
+    assert Journal(test_backup_config).read() is None
+
+
+def test_unreachable_paths_skipped(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    mocked_backup_with_filled_content.push()
+    source = test_backup_config.source
+    paths = ["sub/.git/file.txt", "link/file.txt"]
+    for path in paths:
+        (source / path).text = "content"
+    (source / "link").rmtree()
+    (source / "link").symlink_to(source / "sub")
+    scanner = CacheScanner(test_backup_config, journaled=[*paths, "sub/file.txt"])
+    entries = [entry for entry in scanner.generate_entries() if entry.is_changed()]
+    assert not entries
+
+
+def test_file_rule_always_scanned(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+) -> None:
+    test_backup_config.rules[:] = [PathRule(Path("0.txt"), include=True)]
+    mocked_backup_with_filled_content.push()
+    scanner = CacheScanner(test_backup_config, journaled=[])
+    entries = [entry.relative for entry in scanner.generate_entries()]
+    assert entries == ["0.txt"]
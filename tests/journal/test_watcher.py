@@ -0,0 +1,178 @@
+import errno
+from unittest.mock import patch
+
+import pytest
+
+from backup.backup import Backup
+from backup.backup.journal import Journal, Watcher
+from backup.backup.journal.inotify import IN_Q_OVERFLOW, Event, Inotify
+from backup.context import context
+from backup.models import BackupConfig, ChangeTypes, Path, PathRule
+
+from .conftest import running, wait_for, wait_for_record
+
+
+def test_changes_detected_from_journal(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    mocked_backup_with_filled_content.push()
+    path = test_backup_config.source / "0.txt"
+    path.text = "changed"
+    path.touch(mtime=path.mtime + 1)
+    wait_for_record(journal, "0.txt")
+    assert journal.read() == ["0.txt"]
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [Path("0.txt")]
+    assert not any(mocked_backup_with_filled_content.push())
+
+
+def test_pull_not_limited_to_journal(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    mocked_backup_with_filled_content.push()
+    mocked_backup_with_filled_content.push()
+    remote = test_backup_config.dest / "0.txt"
+    remote.text = "changed remotely"
+    # the remote dates are compared with minute precision
+    remote.touch(mtime=remote.mtime + 3600)
+    assert journal.read() == []
+    changes = mocked_backup_with_filled_content.pull()
+    assert Path("0.txt") in changes[0].paths
+    assert (test_backup_config.source / "0.txt").text == "changed remotely"
+
+
+def test_new_directory_detected(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    mocked_backup_with_filled_content.push()
+    directory = test_backup_config.source / "sub"
+    directory.mkdir()
+    wait_for_record(journal, "sub")
+    path = directory / "nested" / "file.txt"
+    path.text = "content"
+    wait_for_record(journal, "sub/nested")
+    changes = mocked_backup_with_filled_content.push()
+    assert changes[0].paths == [Path("sub/nested/file.txt")]
+
+
+def test_deleted_directory_detected(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+) -> None:
+    directory = test_backup_config.source / "sub"
+    (directory / "nested" / "file.txt").text = "content"
+    watcher = Watcher(mocked_backup_with_filled_content.backup_configs, timeout=0.01)
+    with running(watcher, journal):
+        mocked_backup_with_filled_content.push()
+        directory.rmtree()
+        wait_for_record(journal, "sub")
+        changes = mocked_backup_with_filled_content.push()
+    change = changes[0].changes[0]
+    assert change.path == Path("sub/nested/file.txt")
+    assert change.type == ChangeTypes.deleted
+
+
+def test_excluded_directory_ignored(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    mocked_backup_with_filled_content.push()
+    (test_backup_config.source / "dummy_directory" / "file.txt").text = "content"
+    (test_backup_config.source / ".git").mkdir()
+    wait_for_record(journal, ".git")
+    assert not any(mocked_backup_with_filled_content.push())
+
+
+def test_full_walk_before_first_commit(
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    assert journal.read() is None
+
+
+def test_unconfirmed_push_not_committed(
+    mocked_backup_with_filled_content: Backup,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    with patch("cli.confirm", return_value=False):
+        mocked_backup_with_filled_content.push()
+    assert not journal.checkpoint_path.exists()
+
+
+def test_restart_forces_full_walk(
+    mocked_backup_with_filled_content: Backup,
+    journal: Journal,
+) -> None:
+    watcher = Watcher(mocked_backup_with_filled_content.backup_configs, timeout=0.01)
+    with running(watcher, journal):
+        mocked_backup_with_filled_content.push()
+    assert journal.read() is None
+    with running(watcher, journal):
+        assert journal.read() is None
+
+
+def test_removed_rule_root_restarts_session(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+) -> None:
+    directory = test_backup_config.source / "sub"
+    directory.mkdir()
+    test_backup_config.rules[:] = [PathRule(Path("sub"), include=True)]
+    watcher = Watcher(mocked_backup_with_filled_content.backup_configs, timeout=0.01)
+    with running(watcher, journal):
+        mocked_backup_with_filled_content.push()
+        session = journal.load_session()
+        directory.rmdir()
+        wait_for(lambda: journal.load_session() not in (None, session))
+        assert journal.read() is None
+
+
+def test_overflow_restarts_session(watcher: Watcher) -> None:
+    inotify = Inotify()
+    events = [Event(-1, IN_Q_OVERFLOW, "")]
+    assert not watcher.process(inotify, events)
+    inotify.close()
+
+
+def test_large_log_restarts_session(
+    mocked_backup_with_filled_content: Backup,
+    test_backup_config: BackupConfig,
+    journal: Journal,
+    watcher: Watcher,  # noqa: ARG001
+) -> None:
+    mocked_backup_with_filled_content.push()
+    session = journal.load_session()
+    with patch.object(context.config, "max_journal_size", new=0):
+        (test_backup_config.source / "0.txt").text = "changed"
+        wait_for(lambda: journal.load_session() not in (None, session))
+    assert journal.read() is None
+
+
+def test_watch_limit_raised(mocked_backup: Backup) -> None:
+    exception = OSError(errno.ENOSPC, "No space left on device")
+    watcher = Watcher(mocked_backup.backup_configs)
+    with (
+        patch.object(Inotify, "add_watch", side_effect=exception),
+        pytest.raises(OSError, match="No space left"),
+    ):
+        watcher.run()
+
+
+def test_watch(mocked_backup: Backup) -> None:
+    with patch.object(Watcher, "run") as run:
+        mocked_backup.watch()
+    run.assert_called_once()
@@ -0,0 +1,17 @@
+from backup.models import BackupConfig, Path
+
+
+def modify(path: Path, content: bytes | str) -> None:
+    """
+    Replace the content of path with a later modification time.
+    """
+    if isinstance(content, str):
+        path.text = content
+    else:
+        path.byte_content = content
+    path.touch(mtime=path.mtime + 1)
+
+
+def list_objects(config: BackupConfig) -> set[str]:
+    paths = config.dest.rglob("*")
+    return {str(path.relative_to(config.dest)) for path in paths if path.is_file()}
@@ -0,0 +1,22 @@
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from backup.models import Path
+
+
+@contextmanager
+def alias_remote(name: str = "backupmaster") -> Iterator[Path]:
+    """
+    Configure an rclone alias remote that stores its files in a temporary directory.
+    """
+    os.environ.pop("RCLONE_PASSWORD_COMMAND", None)
+    with Path.tempfile() as config_path, Path.tempdir() as remote_directory:
+        prefix = f"RCLONE_CONFIG_{name.upper()}"
+        config = {
+            "RCLONE_CONFIG": str(config_path),
+            f"{prefix}_TYPE": "alias",
+            f"{prefix}_REMOTE": str(remote_directory),
+        }
+        os.environ.update(config)
+        yield remote_directory
@@ -0,0 +1,172 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+
+import cli
+import pytest
+
+from backup.backup import Backup
+from backup.backup.change_scanner import ChangeScanner
+from backup.context import context
+from backup.models import Change, Changes, ChangeTypes, ChangeViewer, Path
+from backup.models.change_viewer import format_size
+
+names = ["a/b/c/1.txt", "a/b/c/2.txt", "a/x.txt", "b.txt", "d/e/f.txt", "d/e/g/h.txt"]
+
+
+@pytest.fixture
+def changes() -> Iterator[Changes]:
+    with Path.tempdir() as source, Path.tempdir() as dest:
+        for name in names:
+            (source / name).text = f"new {name}\n"
+            (dest / name).text = f"old {name}\n"
+        type_ = ChangeTypes.modified
+        yield Changes([Change(Path(name), type_, source, dest) for name in names])
+
+
+def run_viewer(
+    viewer: ChangeViewer,
+    answers: list[str],
+    capsys: pytest.CaptureFixture[str],
+) -> tuple[bool, list[str]]:
+    with patch.object(cli, "ask", side_effect=answers):
+        confirmed = viewer.run()
+    return confirmed, capsys.readouterr().out.splitlines()
+
+
+def extract_rows(lines: list[str]) -> list[str]:
+    return [line for line in lines if line.startswith("  ")]
+
+
+def test_only_page_rendered(
+    changes: Changes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    viewer = ChangeViewer.from_changes([changes])
+    viewer.page_size = 2
+    confirmed, lines = run_viewer(viewer, ["", "", "b", "y"], capsys)
+    assert confirmed
+    first_page = ["  1 ▸ a (3 changes, 44 B)", "  2 * b.txt"]
+    last_page = ["  1 ▸ d/e (2 changes, 30 B)"]
+    expected_rows = [*first_page, *last_page, *last_page, *first_page]
+    assert extract_rows(lines) == expected_rows
+    assert "6 changes, rows 3-3" in "\n".join(lines)
+    # only the directories that are shown are sized
+    assert viewer.root.node.size is None
+
+
+def test_directories_toggled(
+    changes: Changes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    viewer = ChangeViewer.from_changes([changes])
+    confirmed, lines = run_viewer(viewer, ["1", "2", "2", "1", "n"], capsys)
+    assert not confirmed
+    pages = "\n".join(lines).split("rows")[1:]
+    expanded = [line for line in pages[2].splitlines() if line.startswith("  ")]
+    assert expanded == [
+        "  1 ▾ a (3 changes, 44 B)",
+        "  2   ▾ b/c (2 changes, 32 B)",
+        "  3     * 1.txt",
+        "  4     * 2.txt",
+        "  5   * x.txt",
+        "  6 * b.txt",
+        "  7 ▸ d/e (2 changes, 30 B)",
+    ]
+    assert viewer.root.rows == 3
+
+
+def test_offset_clamped_to_last_page(
+    changes: Changes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    viewer = ChangeViewer.from_changes([changes])
+    viewer.page_size = 2
+    viewer.offset = 10
+    _, lines = run_viewer(viewer, ["y"], capsys)
+    assert "rows 3-3" in lines[0]
+    assert extract_rows(lines) == ["  1 ▸ d/e (2 changes, 30 B)"]
+
+
+def test_rows_of_expanded_directories_skipped(changes: Changes) -> None:
+    viewer = ChangeViewer.from_changes([changes])
+    viewer.page_size = 2
+    for entry in viewer.root.load_entries():
+        if not entry.is_file:
+            entry.toggle()
+    viewer.offset = 2
+    rows = [(entry.name, depth) for entry, depth in viewer.generate_page()]
+    assert rows == [("x.txt", 1), ("b.txt", 0)]
+    viewer.offset = 4
+    rows = [(entry.name, depth) for entry, depth in viewer.generate_page()]
+    assert rows == [("d/e", 0), ("f.txt", 1)]
+
+
+def test_diff_loaded_on_open(
+    changes: Changes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    viewer = ChangeViewer.from_changes([changes])
+    with patch.object(Change, "get_diff_lines", autospec=True) as get_diff_lines:
+        get_diff_lines.return_value = ["-old", "+new"]
+        confirmed, lines = run_viewer(viewer, ["2", "", "y"], capsys)
+    assert confirmed
+    get_diff_lines.assert_called_once()
+    assert "  - old" in lines
+    assert "  + new" in lines
+
+
+def test_configs_grouped_by_source(
+    changes: Changes,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    # missing files and deleted changes without a known dest count as empty
+    types = ChangeTypes.created, ChangeTypes.deleted
+    root = Path("/other")
+    other = Changes([Change(Path(f"{t.symbol}.txt"), t, root) for t in types])
+    viewer = ChangeViewer.from_changes([changes, Changes(), other])
+    _, lines = run_viewer(viewer, ["y"], capsys)
+    source = str(changes.changes[0].source).strip("/")
+    assert "8 changes, rows 1-2" in lines[0]
+    assert extract_rows(lines) == [
+        f"  1 ▸ /{source} (6 changes, 84 B)",
+        "  2 ▸ /other (2 changes, 0 B)",
+    ]
+
+
+def test_scanner_confirms_with_viewer(
+    mocked_backup_with_filled_content: Backup,
+) -> None:
+    ask = MagicMock(return_value="n")
+    with (
+        patch.object(context.options, "viewer", new=True),
+        patch.object(cli, "ask", new=ask),
+        patch.object(ChangeScanner, "ask_confirm") as ask_confirm,
+        patch.object(ChangeScanner, "commit", autospec=True) as commit,
+    ):
+        mocked_backup_with_filled_content.push()
+    ask.assert_called_once()
+    ask_confirm.assert_not_called()
+    (scanner,), _ = commit.call_args
+    assert not scanner.is_confirmed
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [(0, "0 B"), (999, "999 B"), (1500, "1.5 kB"), (2 * 10**9, "2.0 GB")],
+)
+def test_format_size(size: int, expected: str) -> None:
+    assert format_size(size) == expected
+
+
+def test_large_sizes_formatted() -> None:
+    assert format_size(3 * 10**15) == "3000.0 TB"
+
+
+def test_hidden_changes_reported(capsys: pytest.CaptureFixture[str]) -> None:
+    paths = [Path(f"{number}.txt") for number in range(5)]
+    changes = Changes([Change(path, ChangeTypes.created) for path in paths])
+    with patch.object(type(changes.print_structure), "max_show", new=3):
+        del changes.print_structure
+        changes.print_structure.print()
+    output = capsys.readouterr().out
+    assert "... and 2 more changes, browse all with --viewer" in output
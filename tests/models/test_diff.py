@@ -0,0 +1,107 @@
+import random
+import subprocess
+from collections.abc import Iterator
+
+import pytest
+
+from backup.models import Change, ChangeTypes, Path, PrintStructure
+from backup.models.diff import calculate_diff
+
+numbers = [str(number) for number in range(100)]
+
+
+@pytest.fixture
+def roots() -> Iterator[tuple[Path, Path]]:
+    with Path.tempdir() as source, Path.tempdir() as dest:
+        yield source, dest
+
+
+def apply_diff(diff: list[str], old: Path) -> str:
+    # patch rejects empty input
+    if not diff:
+        return old.text
+    with Path.tempfile() as patched:
+        patch = "".join(f"{line}\n" for line in ["--- old", "+++ new", *diff])
+        command = ("patch", "--silent", "--output", patched, old)
+        subprocess.run(command, input=patch, text=True, check=True)  # noqa: S603
+        return patched.text
+
+
+def generate_edits() -> Iterator[list[str]]:
+    generator = random.Random(0)  # noqa: S311
+    for _ in range(20):
+        lines = numbers.copy()
+        for _ in range(generator.randint(1, 10)):
+            index = generator.randrange(len(lines))
+            match generator.choice(("delete", "insert", "replace")):
+                case "delete":
+                    del lines[index]
+                case "insert":
+                    lines.insert(index, str(generator.choice(numbers)))
+                case _:
+                    lines[index] = str(generator.choice(numbers))
+        yield lines
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        (numbers, ["changed", *numbers[1:]]),
+        (numbers, [*numbers[:50], "inserted", *numbers[50:]]),
+        (numbers, [*numbers[:10], *numbers[11:90], "changed", *numbers[90:]]),
+        (numbers, numbers[:-1]),
+        (None, numbers[:5]),
+        (numbers[:5], None),
+        (numbers, numbers),
+        *((numbers, edit) for edit in generate_edits()),
+    ],
+)
+def test_diff_is_valid_unified_diff(
+    roots: tuple[Path, Path],
+    old: list[str] | None,
+    new: list[str] | None,
+) -> None:
+    source, dest = (root / "file.txt" for root in roots)
+    # the last line of a file without newline is never marked in the diff
+    new_text = "".join(f"{line}\n" for line in new or [])
+    if new is not None:
+        source.text = new_text
+    if old is not None:
+        dest.text = "".join(f"{line}\n" for line in old)
+    diff = calculate_diff(source, dest, color=False, max_lines=1000)
+    # missing files are patched as empty files
+    dest.touch()
+    assert apply_diff(diff, dest) == new_text
+
+
+def test_binary_files_skipped(roots: tuple[Path, Path]) -> None:
+    source, dest = (root / "file.bin" for root in roots)
+    source.byte_content = b"\0binary"
+    dest.byte_content = b"\0other"
+    assert calculate_diff(source, dest) == []
+
+
+def test_diff_limited(roots: tuple[Path, Path]) -> None:
+    source, dest = (root / "file.txt" for root in roots)
+    source.lines = numbers
+    max_lines = 20
+    diff = calculate_diff(source, dest, max_lines=max_lines)
+    assert len(diff) == max_lines
+    assert diff[1] == "\x1b[32m+0\x1b[m"
+
+
+def test_diffs_printed_in_order(
+    roots: tuple[Path, Path],
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    source, dest = roots
+    names = [f"{number}.txt" for number in range(20)]
+    for name in names:
+        (source / name).text = f"new {name}"
+        (dest / name).text = f"old {name}"
+    changes = [Change(Path(name), ChangeTypes.modified, source, dest) for name in names]
+    PrintStructure.from_changes(changes).print(show_diff=True)
+    output = capsys.readouterr().out
+    positions = [output.index(f"+ new {name}") for name in names]
+    assert positions == sorted(positions)
+    assert output.index("- old 1.txt") < output.index("+ new 1.txt")
@@ -0,0 +1,45 @@
+import fnmatch
+
+import pytest
+
+from backup.models.backup_config import Ignores
+
+patterns = [
+    "/srv/literal",
+    "*.pyc",
+    "/home/user/build*",
+    "*/node_modules/*",
+    "/data/[ab]?/*.log",
+    "*cache*",
+    "*",
+]
+paths = [
+    "/srv/literal",
+    "/srv/literal/child",
+    "/src/module.pyc",
+    "/src/module.py",
+    "/home/user/build/output",
+    "/home/user/source",
+    "/project/node_modules/package",
+    "/data/a1/file.log",
+    "/data/c1/file.log",
+    "/var/cache",
+]
+
+
+@pytest.mark.parametrize("pattern", patterns)
+@pytest.mark.parametrize("path", paths)
+def test_pattern_matches_like_fnmatch(pattern: str, path: str) -> None:
+    ignores = Ignores(patterns=[pattern])
+    assert ignores.matches(path) == fnmatch.fnmatch(path, pattern)
+
+
+def test_name_matches() -> None:
+    ignores = Ignores(names=["cache"], patterns=["*.pyc"])
+    assert ignores.matches("/var/cache")
+    assert not ignores.matches("/var/cache/file")
+    assert ignores.matches("/var/file.pyc")
+
+
+def test_no_ignores() -> None:
+    assert not Ignores().matches("/var/cache")
@@ -0,0 +1,34 @@
+import pytest
+
+from backup.models import Change, Changes, ChangeTypes, Path
+
+names = ["a/b/c/1.txt", "a/b/c/2.txt", "a/x.txt", "b.txt", "d/e/f.txt", "d/e/g/h.txt"]
+
+
+def create_changes(names: list[str]) -> Changes:
+    types = ChangeTypes.modified, ChangeTypes.created
+    return Changes(
+        [Change(Path(name), types[i % 2]) for i, name in enumerate(names)],
+    )
+
+
+def test_structure_built_lazily() -> None:
+    changes = create_changes(names)
+    assert "print_structure" not in vars(changes)
+    assert changes.print_structure is changes.print_structure
+
+
+def test_structure_printed(capsys: pytest.CaptureFixture[str]) -> None:
+    create_changes(names).print_structure.print()
+    expected_lines = [
+        "+ b.txt",
+        "• a",
+        "  * x.txt",
+        "  • b/c",
+        "    + 2.txt",
+        "    * 1.txt",
+        "• d/e",
+        "  + g/h.txt",
+        "  * f.txt",
+    ]
+    assert capsys.readouterr().out.splitlines() == expected_lines
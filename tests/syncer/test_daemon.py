@@ -0,0 +1,148 @@
+import socket
+from collections.abc import Iterator
+from unittest.mock import PropertyMock, patch
+
+import cli
+import pytest
+
+from backup.backup import Backup
+from backup.context import context
+from backup.models import Change, ChangeTypes, Path
+from backup.syncer import SyncConfig, Syncer
+from backup.syncer.cli_runner import CliRunner
+from backup.syncer.daemon import Daemon
+
+
+@pytest.fixture
+def daemon() -> Iterator[Daemon]:
+    context.__dict__.pop("rclone_daemon", None)
+    with patch.object(context.options, "daemon", new=True):
+        daemon = context.rclone_daemon
+        assert daemon is not None
+        yield daemon
+    daemon.stop()
+    context.__dict__.pop("rclone_daemon", None)
+
+
+def test_disabled_by_default(mocked_syncer: Syncer) -> None:
+    context.__dict__.pop("rclone_daemon", None)
+    assert mocked_syncer.select_daemon() is None
+
+
+@pytest.mark.usefixtures("daemon")
+def test_status(mocked_syncer_with_filled_content: Syncer) -> None:
+    syncer = mocked_syncer_with_filled_content
+    expected_changes = {
+        Change(Path("0.txt"), ChangeTypes.modified),
+        Change(Path("1.txt"), ChangeTypes.created),
+        Change(Path("2.txt"), ChangeTypes.deleted),
+    }
+    (syncer.config.source / "3.txt").text = "preserved"
+    (syncer.config.source / "3.txt").copy_to(syncer.config.dest / "3.txt")
+    status = syncer.capture_status(quiet=True, is_cache=True)
+    assert {Change(change.path, change.type) for change in status} == expected_changes
+
+
+@pytest.mark.usefixtures("daemon")
+def test_check_errors_raised(mocked_syncer: Syncer) -> None:
+    error = cli.CalledProcessError("connection reset")
+    with (
+        patch.object(Daemon, "call", side_effect=error),
+        pytest.raises(cli.CalledProcessError, match="connection reset"),
+    ):
+        mocked_syncer.capture_status(quiet=True)
+
+
+@pytest.mark.usefixtures("daemon")
+@pytest.mark.parametrize("reverse", [False, True])
+def test_push(mocked_syncer_with_filled_content: Syncer, *, reverse: bool) -> None:
+    syncer = mocked_syncer_with_filled_content
+    syncer.push(reverse=reverse)
+    assert not syncer.capture_status(quiet=True, reverse=reverse).paths
+
+
+@pytest.mark.parametrize("max_age", [None, 3600])
+def test_list_files(
+    mocked_syncer_with_filled_content: Syncer,
+    max_age: int | None,
+) -> None:
+    syncer = mocked_syncer_with_filled_content
+    (syncer.config.dest / "old.txt").text = "old"
+    (syncer.config.dest / "old.txt").touch(mtime=int(1e9))
+    expected_files = set(syncer.list_files(max_age=max_age))
+    context.__dict__.pop("rclone_daemon", None)
+    with patch.object(context.options, "daemon", new=True):
+        files = set(syncer.list_files(max_age=max_age))
+        daemon = context.rclone_daemon
+    assert daemon is not None
+    daemon.stop()
+    context.__dict__.pop("rclone_daemon", None)
+    assert files == expected_files
+
+
+@pytest.mark.usefixtures("daemon")
+def test_malformed_filters_indicated(mocked_syncer: Syncer) -> None:
+    mocked_syncer.config.filter_rules = ["????"]
+    with pytest.raises(ValueError, match="Invalid paths:"):
+        mocked_syncer.capture_status()
+
+
+def test_failed_job(daemon: Daemon) -> None:
+    config = SyncConfig(source=Path("/__missing__"), dest=Path.tempfile())
+    with pytest.raises(cli.CalledProcessError):
+        daemon.sync(config)
+
+
+def test_job_polled(daemon: Daemon, mocked_syncer: Syncer) -> None:
+    responses = [
+        {"jobid": 1},
+        {"finished": False},
+        {"finished": True, "success": True, "output": {}},
+    ]
+    with patch.object(daemon, "call", side_effect=responses) as call:
+        daemon.sync(mocked_syncer.config)
+    assert call.call_count == len(responses)
+
+
+def test_start_failure() -> None:
+    with socket.socket() as connection:
+        connection.bind(("127.0.0.1", 0))
+        host, port = connection.getsockname()
+        daemon = Daemon(address=f"{host}:{port}")
+        with pytest.raises(cli.CalledProcessError, match="did not start"):
+            daemon.start()
+    assert daemon.process is None
+
+
+@pytest.mark.usefixtures("daemon")
+def test_root_uses_cli(mocked_syncer: Syncer) -> None:
+    with patch.object(CliRunner, "root", new_callable=PropertyMock, return_value=True):
+        assert mocked_syncer.select_daemon() is None
+
+
+@pytest.mark.usefixtures("daemon")
+@pytest.mark.parametrize("option", [None, "remote:"])
+def test_remote_listed(option: str | None) -> None:
+    with patch.object(context.options, "remote", new=option):
+        context.__dict__.pop("remote", None)
+        assert context.remote == (option or "backupmaster:")
+        context.__dict__.pop("remote")
+
+
+@pytest.mark.usefixtures("daemon")
+def test_backup(mocked_backup_with_filled_content: Backup) -> None:
+    backup = mocked_backup_with_filled_content
+    backup.push()
+    assert not any(backup.push())
+    backup.pull()
+
+
+@pytest.mark.usefixtures("daemon")
+def test_files_from(mocked_syncer_with_filled_content: Syncer) -> None:
+    config = mocked_syncer_with_filled_content.config
+    syncer = Syncer(config.with_paths([Path("0.txt"), Path("2.txt")]))
+    syncer.config.files_from = True
+    syncer.push()
+    assert not syncer.capture_status(quiet=True).paths
+    assert not (config.dest / "2.txt").exists()
+    assert not (config.dest / "1.txt").exists()
@@ -1,3 +1,8 @@
+from unittest.mock import patch
+
+import pytest
+
+from backup.context import context
 from backup.models import Path
 from backup.syncer import SyncConfig
 from backup.syncer.filters import FiltersCreator
@@ -40,3 +45,42 @@ def test_directory_used() -> None:
     config = create_config(directory=directory)
     FiltersCreator(config).create_filters_from_paths()
     assert config.paths == (directory / "**",)
+
+
+def test_reserved_characters_escaped() -> None:
+    config = create_config()
+    path = Path("a\\b[c]*d?{e}")
+    assert FiltersCreator(config).escape(path) == "a\\\\b\\[c\\]\\*d\\?\\{e\\}"
+
+
+def test_file_list_not_escaped() -> None:
+    config = create_config()
+    config.paths = [Path("/source/sub/[a]*.txt"), Path("b.txt")]
+    file_list = list(FiltersCreator(config).generate_file_list())
+    assert file_list == ["sub/[a]*.txt", "b.txt"]
+
+
+@pytest.mark.parametrize(
+    ("files_from", "threshold", "expected"),
+    [(None, 2, True), (None, 3, False), (True, 3, True), (False, 2, False)],
+)
+def test_files_from_chosen(
+    files_from: bool | None,  # noqa: FBT001
+    threshold: int,
+    expected: bool,  # noqa: FBT001
+) -> None:
+    config = SyncConfig(
+        source=Path("/source"),
+        dest=Path("/dest"),
+        paths=[Path("a.txt"), Path("b.txt")],
+        files_from=files_from,
+    )
+    with patch.object(context.config, "files_from_threshold", new=threshold):
+        assert config.uses_files_from == expected
+
+
+def test_files_from_not_used_with_rules() -> None:
+    config = create_config(directory=Path("dummy"))
+    config.files_from = True
+    FiltersCreator(config).create_filters_from_paths()
+    assert not config.uses_files_from
@@ -0,0 +1,35 @@
+import calendar
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+
+from backup.syncer.listing import ListedFile, parse_line, parse_timestamp
+
+timestamps = [
+    datetime(1970, 1, 1, tzinfo=UTC),
+    datetime(1969, 12, 31, 23, 59, 59, tzinfo=UTC),
+    datetime(2000, 2, 29, 12, 30, 15, tzinfo=UTC),
+    datetime(2100, 3, 1, 0, 0, 1, tzinfo=UTC),
+    datetime(2026, 10, 18, 18, 11, 8, tzinfo=UTC),
+]
+
+
+@pytest.mark.parametrize("date", timestamps)
+def test_parse_timestamp(date: datetime) -> None:
+    mtime = calendar.timegm(date.timetuple())
+    assert parse_timestamp(date.strftime("%Y-%m-%d %H:%M:%S")) == mtime
+    assert parse_timestamp(date.isoformat().replace("+00:00", "Z")) == mtime
+
+
+@pytest.mark.parametrize("minutes", [-570, -60, 0, 345, 840])
+def test_parse_timestamp_with_offset(minutes: int) -> None:
+    date = datetime(2026, 1, 1, 0, 15, 30, 123456, tzinfo=UTC)
+    zone = timezone(timedelta(minutes=minutes))
+    text = date.astimezone(zone).isoformat()
+    assert parse_timestamp(text) == calendar.timegm(date.timetuple())
+
+
+def test_parse_line() -> None:
+    line = "2026-10-18 18:11:08;2;dir;name/a.txt"
+    expected_file = ListedFile("dir;name/a.txt", 1792347068, 2)
+    assert parse_line(line) == expected_file
@@ -0,0 +1,44 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from backup.context import context
+from backup.models import Change, ChangeTypes, Path
+from backup.syncer import SyncConfig
+from backup.syncer.status import StatusProcessor
+
+names = [f"{number}.txt" for number in range(5)]
+
+
+@pytest.fixture
+def config() -> Iterator[SyncConfig]:
+    with Path.tempdir() as source, Path.tempdir() as dest:
+        for name in names:
+            (dest / name).text = name
+        yield SyncConfig(source, dest)
+
+
+def test_preserved_paths_extracted(config: SyncConfig) -> None:
+    lines = [*(f"= {name}" for name in names), "* changed.txt", "+ created.txt"]
+    processor = StatusProcessor(config, quiet=True)
+    changes, preserved = processor.process([lines[:3], lines[3:]])
+    expected_changes = [
+        Change(Path("created.txt"), ChangeTypes.created, config.source, config.dest),
+        Change(Path("changed.txt"), ChangeTypes.modified, config.source, config.dest),
+    ]
+    assert changes.changes == expected_changes
+    assert preserved == [Path(name) for name in names]
+    assert all((config.dest / name).tag is None for name in names)
+
+
+def test_mtimes_saved_in_batches(config: SyncConfig) -> None:
+    tagged = config.dest / names[0]
+    tagged.tag = "original"
+    lines = [f"= {name}" for name in names]
+    with patch.object(context.config, "tag_batch_size", new=2):
+        StatusProcessor(config, quiet=True, is_cache=True).process([lines])
+    assert tagged.tag == "original"
+    for name in names[1:]:
+        path = config.dest / name
+        assert path.tag == str(path.mtime)
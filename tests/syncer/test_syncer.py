@@ -31,6 +31,13 @@ def test_status(mocked_syncer_with_filled_content: Syncer) -> None:
     assert capture_changes(mocked_syncer_with_filled_content) == expected_changes
 
 
+def test_status_of_name_with_line_boundary(mocked_syncer: Syncer) -> None:
+    name = "c\u2028d.txt"
+    (mocked_syncer.config.source / name).text = "content"
+    expected_changes = {Change(Path(name), ChangeTypes.created)}
+    assert capture_changes(mocked_syncer) == expected_changes
+
+
 def capture_changes(syncer: Syncer) -> set[Change]:
     status = syncer.capture_status(quiet=True, is_cache=True)
     return {Change(change.path, change.type) for change in status}
@@ -150,3 +157,42 @@ def test_create_syncer(mocked_syncer: Syncer) -> None:
 
 def test_export_files(mocked_syncer_with_filled_content: Syncer) -> None:
     mocked_syncer_with_filled_content.export_files("csv")
+
+
+@pytest.mark.parametrize("files_from", [False, True])
+def test_files_from(
+    mocked_syncer_with_filled_content: Syncer,
+    *,
+    files_from: bool,
+) -> None:
+    config = mocked_syncer_with_filled_content.config
+    (config.source / "[a]*.txt").text = "reserved"
+    paths = [Path("0.txt"), Path("2.txt"), Path("[a]*.txt")]
+    syncer = Syncer(config.with_paths(paths))
+    syncer.config.files_from = files_from
+    expected_changes = {
+        Change(Path("0.txt"), ChangeTypes.modified),
+        Change(Path("2.txt"), ChangeTypes.deleted),
+        Change(Path("[a]*.txt"), ChangeTypes.created),
+    }
+    assert capture_changes(syncer) == expected_changes
+    syncer.push()
+    assert not capture_changes(syncer)
+    assert not (config.dest / "1.txt").exists()
+    assert (config.dest / "[a]*.txt").text == "reserved"
+
+
+def test_list_files(mocked_syncer_with_filled_content: Syncer) -> None:
+    syncer = mocked_syncer_with_filled_content
+    path = syncer.config.dest / "sub; dir" / "file;name.txt"
+    path.text = "content"
+    files = {file.path: file for file in syncer.list_files()}
+    file = files["sub; dir/file;name.txt"]
+    assert file.mtime == path.mtime
+    assert file.size == len("content")
+
+
+def test_list_files_failure_raised() -> None:
+    syncer = Syncer(SyncConfig(source=Path("/"), dest=Path("/__missing__")))
+    with pytest.raises(cli.CalledProcessError):
+        list(syncer.list_files())
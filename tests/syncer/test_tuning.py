@@ -0,0 +1,76 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from backup.context import context
+from backup.models import Path
+from backup.syncer import SyncConfig, Syncer
+from backup.syncer.cli_runner import CliRunner
+from backup.syncer.daemon import create_options
+from backup.syncer.tuning import Tuner
+
+
+@pytest.fixture(autouse=True)
+def _history() -> Iterator[None]:
+    context.storage.throughput = {}
+    yield
+    context.storage.throughput = {}
+
+
+def create_tuner(size: int, number: int = 10, transfers: int | None = None) -> Tuner:
+    config = SyncConfig(source=Path("/"), dest=Path("backupmaster:"))
+    config.transfers = transfers
+    return Tuner(config, [size] * number, is_remote=True)
+
+
+def test_push_tuned(mocked_syncer_with_filled_content: Syncer) -> None:
+    config = mocked_syncer_with_filled_content.config
+    syncer = Syncer(config.with_paths([Path("0.txt"), Path("1.txt")]))
+    with patch.object(context.options, "adaptive_tuning", new=True):
+        syncer.push()
+    assert syncer.config.transfers == len(syncer.config.paths)
+    assert syncer.config.checkers == context.config.n_min_checkers
+    assert syncer.config.multi_thread_streams is None
+    assert set(context.storage.throughput) == {"local-small"}
+
+
+def test_pull_sizes_read_locally(mocked_syncer_with_filled_content: Syncer) -> None:
+    source = mocked_syncer_with_filled_content.config.source
+    config = SyncConfig(source=source, dest=Path("backupmaster:"))
+    config = config.with_paths([Path("0.txt")])
+    tuner = Tuner.from_config(config, reverse=True)
+    assert tuner.sizes == [(source / "0.txt").size]
+    assert tuner.key == "remote-small"
+    assert tuner.choose_transfers() == context.config.n_parallel_transfers
+
+
+def test_large_files_split() -> None:
+    tuner = create_tuner(int(1e8))
+    with tuner.tune():
+        pass
+    assert tuner.config.transfers == context.config.n_large_file_transfers
+    assert tuner.config.multi_thread_streams == context.config.max_multi_thread_streams
+    assert create_options(tuner.config)["MultiThreadStreams"] == 16
+    options = CliRunner.generate_options(multi_thread_streams=16)
+    assert {"multi-thread-streams": 16} in list(options)
+
+
+def test_transfers_climbed() -> None:
+    transfers = []
+    for duration in (4, 2, 1, 2, 1):
+        tuner = create_tuner(int(1e8), number=100)
+        transfers.append(tuner.choose_transfers())
+        tuner.record(transfers[-1], tuner.max_transfers, duration)
+    assert transfers == [4, 8, 16, 32, 16]
+
+
+def test_limit_reversed() -> None:
+    tuner = create_tuner(1, transfers=2)
+    tuner.record(2, tuner.max_transfers, 1)
+    assert tuner.choose_transfers() == 1
+
+
+def test_missing_file_sized(mocked_syncer: Syncer) -> None:
+    config = mocked_syncer.config.with_paths([Path("missing.txt")])
+    assert Tuner.from_config(config).sizes == [0]
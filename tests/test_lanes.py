@@ -0,0 +1,71 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+
+from backup.backup import Backup
+from backup.backup.lanes import Lanes
+from backup.backup.scheduler import SyncJob, SyncScheduler
+from backup.context import context
+from backup.models import BackupConfig, Path
+
+small_file_size = 10
+
+
+@pytest.fixture(autouse=True)
+def _small_file_size() -> Iterator[None]:
+    with patch.object(context.config, "small_file_size", new=small_file_size):
+        yield
+
+
+@pytest.fixture
+def prioritized_config(mocked_backup: Backup) -> BackupConfig:
+    mocked_backup.config["syncs"][0]["priorities"] = {"config": 1}
+    source = Path(mocked_backup.config["source"])
+    (source / "config" / "settings.txt").text = "settings"
+    (source / "small.txt").text = "small"
+    (source / "large.bin").byte_content = b"0" * (small_file_size + 1)
+    return mocked_backup.backup_configs[0]
+
+
+def create_job(config: BackupConfig, *names: str) -> SyncJob:
+    return SyncJob(config, [Path(name) for name in names])
+
+
+def test_priorities_parsed(prioritized_config: BackupConfig) -> None:
+    assert prioritized_config.priorities == {Path("config"): 1}
+
+
+def test_lanes_split(prioritized_config: BackupConfig) -> None:
+    names = "large.bin", "small.txt", "config/settings.txt"
+    job = create_job(prioritized_config, *names)
+    lanes = Lanes(prioritized_config, job.remote).lanes
+    assert [[str(path) for path in lane.config.paths] for lane in lanes] == [
+        ["config/settings.txt"],
+        ["small.txt"],
+        ["large.bin"],
+    ]
+    large_budget = context.config.n_large_file_transfers
+    small_budget = (context.config.n_parallel_transfers - large_budget) // 2
+    transfers = [lane.config.transfers for lane in lanes]
+    assert transfers == [small_budget, small_budget, large_budget]
+    assert not any(lane.config.show_progress for lane in lanes)
+
+
+def test_large_lanes_use_full_budget(prioritized_config: BackupConfig) -> None:
+    job = create_job(prioritized_config, "large.bin")
+    (lane,) = Lanes(prioritized_config, job.remote).lanes
+    assert lane.config.transfers == context.config.n_parallel_transfers
+    assert lane.config.show_progress
+
+
+def test_priority_duration_reported(
+    prioritized_config: BackupConfig,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    job = create_job(prioritized_config, "small.txt", "config/settings.txt")
+    SyncScheduler().run([job])
+    assert (prioritized_config.dest / "config" / "settings.txt").text == "settings"
+    assert (prioritized_config.dest / "small.txt").text == "small"
+    assert job.priority_duration is not None
+    assert "priority paths in" in capsys.readouterr().out
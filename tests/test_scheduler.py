@@ -0,0 +1,100 @@
+import subprocess
+from unittest.mock import patch
+
+import cli
+import pytest
+
+from backup.backup import Backup
+from backup.backup.cache import ScanIndex
+from backup.backup.change_scanner import ChangeScanner
+from backup.backup.lanes import Lanes
+from backup.backup.scheduler import SyncJob, SyncScheduler
+from backup.context import context
+from backup.models import Path
+from backup.syncer import Syncer
+
+push = Syncer.push
+
+
+@pytest.fixture
+def backup_with_configs(mocked_backup: Backup) -> Backup:
+    source = Path(mocked_backup.config["source"])
+    mocked_backup.config["syncs"] = [
+        {"source": name, "dest": name, "includes": [""]} for name in ("a", "b")
+    ]
+    for name in ("a", "b"):
+        (source / name / "file.txt").text = name
+    return mocked_backup
+
+
+def test_configs_synced(backup_with_configs: Backup) -> None:
+    backup_with_configs.push()
+    for config in backup_with_configs.backup_configs:
+        assert (config.dest / "file.txt").text == config.source.name
+        assert (config.cache / "file.txt").text == config.source.name
+
+
+def test_transfer_budget_shared(backup_with_configs: Backup) -> None:
+    transfers = []
+
+    def record(syncer: Syncer, *, reverse: bool = False) -> object:
+        transfers.append(syncer.config.transfers)
+        return push(syncer, reverse=reverse)
+
+    with patch.object(Syncer, "push", autospec=True, side_effect=record):
+        backup_with_configs.push()
+    budget = context.config.n_parallel_transfers // 2
+    assert sorted(transfers, key=str) == [budget, budget, None, None]
+
+
+def test_failures_aggregated(backup_with_configs: Backup) -> None:
+    failing = backup_with_configs.backup_configs[0]
+
+    def fail(
+        syncer: Syncer,
+        *,
+        reverse: bool = False,
+    ) -> subprocess.CompletedProcess[str]:
+        if syncer.config.dest == failing.dest:
+            raise cli.CalledProcessError
+        return push(syncer, reverse=reverse)
+
+    with (
+        patch.object(Syncer, "push", autospec=True, side_effect=fail),
+        pytest.raises(ExceptionGroup) as exception_info,
+    ):
+        backup_with_configs.push()
+    (exception,) = exception_info.value.exceptions
+    assert failing.source.name in exception.__notes__[0]
+    scanner = ChangeScanner(backup_with_configs.backup_configs)
+    changes = list(scanner.calculate_changes())
+    assert [change.paths for change in changes] == [[Path("file.txt")], []]
+
+
+def test_deleted_path_invalidated(backup_with_configs: Backup) -> None:
+    config = backup_with_configs.backup_configs[0]
+    (config.cache / "file.txt").text = "cached"
+    job = SyncJob(config, [Path("file.txt"), Path("deleted.txt")])
+    SyncScheduler.invalidate(job)
+    assert (config.cache / "file.txt").text == ""
+    assert (config.cache / "deleted.txt").text == " "
+
+
+def test_no_jobs() -> None:
+    SyncScheduler().run([])
+
+
+def test_interrupted_push_retried(backup_with_configs: Backup) -> None:
+    config = backup_with_configs.backup_configs[0]
+    # an interrupt is not handled like a failure, as if the process was killed
+    with (
+        patch.object(Lanes, "run", side_effect=KeyboardInterrupt),
+        pytest.raises(BaseExceptionGroup),
+    ):
+        backup_with_configs.push()
+    assert (config.cache / "file.txt").text == "a"
+    assert not (config.dest / "file.txt").exists()
+    changes = backup_with_configs.push()
+    assert changes[0].paths == [Path("file.txt")]
+    assert (config.dest / "file.txt").text == "a"
+    assert not ScanIndex(config.cache).load_pending()
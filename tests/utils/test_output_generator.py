@@ -0,0 +1,48 @@
+import sys
+from unittest.mock import patch
+
+import cli
+import pytest
+from cli.commands.runner import Runner
+
+from backup.utils import generate_output_lines, output_generator
+from backup.utils.output_generator import generate_output_batches
+
+
+def create_runner(code: str) -> Runner[str]:
+    return Runner((sys.executable, "-c", code))
+
+
+def test_lines_split_over_chunks() -> None:
+    code = "import sys; sys.stdout.write('first\\n\\n  second  \\nlast')"
+    with patch.object(output_generator, "chunk_size", new=4):
+        lines = list(generate_output_lines(create_runner(code)))
+    assert lines == ["first", "second", "last"]
+
+
+def test_only_newlines_split() -> None:
+    code = "import sys; sys.stdout.write('= c\\x0cd\\u2028.txt\\r\\n= e.txt\\n')"
+    lines = list(generate_output_lines(create_runner(code)))
+    assert lines == ["= c\x0cd\u2028.txt", "= e.txt"]
+
+
+def test_lines_batched() -> None:
+    code = "print('\\n'.join(str(number) for number in range(1000)))"
+    batches = list(generate_output_batches(create_runner(code)))
+    assert len(batches) < 1000
+    assert [line for batch in batches for line in batch] == [
+        str(number) for number in range(1000)
+    ]
+
+
+def test_errors_without_output_raised() -> None:
+    code = "import sys; sys.stderr.write('failed\\n')"
+    with pytest.raises(cli.CalledProcessError, match="failed"):
+        list(generate_output_lines(create_runner(code)))
+
+
+def test_exit_code_checked() -> None:
+    code = "import sys; print('partial'); sys.exit(1)"
+    assert list(generate_output_lines(create_runner(code))) == ["partial"]
+    with pytest.raises(cli.CalledProcessError):
+        list(generate_output_lines(create_runner(code), check=True))
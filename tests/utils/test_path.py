@@ -4,3 +4,17 @@ from backup.models import Path
 def test_is_root() -> None:
     path = Path("/") / "etc" / "non-existing"
     assert path.is_root
+
+
+def test_remote_is_not_root() -> None:
+    path = Path("remote:") / "etc"
+    assert path.is_remote
+    assert not path.is_root
+
+
+def test_size_read() -> None:
+    with Path.tempfile() as path:
+        path.text = "content"
+        assert path.read_size() == len("content")
+    assert path.read_size() is None
+    assert (path / "child").read_size() is None
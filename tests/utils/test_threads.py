@@ -0,0 +1,22 @@
+import pytest
+
+from backup.utils.threads import run_in_threads
+
+
+def test_all_items_processed() -> None:
+    processed: list[int] = []
+    run_in_threads(processed.append, range(10), n_workers=4)
+    assert sorted(processed) == list(range(10))
+
+
+def test_exceptions_raised_after_all_calls() -> None:
+    processed: list[int] = []
+
+    def process(item: int) -> None:
+        if not item:
+            raise ValueError
+        processed.append(item)
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        run_in_threads(process, range(10), n_workers=1)
+    assert sorted(processed) == list(range(1, 10))